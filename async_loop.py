@@ -0,0 +1,88 @@
+# async_loop.py - One background asyncio event loop shared by sync code (no thread per request)
+import asyncio
+import threading
+
+class BackgroundLoop:
+    """
+    Runs an asyncio event loop in a daemon thread so blocking code can use async clients
+
+    Usage:
+        loop = get_loop()
+        text = loop.run(client.agenerate(prompt), timeout=30)      # blocking call
+        future = loop.submit(client.agenerate(prompt))             # concurrent.futures.Future
+        future.cancel()                                            # cancels the asyncio task
+    """
+
+    def __init__(self, name="asyncio_loop"):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, daemon=True, name=name)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        """Schedule a coroutine on the loop - returns a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """
+        Run a coroutine on the loop and wait for its result
+
+        Raises:
+            concurrent.futures.TimeoutError (the coroutine is cancelled)
+        """
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=2)
+
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_loop():
+    """Shared background loop (started on first use)"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = BackgroundLoop()
+        return _loop
+
+
+# Test: many concurrent "requests" on one thread
+if __name__ == "__main__":
+    import time
+
+    print("🔁 Testing background event loop...\n")
+
+    async def fake_request(i):
+        await asyncio.sleep(0.2)
+        return f"reply {i}"
+
+    async def many():
+        return await asyncio.gather(*(fake_request(i) for i in range(50)))
+
+    loop = get_loop()
+    start = time.perf_counter()
+    replies = loop.run(many())
+    print(f"   {len(replies)} concurrent requests in {time.perf_counter() - start:.2f}s on one thread")
+
+    future = loop.submit(fake_request(99))
+    future.cancel()
+    print(f"   Cancelled: {future.cancelled()}")
+
+    try:
+        loop.run(asyncio.sleep(5), timeout=0.1)
+    except Exception as e:
+        print(f"   Timeout: {type(e).__name__}")
+
+    print("\n✅ Event loop test complete!")
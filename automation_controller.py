@@ -1,11 +1,15 @@
 # automation_controller.py
-import pyautogui
+from lazy_imports import lazy_import
 import time
 import math
 
-# Safety settings
-pyautogui.FAILSAFE = True  # Move mouse to corner to abort
-pyautogui.PAUSE = 0.1      # Small delay between actions
+def _configure_pyautogui(module):
+    """Safety settings"""
+    module.FAILSAFE = True  # Move mouse to corner to abort
+    module.PAUSE = 0.1      # Small delay between actions
+
+# Imported on first mouse/keyboard action
+pyautogui = lazy_import('pyautogui', on_load=_configure_pyautogui)
 
 class AutomationController:
     """
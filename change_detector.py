@@ -0,0 +1,277 @@
+# change_detector.py - Debounced screen change detection with structured added/removed/moved events
+import time
+
+def box_iou(a, b):
+    """IoU of two [x1, y1, x2, y2] boxes"""
+    ix1 = max(a[0], b[0])
+    iy1 = max(a[1], b[1])
+    ix2 = min(a[2], b[2])
+    iy2 = min(a[3], b[3])
+    if ix2 <= ix1 or iy2 <= iy1:
+        return 0.0
+    inter = (ix2 - ix1) * (iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _center(obj):
+    if 'center' in obj:
+        return obj['center']
+    x1, y1, x2, y2 = obj['bbox']
+    return [(x1 + x2) / 2, (y1 + y2) / 2]
+
+
+def _distance(a, b):
+    return ((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2) ** 0.5
+
+
+class ChangeDetector:
+    """
+    Matches detections between frames (same class, IoU / distance) and only reports
+    a change once it persisted for several frames, so flickering boxes stay quiet
+
+    Usage:
+        detector = ChangeDetector(persist_frames=3)
+        events = detector.update(analysis['objects'], analysis['caption'])
+        if events:
+            print(describe_events(events))
+
+    Events:
+        {'type': 'added',   'class_name', 'bbox'}
+        {'type': 'removed', 'class_name', 'bbox'}
+        {'type': 'moved',   'class_name', 'bbox', 'from', 'to'}
+        {'type': 'scene',   'from', 'to'}
+    """
+
+    def __init__(self, persist_frames=3, iou_threshold=0.3, match_distance=80,
+                 move_threshold=50, watch_scene=True):
+        """
+        Args:
+            persist_frames: Frames an appearance / disappearance / move must last before it is reported
+            iou_threshold: Minimum IoU to treat two boxes of the same class as one object
+            match_distance: Fallback match by center distance (pixels) for objects that moved a lot
+            move_threshold: Pixels an object must move to report 'moved' (None = never report moves)
+            watch_scene: Also report (persistent) caption changes
+        """
+        self.persist_frames = max(1, persist_frames)
+        self.iou_threshold = iou_threshold
+        self.match_distance = match_distance
+        self.move_threshold = move_threshold
+        self.watch_scene = watch_scene
+
+        self.tracks = []       # Confirmed objects
+        self.candidates = []   # Seen, but not for long enough yet
+        self.scene = None
+        self.scene_candidate = None
+        self.scene_count = 0
+        self.frames = 0
+        self.update_time = 0.0
+
+    def reset(self):
+        self.tracks = []
+        self.candidates = []
+        self.scene = None
+        self.scene_candidate = None
+        self.scene_count = 0
+
+    def _match(self, entries, objects):
+        """
+        Greedy one-to-one matching of entries (tracks or candidates) to detections
+
+        Returns:
+            (list of (entry, obj) pairs, unmatched entries, unmatched objects)
+        """
+        by_class = {}
+        for j, obj in enumerate(objects):
+            by_class.setdefault(obj['class_name'], []).append(j)
+
+        pairs = []
+        for i, entry in enumerate(entries):
+            for j in by_class.get(entry['class_name'], ()):
+                obj = objects[j]
+                iou = box_iou(entry['bbox'], obj['bbox'])
+                if iou >= self.iou_threshold:
+                    pairs.append((1.0 + iou, i, j))
+                    continue
+                distance = _distance(entry['center'], _center(obj))
+                if distance <= self.match_distance:
+                    pairs.append((1.0 - distance / (self.match_distance + 1), i, j))
+
+        matched = []
+        used_entries = set()
+        used_objects = set()
+        for _, i, j in sorted(pairs, reverse=True):
+            if i in used_entries or j in used_objects:
+                continue
+            used_entries.add(i)
+            used_objects.add(j)
+            matched.append((entries[i], objects[j]))
+
+        unmatched_entries = [entry for i, entry in enumerate(entries) if i not in used_entries]
+        unmatched_objects = [obj for j, obj in enumerate(objects) if j not in used_objects]
+        return matched, unmatched_entries, unmatched_objects
+
+    def update(self, objects, scene=None):
+        """
+        Feed one frame of detections
+
+        Args:
+            objects: Detections with 'class_name' and 'bbox' (YOLODetector format)
+            scene: Optional caption of the frame
+
+        Returns:
+            list of events (empty = nothing changed)
+        """
+        start = time.perf_counter()
+        self.frames += 1
+        events = []
+
+        # 1. Confirmed objects
+        matched, missing, new_objects = self._match(self.tracks, objects)
+
+        for track, obj in matched:
+            track['missed'] = 0
+            track['bbox'] = obj['bbox']
+            track['center'] = _center(obj)
+
+            if self.move_threshold is None:
+                continue
+            if _distance(track['center'], track['anchor']) > self.move_threshold:
+                track['moving'] += 1
+                if track['moving'] >= self.persist_frames:
+                    events.append({'type': 'moved', 'class_name': track['class_name'], 'bbox': track['bbox'],
+                                   'from': track['anchor'], 'to': track['center']})
+                    track['anchor'] = track['center']
+                    track['moving'] = 0
+            else:
+                track['moving'] = 0
+
+        for track in missing:
+            track['missed'] += 1
+            if track['missed'] >= self.persist_frames:
+                self.tracks.remove(track)
+                events.append({'type': 'removed', 'class_name': track['class_name'], 'bbox': track['bbox']})
+
+        # 2. New objects must show up in persist_frames consecutive frames
+        matched, _, fresh = self._match(self.candidates, new_objects)
+        candidates = []
+        for candidate, obj in matched:
+            candidate['seen'] += 1
+            candidate['bbox'] = obj['bbox']
+            candidate['center'] = _center(obj)
+            candidates.append(candidate)
+        for obj in fresh:
+            candidates.append({'class_name': obj['class_name'], 'bbox': obj['bbox'],
+                               'center': _center(obj), 'seen': 1})
+
+        self.candidates = []
+        for candidate in candidates:
+            if candidate['seen'] >= self.persist_frames:
+                self.tracks.append({'class_name': candidate['class_name'], 'bbox': candidate['bbox'],
+                                    'center': candidate['center'], 'anchor': candidate['center'],
+                                    'missed': 0, 'moving': 0})
+                events.append({'type': 'added', 'class_name': candidate['class_name'], 'bbox': candidate['bbox']})
+            else:
+                self.candidates.append(candidate)
+
+        # 3. Scene caption (same hysteresis)
+        if self.watch_scene and scene is not None:
+            if self.scene is None:
+                self.scene = scene
+                events.append({'type': 'scene', 'from': None, 'to': scene})
+            elif scene == self.scene:
+                self.scene_candidate = None
+                self.scene_count = 0
+            else:
+                if scene == self.scene_candidate:
+                    self.scene_count += 1
+                else:
+                    self.scene_candidate = scene
+                    self.scene_count = 1
+                if self.scene_count >= self.persist_frames:
+                    events.append({'type': 'scene', 'from': self.scene, 'to': scene})
+                    self.scene = scene
+                    self.scene_candidate = None
+                    self.scene_count = 0
+
+        self.update_time += time.perf_counter() - start
+        return events
+
+    def objects(self):
+        """Currently confirmed objects"""
+        return [{'class_name': t['class_name'], 'bbox': t['bbox'], 'center': t['center']} for t in self.tracks]
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'tracks': len(self.tracks),
+            'candidates': len(self.candidates),
+            'avg_update_us': round(self.update_time / self.frames * 1e6, 1) if self.frames else 0.0,
+        }
+
+
+def describe_events(events, limit=5):
+    """Short human readable summary, e.g. '🆕 button, person | ❌ dog'"""
+    groups = [
+        ('🆕', [e['class_name'] for e in events if e['type'] == 'added']),
+        ('❌', [e['class_name'] for e in events if e['type'] == 'removed']),
+        ('↔️', [e['class_name'] for e in events if e['type'] == 'moved']),
+    ]
+    parts = []
+    for icon, names in groups:
+        if names:
+            more = f" +{len(names) - limit}" if len(names) > limit else ""
+            parts.append(f"{icon} {', '.join(names[:limit])}{more}")
+    for event in events:
+        if event['type'] == 'scene':
+            parts.append(f"🎬 {event['to']}")
+    return " | ".join(parts)
+
+
+# Behaviour check + benchmark
+if __name__ == "__main__":
+    import random
+
+    print("🔄 Testing change detector...\n")
+
+    def box(name, x, y, w=60, h=30):
+        return {'class_name': name, 'bbox': [x, y, x + w, y + h], 'center': [x + w / 2, y + h / 2]}
+
+    detector = ChangeDetector(persist_frames=3)
+    base = [box('button', 100, 100), box('textbox', 300, 200)]
+
+    for frame in range(4):
+        events = detector.update(base, "a chat app")
+        print(f"   frame {frame}: {describe_events(events) or '-'}")
+
+    # A box that flickers for one frame must not fire
+    print(f"   flicker:  {describe_events(detector.update(base + [box('popup', 500, 50)], 'a chat app')) or '-'}")
+    for frame in range(3):
+        events = detector.update(base, "a chat app")
+    print(f"   after:    {describe_events(events) or '-'}")
+
+    # A real move is reported once
+    moved = [box('button', 160, 100), base[1]]
+    for frame in range(4):
+        events = detector.update(moved, "a chat app")
+        if events:
+            print(f"   moved:    {describe_events(events)}")
+
+    # Benchmark: 50 jittering objects with random flicker
+    print("\n⏱️  Benchmark (50 objects, 2000 frames)...")
+    random.seed(0)
+    scene_objects = [box(random.choice(['button', 'icon', 'text', 'image']),
+                         random.randint(0, 580), random.randint(0, 610)) for _ in range(50)]
+    bench = ChangeDetector(persist_frames=3)
+    fired = 0
+    start = time.perf_counter()
+    for _ in range(2000):
+        frame_objects = [box(o['class_name'], o['bbox'][0] + random.randint(-3, 3), o['bbox'][1] + random.randint(-3, 3))
+                         for o in scene_objects if random.random() > 0.05]
+        if bench.update(frame_objects, "desktop"):
+            fired += 1
+    per_frame_ms = (time.perf_counter() - start) / 2000 * 1000
+
+    print(f"   {per_frame_ms:.3f}ms per frame ({per_frame_ms / 100:.1%} of a 100ms frame budget at 10 FPS)")
+    print(f"   frames with events: {fired} / 2000 (5% flicker per object)")
+    print("\n✅ Change detector test complete!")
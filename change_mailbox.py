@@ -0,0 +1,143 @@
+# change_mailbox.py - Latest-value mailbox for screen changes (bursts cost one LLM call)
+from collections import Counter
+import threading
+import time
+
+class ChangeMailbox:
+    """
+    Holds only the NEWEST screen change plus what appeared / disappeared
+    since the AI worker last took one
+
+    Usage:
+        mailbox.post(analysis, task="describe what changed")   # capture loop
+        event = mailbox.take(timeout=1)                         # AI worker
+        if event:
+            print(event['appeared'], event['disappeared'], event['coalesced'])
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ready = threading.Condition(self.lock)
+        self.latest = None       # Newest posted change
+        self.baseline = None     # Object counts the worker last reacted to
+        self.closed = False
+
+        self.posted = 0
+        self.taken = 0
+        self.coalesced = 0       # Posts merged into an event that was still waiting
+
+    @staticmethod
+    def _object_counts(analysis):
+        return Counter(obj['class_name'] for obj in analysis.get('objects', []))
+
+    def post(self, analysis, task=None):
+        """
+        Replace the waiting change with a newer one (never blocks, never grows)
+
+        Args:
+            analysis: ScreenUnderstanding result of the changed frame
+            task: Optional instruction for the worker
+        """
+        with self.ready:
+            if self.latest is not None:
+                self.coalesced += 1
+                count = self.latest['count'] + 1
+                first_posted = self.latest['first_posted']
+            else:
+                count = 1
+                first_posted = time.perf_counter()
+
+            self.latest = {
+                'analysis': analysis,
+                'task': task,
+                'count': count,
+                'first_posted': first_posted,
+            }
+            self.posted += 1
+            self.ready.notify()
+
+    def take(self, timeout=None):
+        """
+        Wait for a change and consume it
+
+        Returns:
+            dict with 'analysis', 'task', 'appeared', 'disappeared', 'coalesced'
+            (changes merged into this one) and 'waited' (seconds since the first
+            of them) - or None on timeout / close
+        """
+        with self.ready:
+            if not self.ready.wait_for(lambda: self.latest is not None or self.closed, timeout):
+                return None
+            if self.latest is None:
+                return None
+
+            latest, self.latest = self.latest, None
+            counts = self._object_counts(latest['analysis'])
+            baseline = self.baseline if self.baseline is not None else Counter()
+            self.baseline = counts
+            self.taken += 1
+
+        # Net diff since the last reaction (things that came and went cancel out)
+        return {
+            'analysis': latest['analysis'],
+            'task': latest['task'],
+            'appeared': sorted((counts - baseline).elements()),
+            'disappeared': sorted((baseline - counts).elements()),
+            'coalesced': latest['count'] - 1,
+            'waited': time.perf_counter() - latest['first_posted'],
+        }
+
+    def pending(self):
+        """True if a change is waiting"""
+        with self.lock:
+            return self.latest is not None
+
+    def close(self):
+        """Wake the worker so it can exit"""
+        with self.ready:
+            self.closed = True
+            self.ready.notify_all()
+
+    def stats(self):
+        with self.lock:
+            return {'posted': self.posted, 'taken': self.taken, 'coalesced': self.coalesced}
+
+
+def describe_changes(event, limit=5):
+    """One line for the LLM prompt, e.g. 'New: button, person. Gone: dog.'"""
+    def summarize(names):
+        counts = Counter(names)
+        parts = [f"{n}x {name}" if n > 1 else name for name, n in counts.most_common(limit)]
+        return ", ".join(parts)
+
+    parts = []
+    if event['appeared']:
+        parts.append(f"New: {summarize(event['appeared'])}.")
+    if event['disappeared']:
+        parts.append(f"Gone: {summarize(event['disappeared'])}.")
+    return " ".join(parts) if parts else "The scene changed."
+
+
+# Test the mailbox with a burst of changes
+if __name__ == "__main__":
+    print("📬 Testing change mailbox...\n")
+
+    mailbox = ChangeMailbox()
+
+    def fake_analysis(*names):
+        return {'objects': [{'class_name': name} for name in names], 'caption': 'test'}
+
+    mailbox.post(fake_analysis('button'))
+    print(f"   First change: {describe_changes(mailbox.take())}")
+
+    # Burst of 20 changes while the worker is busy
+    for i in range(20):
+        names = ['button', 'person'] + (['dog'] if i % 2 else [])
+        mailbox.post(fake_analysis(*names), task="describe what changed")
+
+    event = mailbox.take(timeout=1)
+    print(f"   After burst:  {describe_changes(event)} (merged {event['coalesced']} changes)")
+    print(f"   Nothing left: {mailbox.take(timeout=0.1)}")
+
+    print(f"\n📊 {mailbox.stats()}")
+    print("✅ Mailbox test complete!")
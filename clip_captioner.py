@@ -1,9 +1,84 @@
 # clip_captioner.py
-import clip
-import torch
+from lazy_imports import lazy_import
 from PIL import Image
 import numpy as np
 
+# Heavy - imported on first use
+clip = lazy_import('clip')
+torch = lazy_import('torch')
+
+class CaptionResult:
+    """
+    Caption result that keeps the raw score vector
+    top_k, all_scores and rounding are only computed (and synced to host) on access
+    """
+    
+    KEYS = ('primary', 'confidence', 'top_k', 'all_scores')
+    
+    def __init__(self, scores, templates, top_k=3):
+        """
+        Args:
+            scores: 1-D tensor of softmax scores, one per template
+            templates: Template descriptions (same order as scores)
+            top_k: Number of descriptions returned by ['top_k']
+        """
+        self.scores = scores
+        self.templates = templates
+        self.k = min(top_k, len(templates))
+        self._top = None
+        self._all = None
+    
+    @property
+    def top(self):
+        """Top K descriptions with rounded scores"""
+        if self._top is None:
+            values, indices = self.scores.topk(self.k)
+            values, indices = values.tolist(), indices.tolist()
+            self._top = [
+                {'description': self.templates[index], 'confidence': round(value, 3)}
+                for value, index in zip(values, indices)
+            ]
+        return self._top
+    
+    @property
+    def primary(self):
+        return self.top[0]['description']
+    
+    @property
+    def confidence(self):
+        return self.top[0]['confidence']
+    
+    @property
+    def all_scores(self):
+        """All descriptions with rounded scores"""
+        if self._all is None:
+            self._all = {
+                template: round(score, 3)
+                for template, score in zip(self.templates, self.scores.tolist())
+            }
+        return self._all
+    
+    def __getitem__(self, key):
+        if key == 'top_k':
+            return self.top
+        if key in self.KEYS:
+            return getattr(self, key)
+        raise KeyError(key)
+    
+    def __contains__(self, key):
+        return key in self.KEYS
+    
+    def get(self, key, default=None):
+        return self[key] if key in self.KEYS else default
+    
+    def keys(self):
+        return list(self.KEYS)
+    
+    def to_dict(self):
+        """Materialize every field as a plain dict"""
+        return {key: self[key] for key in self.KEYS}
+
+
 class CLIPScreenCaptioner:
     """
     Use CLIP to classify screen scenes into predefined categories
@@ -46,21 +121,8 @@ class CLIPScreenCaptioner:
             text_features /= text_features.norm(dim=-1, keepdim=True)
         return text_features
     
-    def caption_frame(self, frame, top_k=3):
-        """
-        Generate caption for a screen frame
-        
-        Args:
-            frame: numpy array (H, W, 3) RGB image
-            top_k: Return top K most likely descriptions
-            
-        Returns:
-            dict: {
-                'primary': str,  # Most likely description
-                'top_k': list,   # Top K descriptions with scores
-                'all_scores': dict  # All descriptions with scores
-            }
-        """
+    def _score_frame(self, frame):
+        """Softmax scores of a frame against every template (1-D tensor, stays on device)"""
         # Convert numpy to PIL Image
         if isinstance(frame, np.ndarray):
             frame = Image.fromarray(frame)
@@ -73,32 +135,37 @@ class CLIPScreenCaptioner:
             image_features = self.model.encode_image(image_input)
             image_features /= image_features.norm(dim=-1, keepdim=True)
         
-        # Calculate similarity
-        similarity = (100.0 * image_features @ self.text_features.T).softmax(dim=-1)
-        values, indices = similarity[0].topk(top_k)
-        
-        # Build results
-        top_descriptions = []
-        all_scores = {}
+            # Calculate similarity
+            similarity = (100.0 * image_features @ self.text_features.T).softmax(dim=-1)
         
-        for i, (value, index) in enumerate(zip(values, indices)):
-            desc = self.scene_templates[index]
-            score = value.item()
-            top_descriptions.append({
-                'description': desc,
-                'confidence': round(score, 3)
-            })
+        return similarity[0]
+    
+    def caption_frame(self, frame, top_k=3):
+        """
+        Generate caption for a screen frame
         
-        # All scores
-        for i, template in enumerate(self.scene_templates):
-            all_scores[template] = round(similarity[0][i].item(), 3)
+        Args:
+            frame: numpy array (H, W, 3) RGB image
+            top_k: Return top K most likely descriptions
+            
+        Returns:
+            CaptionResult (dict-style access): {
+                'primary': str,  # Most likely description
+                'top_k': list,   # Top K descriptions with scores
+                'all_scores': dict  # All descriptions with scores
+            }
+        """
+        return CaptionResult(self._score_frame(frame), self.scene_templates, top_k=top_k)
+    
+    def caption_index(self, frame):
+        """
+        Fast path: only the best template
         
-        return {
-            'primary': top_descriptions[0]['description'],
-            'confidence': top_descriptions[0]['confidence'],
-            'top_k': top_descriptions,
-            'all_scores': all_scores
-        }
+        Returns: (template index, confidence) with a single host sync
+        """
+        confidence, index = self._score_frame(frame).max(dim=-1)
+        index, confidence = torch.stack([index.float(), confidence.float()]).tolist()
+        return int(index), confidence
     
     def get_simple_caption(self, frame):
         """
@@ -106,8 +173,8 @@ class CLIPScreenCaptioner:
         
         Returns: str
         """
-        result = self.caption_frame(frame, top_k=1)
-        return result['primary']
+        index, _ = self.caption_index(frame)
+        return self.scene_templates[index]
 
 
 # Test the captioner
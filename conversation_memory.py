@@ -0,0 +1,262 @@
+# conversation_memory.py - Bounded long-term chat memory: recent ring buffer + JSONL log + BM25 recall
+from collections import Counter, deque
+import heapq
+import itertools
+import json
+import math
+import os
+import re
+import threading
+import time
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'can', 'do', 'for', 'from', 'have', 'i',
+    'if', 'in', 'is', 'it', 'me', 'my', 'of', 'on', 'or', 'so', 'that', 'the', 'this', 'to', 'was',
+    'we', 'what', 'with', 'you', 'your', 'master', 'mimi', 'nya',
+}
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords"""
+    return [word for word in re.findall(r"[a-z0-9']+", text.lower()) if len(word) > 1 and word not in STOPWORDS]
+
+
+class BM25Index:
+    """Incremental BM25 over short documents (oldest documents can be removed)"""
+
+    def __init__(self, k1=1.2, b=0.75, max_df=0.2, max_scan=256):
+        """
+        Args:
+            max_df: Terms in more than this fraction of documents are skipped when the query
+                    has rarer ones (they barely change the ranking but dominate the cost)
+            max_scan: Postings scanned per term when the query only has common terms
+                      (the newest documents - keeps the fallback bounded)
+        """
+        self.k1 = k1
+        self.b = b
+        self.max_df = max_df
+        self.max_scan = max_scan
+        self.postings = {}      # term -> {doc_id: term frequency}
+        self.lengths = {}       # doc_id -> document length
+        self.total_length = 0
+
+    def add(self, doc_id, text):
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        length = sum(counts.values())
+        self.lengths[doc_id] = length
+        self.total_length += length
+
+    def remove(self, doc_id, text):
+        for term in set(tokenize(text)):
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.pop(doc_id, None)
+                if not docs:
+                    del self.postings[term]
+        self.total_length -= self.lengths.pop(doc_id, 0)
+
+    def search(self, query, k=3):
+        """Best (score, doc_id) pairs for a query"""
+        n = len(self.lengths)
+        if not n:
+            return []
+        avg_length = self.total_length / n or 1.0
+
+        base = self.k1 * (1 - self.b)
+        per_length = self.k1 * self.b / avg_length
+        lengths = self.lengths
+        terms = [self.postings[term] for term in set(tokenize(query)) if term in self.postings]
+        rare = [docs for docs in terms if len(docs) <= self.max_df * n]
+        scores = {}
+        for docs in rare or terms:
+            weight = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5)) * (self.k1 + 1)
+            # Only common terms - score just their newest postings (ids only grow, dicts keep insertion order)
+            postings = docs.items() if rare else itertools.islice(reversed(docs.items()), self.max_scan)
+            for doc_id, tf in postings:
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight * tf / (tf + base + per_length * lengths[doc_id])
+
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(score, doc_id) for doc_id, score in best]
+
+
+class ConversationMemory:
+    """
+    Long-term memory of chat exchanges with bounded RAM and disk use:
+    - the newest exchanges live in a ring buffer (they are in the prompt anyway)
+    - every exchange is appended to a JSONL log (survives restarts)
+    - exchanges that left the ring buffer are BM25-indexed for recall (up to max_indexed)
+
+    Usage:
+        memory.add("what's my cat called?", "Your cat is Mochi, Master! ♡")
+        for exchange in memory.recall("tell me about my cat", k=2):
+            print(exchange['user'], exchange['reply'])
+    """
+
+    def __init__(self, path='memory/conversation.jsonl', recent_size=6, max_indexed=5000,
+                 max_bytes=5 * 1024 * 1024):
+        """
+        Args:
+            path: JSONL log file (None = keep nothing on disk)
+            recent_size: Exchanges kept in the ring buffer (not searched - keep it in line with
+                         the verbatim conversation lines of the prompt, two lines per exchange)
+            max_indexed: Older exchanges kept searchable (oldest are forgotten first)
+            max_bytes: Log size limit - the log is compacted to its newest half beyond it
+        """
+        self.path = path
+        self.max_indexed = max_indexed
+        self.max_bytes = max_bytes
+
+        self.lock = threading.Lock()
+        self.recent = deque(maxlen=recent_size)
+        self.archive = deque()      # (doc_id, exchange) - indexed, oldest first
+        self.index = BM25Index()
+        self.next_id = 0
+        self.search_time = 0.0
+        self.searches = 0
+
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._load()
+
+    def _load(self):
+        """Index the newest exchanges of earlier sessions"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as f:
+            lines = deque(f, maxlen=self.max_indexed)
+        for line in lines:
+            try:
+                self._archive(json.loads(line))
+            except (ValueError, KeyError):
+                continue
+        if self.archive:
+            print(f"🧠 Remembered {len(self.archive)} exchanges from earlier sessions")
+
+    @staticmethod
+    def _text(exchange):
+        return f"{exchange['user']} {exchange['reply']}"
+
+    def _archive(self, exchange):
+        """Make an exchange searchable (lock held)"""
+        doc_id = self.next_id
+        self.next_id += 1
+        self.archive.append((doc_id, exchange))
+        self.index.add(doc_id, self._text(exchange))
+
+        while len(self.archive) > self.max_indexed:
+            old_id, old = self.archive.popleft()
+            self.index.remove(old_id, self._text(old))
+
+    def add(self, user_text, reply):
+        """Remember one exchange (empty replies are ignored)"""
+        if not reply or not reply.strip():
+            return
+        exchange = {'time': time.time(), 'user': user_text, 'reply': reply}
+        with self.lock:
+            if len(self.recent) == self.recent.maxlen:
+                self._archive(self.recent[0])
+            self.recent.append(exchange)
+
+            if self.path:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(exchange, ensure_ascii=False) + "\n")
+                    size = f.tell()
+                if size > self.max_bytes:
+                    self._compact()
+
+    def _compact(self):
+        """Keep the newest half of the log (lock held)"""
+        with open(self.path, encoding='utf-8') as f:
+            lines = f.readlines()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(lines[len(lines) // 2:])
+        os.replace(tmp_path, self.path)
+
+    def recall(self, query, k=3, min_score=1.0):
+        """
+        Most relevant older exchanges for a query
+
+        Returns:
+            list of {'time', 'user', 'reply'} (best first)
+        """
+        start = time.perf_counter()
+        with self.lock:
+            hits = self.index.search(query, k)
+            if hits:
+                first_id = self.archive[0][0]
+                found = [self.archive[doc_id - first_id][1] for score, doc_id in hits if score >= min_score]
+            else:
+                found = []
+        self.search_time += time.perf_counter() - start
+        self.searches += 1
+        return found
+
+    @staticmethod
+    def format(exchanges, name="Mimi"):
+        """Exchanges as prompt lines"""
+        return "\n".join(f"User: {e['user']}\n{name}: {e['reply']}" for e in exchanges)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'recent': len(self.recent),
+                'indexed': len(self.archive),
+                'terms': len(self.index.postings),
+                'avg_recall_us': round(self.search_time / self.searches * 1e6, 1) if self.searches else 0.0,
+            }
+
+    def report(self):
+        s = self.stats()
+        return (f"🧠 Memory: {s['recent']} recent + {s['indexed']} searchable exchanges "
+                f"({s['terms']} terms, recall {s['avg_recall_us']}µs)")
+
+
+# Test with a long synthetic session
+if __name__ == "__main__":
+    import random
+    import tempfile
+
+    print("🧠 Testing conversation memory...\n")
+
+    path = os.path.join(tempfile.mkdtemp(), "conversation.jsonl")
+    memory = ConversationMemory(path=path, recent_size=3, max_indexed=5000)
+
+    memory.add("My cat is called Mochi", "Mochi is such a cute name, Master! ♡")
+    memory.add("I have a job interview on Friday", "You'll do great on Friday! I believe in you~")
+
+    # Chat-like word frequencies: a few common words, a long tail of rare ones
+    random.seed(0)
+    words = ["video", "music", "game", "weather", "youtube", "coding", "lunch", "movie", "browser", "folder"] \
+        + [f"topic{i}" for i in range(3000)]
+    weights = [1.0 / rank for rank in range(1, len(words) + 1)]
+
+    def sentence(k):
+        return " ".join(random.choices(words, weights, k=k))
+
+    for i in range(20000):
+        memory.add(sentence(8), sentence(10))
+
+    # The two facts are long gone from the ring buffer - re-add them so they are within max_indexed
+    memory.add("Remember, my cat Mochi likes tuna", "Tuna for Mochi, got it! ✨")
+    for i in range(100):
+        memory.add(sentence(8), sentence(10))
+
+    for query in ["what does my cat eat?", "when is my interview?"]:
+        found = memory.recall(query, k=2)
+        print(f"   {query!r} → {[e['user'] for e in found]}")
+
+    print(f"\n   Recall over {memory.stats()['indexed']} exchanges (1000 queries each):")
+    for label, query in [("rare + common words", "should we watch that movie about topic42 again"),
+                         ("common words only", "should we watch a movie or play a game")]:
+        start = time.perf_counter()
+        for _ in range(1000):
+            memory.recall(query, k=3)
+        print(f"   {(time.perf_counter() - start):.3f}ms per query ({label}) - {query!r}")
+    print(f"   Log size: {os.path.getsize(path) / 1024:.0f} KB (limit {memory.max_bytes // 1024} KB)")
+
+    reloaded = ConversationMemory(path=path)
+    print(f"   Reloaded: {reloaded.recall('cat tuna', k=1)[0]['reply']}")
+    print(f"\n   {memory.report()}")
+    print("\n✅ Conversation memory test complete!")
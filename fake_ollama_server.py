@@ -0,0 +1,381 @@
+# fake_ollama_server.py - Stand-in Ollama HTTP server for offline, deterministic latency tests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import re
+import threading
+import time
+
+DEFAULT_RESPONSES = [
+    "Ehehe~ that looks fun, Master! ♡",
+    "Ooh, what are we doing now? Can I help? ✨",
+    "Nya~! I'm watching with you, Master!",
+]
+
+
+def split_tokens(text):
+    """Word-ish tokens that join back to the exact text"""
+    return re.findall(r"\s*\S+", text) or [text]
+
+
+def parse_keep_alive(value, default=300.0):
+    """Ollama keep_alive ('30m', '1h', 300, -1 = forever) in seconds"""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float('inf') if value < 0 else float(value)
+    match = re.fullmatch(r"(-?\d+(?:\.\d+)?)\s*(ms|s|m|h)?", str(value).strip())
+    if not match:
+        return default
+    number = float(match.group(1))
+    if number < 0:
+        return float('inf')
+    return number * {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600, None: 1}[match.group(2)]
+
+
+def fill_schema(schema, text):
+    """Minimal object for a JSON schema - the first string field gets the scripted text"""
+    result = {}
+    text_used = False
+    for name, spec in schema.get('properties', {}).items():
+        if 'enum' in spec:
+            result[name] = spec['enum'][0]
+        elif spec.get('type') == 'string':
+            result[name] = "" if text_used else text
+            text_used = True
+        elif spec.get('type') in ('integer', 'number'):
+            result[name] = 0
+        elif spec.get('type') == 'boolean':
+            result[name] = False
+        elif spec.get('type') == 'array':
+            result[name] = []
+        else:
+            result[name] = None
+    return result
+
+
+class FakeOllamaServer:
+    """
+    Implements /api/chat, /api/generate (streaming or not), /api/tags, /api/ps and /api/version
+    with fixed timing, so agent-loop latency can be measured without a GPU or a model
+
+    Usage:
+        with FakeOllamaServer(ttft=0.2, tokens_per_second=40) as server:
+            ai = VTuberAI(host=server.url)
+
+    Timing of a request:
+        load_time (model not loaded or keep_alive expired) + ttft, then one token every 1 / tokens_per_second
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, ttft=0.2, tokens_per_second=40.0, load_time=0.0,
+                 script=None, responses=None, models=('llama3.2:3b',)):
+        """
+        Args:
+            port: 0 = any free port (see url)
+            ttft: Seconds before the first token (prompt evaluation)
+            tokens_per_second: Generation speed
+            load_time: Extra delay when the model is not loaded (first request, expired keep_alive)
+            script: (regex, response) pairs matched against the last user message / prompt, in order
+            responses: Replies used in turn when nothing in the script matches
+            models: Model names reported by /api/tags (any name is accepted)
+        """
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.load_time = load_time
+        self.script = [(re.compile(pattern, re.IGNORECASE), response) for pattern, response in (script or [])]
+        self.responses = list(responses or DEFAULT_RESPONSES)
+        self.models = list(models)
+
+        self.lock = threading.Lock()
+        self.loaded = {}            # model -> expiry time
+        self.turn = 0
+        self.counts = {'requests': 0, 'streamed': 0, 'cancelled': 0, 'loads': 0}
+
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True, name="fake_ollama")
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    # ==================== BEHAVIOUR ====================
+
+    def reply_for(self, text):
+        """Scripted reply for a prompt (first matching rule, else the next default)"""
+        for pattern, response in self.script:
+            if pattern.search(text):
+                return response
+        with self.lock:
+            response = self.responses[self.turn % len(self.responses)]
+            self.turn += 1
+        return response
+
+    def _load(self, model, keep_alive):
+        """Seconds of load delay for this request (and keep the model loaded)"""
+        now = time.time()
+        with self.lock:
+            loaded = self.loaded.get(model, 0) > now
+            if not loaded:
+                self.counts['loads'] += 1
+            self.loaded[model] = now + parse_keep_alive(keep_alive)
+        return 0.0 if loaded else self.load_time
+
+    def _plan(self, body, prompt_text, history_text):
+        """Reply text, tokens and timing of one request"""
+        options = body.get('options') or {}
+        reply = self.reply_for(prompt_text)
+
+        output_format = body.get('format')
+        if isinstance(output_format, dict):
+            reply = json.dumps(fill_schema(output_format, reply), ensure_ascii=False)
+        elif output_format == 'json':
+            reply = json.dumps({'response': reply}, ensure_ascii=False)
+
+        tokens = split_tokens(reply)
+        if options.get('num_predict', -1) >= 0:
+            tokens = tokens[:options['num_predict']]
+
+        return {
+            'tokens': tokens,
+            'load': self._load(body.get('model', self.models[0]), body.get('keep_alive')),
+            'prompt_eval_count': len(split_tokens(history_text)),
+        }
+
+    # ==================== HTTP ====================
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, payload, status=200):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == '/api/tags':
+                    self._send_json({'models': [server._model_info(name) for name in server.models]})
+                elif self.path == '/api/ps':
+                    now = time.time()
+                    with server.lock:
+                        loaded = [name for name, expiry in server.loaded.items() if expiry > now]
+                    self._send_json({'models': [server._model_info(name) for name in loaded]})
+                elif self.path == '/api/version':
+                    self._send_json({'version': '0.0.0-fake'})
+                elif self.path in ('/', ''):
+                    data = b"Ollama is running"
+                    self.send_response(200)
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                else:
+                    self._send_json({'error': 'not found'}, 404)
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._send_json({'error': 'invalid JSON'}, 400)
+                    return
+
+                if self.path == '/api/chat':
+                    messages = body.get('messages') or []
+                    users = [m.get('content', '') for m in messages if m.get('role') == 'user']
+                    prompt_text = users[-1] if users else ""
+                    history_text = " ".join(m.get('content', '') for m in messages)
+                    chat = True
+                elif self.path == '/api/generate':
+                    prompt_text = body.get('prompt') or ""
+                    history_text = f"{body.get('system') or ''} {prompt_text}"
+                    chat = False
+                else:
+                    self._send_json({'error': 'not found'}, 404)
+                    return
+
+                with server.lock:
+                    server.counts['requests'] += 1
+
+                # Load-only request (empty prompt / no messages) - like Ollama's preload
+                if not (messages if chat else prompt_text):
+                    load = server._load(body.get('model', server.models[0]), body.get('keep_alive'))
+                    time.sleep(load)
+                    final = server._final(body, chat, "", {'tokens': [], 'load': load, 'prompt_eval_count': 0}, 0.0)
+                    final['done_reason'] = 'load'
+                    self._send_json(final)
+                    return
+
+                plan = server._plan(body, prompt_text, history_text)
+                if body.get('stream', True):
+                    self._stream(body, chat, plan)
+                else:
+                    start = time.perf_counter()
+                    time.sleep(plan['load'] + server.ttft + len(plan['tokens']) / server.tokens_per_second)
+                    self._send_json(server._final(body, chat, "".join(plan['tokens']), plan,
+                                                  time.perf_counter() - start))
+
+            def _write_chunk(self, payload):
+                data = (json.dumps(payload, ensure_ascii=False) + "\n").encode('utf-8')
+                self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+                self.wfile.flush()
+
+            def _stream(self, body, chat, plan):
+                with server.lock:
+                    server.counts['streamed'] += 1
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+
+                start = time.perf_counter()
+                try:
+                    time.sleep(plan['load'] + server.ttft)
+                    for i, token in enumerate(plan['tokens']):
+                        if i:
+                            time.sleep(1.0 / server.tokens_per_second)
+                        self._write_chunk(server._part(body, chat, token))
+                    self._write_chunk(server._final(body, chat, "", plan, time.perf_counter() - start))
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client closed the stream (aborted generation)
+                    with server.lock:
+                        server.counts['cancelled'] += 1
+                    self.close_connection = True
+
+        return Handler
+
+    def _model_info(self, name):
+        return {
+            'name': name,
+            'model': name,
+            'modified_at': '2024-01-01T00:00:00Z',
+            'size': 2019393189,
+            'digest': 'fake',
+            'details': {'format': 'gguf', 'family': 'llama', 'parameter_size': '3.2B', 'quantization_level': 'Q4_K_M'},
+        }
+
+    def _part(self, body, chat, text, done=False):
+        part = {'model': body.get('model', self.models[0]),
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'done': done}
+        if chat:
+            part['message'] = {'role': 'assistant', 'content': text}
+        else:
+            part['response'] = text
+        return part
+
+    def _final(self, body, chat, text, plan, elapsed):
+        """Last message with Ollama's timing fields (nanoseconds)"""
+        part = self._part(body, chat, text, done=True)
+        eval_seconds = len(plan['tokens']) / self.tokens_per_second
+        part.update({
+            'done_reason': 'stop',
+            'total_duration': int(elapsed * 1e9),
+            'load_duration': int(plan['load'] * 1e9),
+            'prompt_eval_count': plan['prompt_eval_count'],
+            'prompt_eval_duration': int(self.ttft * 1e9),
+            'eval_count': len(plan['tokens']),
+            'eval_duration': int(eval_seconds * 1e9),
+        })
+        return part
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts)
+
+
+# Run standalone: python fake_ollama_server.py --port 11435 --ttft 0.3 --tps 30
+# then point Mimi at it: OLLAMA_HOST=http://127.0.0.1:11435 python mimi_gui.py --chat-only
+if __name__ == "__main__":
+    import argparse
+    import http.client
+
+    parser = argparse.ArgumentParser(description="Fake Ollama server for offline latency tests")
+    parser.add_argument('--port', type=int, default=None, help="Serve on this port (omit to run the self-test)")
+    parser.add_argument('--ttft', type=float, default=0.2, help="Seconds to the first token")
+    parser.add_argument('--tps', type=float, default=40.0, help="Tokens per second")
+    parser.add_argument('--load', type=float, default=0.0, help="Model load time in seconds")
+    parser.add_argument('--script', help="JSON file with [[regex, response], ...]")
+    args = parser.parse_args()
+
+    script = None
+    if args.script:
+        with open(args.script, encoding='utf-8') as f:
+            script = json.load(f)
+
+    if args.port is not None:
+        server = FakeOllamaServer(port=args.port, ttft=args.ttft, tokens_per_second=args.tps,
+                                  load_time=args.load, script=script)
+        print(f"🦙 Fake Ollama on {server.url} (TTFT {args.ttft}s, {args.tps} tok/s) - Ctrl+C to stop")
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            server.httpd.server_close()
+    else:
+        print("🦙 Testing fake Ollama server...\n")
+
+        with FakeOllamaServer(ttft=args.ttft, tokens_per_second=args.tps, load_time=0.5,
+                              script=[(r"youtube", "Ooh, YouTube! What are we watching, Master? ✨")]) as server:
+            host, port = server.httpd.server_address[:2]
+
+            def post(path, payload):
+                conn = http.client.HTTPConnection(host, port)
+                conn.request('POST', path, json.dumps(payload), {'Content-Type': 'application/json'})
+                return conn.getresponse()
+
+            for attempt in ("cold", "warm"):
+                start = time.perf_counter()
+                response = post('/api/chat', {'model': 'llama3.2:3b', 'keep_alive': '30m',
+                                              'messages': [{'role': 'user', 'content': 'I opened youtube'}]})
+                first = None
+                text = ""
+                for line in response:
+                    part = json.loads(line)
+                    if first is None:
+                        first = time.perf_counter() - start
+                    text += part['message']['content']
+                total = time.perf_counter() - start
+                print(f"   {attempt}: first token {first * 1000:.0f}ms, total {total * 1000:.0f}ms → {text!r}")
+                print(f"         load {part['load_duration'] / 1e6:.0f}ms, {part['eval_count']} tokens, "
+                      f"{part['prompt_eval_count']} prompt tokens")
+
+            response = post('/api/generate', {'model': 'llama3.2:3b', 'prompt': 'hello', 'stream': False})
+            print(f"   generate: {json.loads(response.read())['response']!r}")
+
+            conn = http.client.HTTPConnection(host, port)
+            conn.request('GET', '/api/tags')
+            print(f"   tags: {[m['name'] for m in json.loads(conn.getresponse().read())['models']]}")
+            print(f"\n📊 {server.stats()}")
+
+        print("✅ Fake Ollama test complete!")
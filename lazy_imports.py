@@ -0,0 +1,151 @@
+# lazy_imports.py - Defer heavy imports (torch, clip, ultralytics, cv2, pyautogui) until first use
+import importlib
+import subprocess
+import sys
+import threading
+import time
+
+# module name -> seconds spent importing it lazily (the lock only guards this dict)
+_import_times = {}
+_import_lock = threading.Lock()
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is only imported on first attribute access
+
+    Usage:
+        torch = lazy_import('torch')
+        torch.no_grad()  # <- real import happens here
+    """
+
+    def __init__(self, name, on_load=None):
+        """
+        Args:
+            name: Module to import
+            on_load: Optional callback(module) run once after the import
+        """
+        self.__dict__['_name'] = name
+        self.__dict__['_on_load'] = on_load
+        self.__dict__['_module'] = None
+        # One lock per module: a slow torch import doesn't hold up pyautogui,
+        # and a lazy import triggered while loading another one can't deadlock
+        self.__dict__['_lock'] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is not None:
+            return module
+
+        with self.__dict__['_lock']:
+            if self.__dict__['_module'] is None:
+                name = self.__dict__['_name']
+                start = time.perf_counter()
+                module = importlib.import_module(name)
+                with _import_lock:
+                    _import_times[name] = time.perf_counter() - start
+
+                on_load = self.__dict__['_on_load']
+                if on_load:
+                    on_load(module)
+
+                self.__dict__['_module'] = module
+
+        return self.__dict__['_module']
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__['_module'] is not None else "not loaded"
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
+
+
+def lazy_import(name, on_load=None):
+    """Return a LazyModule for name (real module if it is already imported)"""
+    if name in sys.modules and on_load is None:
+        return sys.modules[name]
+    return LazyModule(name, on_load=on_load)
+
+
+def import_report():
+    """Import cost of every lazily loaded module in this process"""
+    with _import_lock:
+        items = sorted(_import_times.items(), key=lambda item: item[1], reverse=True)
+
+    lines = ["📦 LAZY IMPORTS:"]
+    if not items:
+        lines.append("   (nothing heavy imported)")
+    for name, seconds in items:
+        lines.append(f"   {name:<20} {seconds*1000:8.1f}ms")
+    return "\n".join(lines)
+
+
+def measure_import(module_name, python=sys.executable):
+    """
+    Measure the import cost of a module in a fresh interpreter (python -X importtime)
+
+    Returns:
+        dict: {'module', 'total_ms', 'top': [(name, cumulative_ms), ...], 'error'}
+    """
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module_name}"],
+        capture_output=True, text=True
+    )
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            continue  # header line
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), cumulative_us / 1000, depth))
+
+    total = next((ms for name, ms, _ in entries if name == module_name), 0.0)
+    top_level = sorted(
+        [(name, ms) for name, ms, depth in entries if depth <= 1 and name != module_name],
+        key=lambda item: item[1], reverse=True
+    )
+
+    error = None
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed"
+
+    return {'module': module_name, 'total_ms': round(total, 1), 'top': top_level[:5], 'error': error}
+
+
+# Import-time report for the project's modules
+if __name__ == "__main__":
+    modules = sys.argv[1:] or [
+        "screen_understanding",
+        "clip_captioner",
+        "yolo_detector",
+        "screen_capture",
+        "vtuber_ai_ollama",
+        "voice_controller",
+        "automation_controller",
+        "mimi_gui",
+        "mimi_complete",
+    ]
+
+    print("⏱️  IMPORT-TIME REPORT (fresh interpreter per module)\n")
+
+    for module_name in modules:
+        report = measure_import(module_name)
+        if report['error']:
+            print(f"❌ {module_name:<24} {report['error']}")
+            continue
+
+        print(f"📦 {module_name:<24} {report['total_ms']:8.1f}ms")
+        for name, ms in report['top']:
+            print(f"      {name:<21} {ms:8.1f}ms")
+
+    print("\n✅ Import report complete!")
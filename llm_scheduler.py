@@ -0,0 +1,173 @@
+# llm_scheduler.py - Priority + latest-wins scheduling of LLM requests (stale generations are aborted)
+from contextlib import contextmanager
+import itertools
+import threading
+from pipeline_metrics import metrics
+
+# Request priorities (lower = more important)
+PRIORITY_USER = 0       # User chat - pre-empts everything else
+PRIORITY_REACTION = 1   # Screen reactions
+PRIORITY_IDLE = 2       # Random thoughts / background work
+
+# Staleness key of screen reactions (a newer screen makes the running reaction stale)
+SCREEN_REACTION_KEY = 'screen_reaction'
+
+
+class LLMTicket:
+    """One scheduled LLM request - generation loops poll cancelled and close their stream"""
+
+    def __init__(self, priority, key, seq):
+        self.priority = priority
+        self.key = key
+        self.seq = seq
+        self.cancelled = threading.Event()
+        self.reason = None
+
+    def cancel(self, reason):
+        if not self.cancelled.is_set():
+            self.reason = reason
+            self.cancelled.set()
+
+    def is_cancelled(self):
+        return self.cancelled.is_set()
+
+
+class LLMScheduler:
+    """
+    Decides which LLM request may run:
+    - a newer request with the same key makes older ones stale (latest wins)
+    - a more important request pre-empts less important running ones
+    - waiting requests start in priority order
+
+    Usage:
+        with scheduler.request(PRIORITY_REACTION, key='screen_reaction') as ticket:
+            for part in stream:
+                if ticket.is_cancelled():
+                    stream.close()  # Ollama stops generating when the connection closes
+                    break
+    """
+
+    def __init__(self, max_active=1):
+        """
+        Args:
+            max_active: Requests allowed to generate at the same time
+        """
+        self.max_active = max_active
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.active = []
+        self.waiting = []
+        self.sequence = itertools.count()
+        self.counts = {'started': 0, 'completed': 0, 'stale': 0, 'preempted': 0}
+
+    def _cancel(self, ticket, reason):
+        """Cancel a ticket (lock held)"""
+        if ticket.is_cancelled():
+            return
+        ticket.cancel(reason)
+        self.counts[reason] = self.counts.get(reason, 0) + 1  # Any reason string (e.g. "shutdown")
+        metrics.count(f'llm_{reason}')
+
+    def acquire(self, priority, key=None):
+        """
+        Register a request and wait until it may run
+
+        Returns:
+            LLMTicket (check is_cancelled() - it may have become stale while waiting)
+        """
+        with self.changed:
+            ticket = LLMTicket(priority, key, next(self.sequence))
+
+            for other in self.active + self.waiting:
+                if key is not None and other.key == key:
+                    self._cancel(other, 'stale')
+                elif other in self.active and other.priority > priority:
+                    self._cancel(other, 'preempted')
+
+            self.waiting.append(ticket)
+            self.changed.notify_all()
+
+            while not ticket.is_cancelled() and not self._can_start(ticket):
+                self.changed.wait(0.1)
+
+            self.waiting.remove(ticket)
+            if not ticket.is_cancelled():
+                self.active.append(ticket)
+                self.counts['started'] += 1
+            self.changed.notify_all()
+            return ticket
+
+    def _can_start(self, ticket):
+        if len(self.active) >= self.max_active:
+            return False
+        # Most important (then oldest) waiting request goes first
+        live = [t for t in self.waiting if not t.is_cancelled()]
+        return min(live, key=lambda t: (t.priority, t.seq)) is ticket
+
+    def release(self, ticket):
+        """Request finished (or gave up after being cancelled)"""
+        with self.changed:
+            if ticket in self.active:
+                self.active.remove(ticket)
+                if not ticket.is_cancelled():
+                    self.counts['completed'] += 1
+            self.changed.notify_all()
+
+    @contextmanager
+    def request(self, priority, key=None):
+        """Context manager around acquire / release"""
+        ticket = self.acquire(priority, key)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def cancel(self, key, reason='stale'):
+        """Make every request with this key stale (e.g. the screen changed again)"""
+        with self.changed:
+            for ticket in self.active + self.waiting:
+                if ticket.key == key:
+                    self._cancel(ticket, reason)
+            self.changed.notify_all()
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts, active=len(self.active), waiting=len(self.waiting))
+
+
+# Test the scheduler with fake generations
+if __name__ == "__main__":
+    import time
+
+    print("🗓️  Testing LLM scheduler...\n")
+
+    scheduler = LLMScheduler()
+    log = []
+
+    def fake_generation(name, priority, key=None, tokens=20):
+        with scheduler.request(priority, key) as ticket:
+            if ticket.is_cancelled():
+                log.append(f"{name}: dropped before start ({ticket.reason})")
+                return
+            for i in range(tokens):
+                if ticket.is_cancelled():
+                    log.append(f"{name}: aborted after {i} tokens ({ticket.reason})")
+                    return
+                time.sleep(0.01)
+            log.append(f"{name}: finished")
+
+    threads = [
+        threading.Thread(target=fake_generation, args=("reaction 1", PRIORITY_REACTION, 'screen')),
+        threading.Thread(target=fake_generation, args=("reaction 2", PRIORITY_REACTION, 'screen')),
+        threading.Thread(target=fake_generation, args=("user chat", PRIORITY_USER)),
+    ]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join()
+
+    for line in log:
+        print(f"   {line}")
+    print(f"\n📊 {scheduler.stats()}")
+    print("✅ Scheduler test complete!")
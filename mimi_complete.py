@@ -1,15 +1,26 @@
 # mimi_complete.py - Full natural conversational Mimi with screen awareness!
 from screen_understanding import ScreenUnderstanding
-from vtuber_ai_ollama import VTuberAI
+from vtuber_ai_ollama import VTuberAI, FALLBACK_RESPONSE
 from automation_controller import AutomationController
 from screen_capture import ScreenCapture
-from voice_controller import VoiceController
-import cv2
-import numpy as np
+from voice_controller import VoiceController, USER_REPLY, SCREEN_REACTION, RANDOM_COMMENT
+from phrase_cache import PhraseAudioCache
+from startup_orchestrator import StartupOrchestrator
+from speech_pipeline import SpeechPipeline
+from change_mailbox import ChangeMailbox, describe_changes
+from change_detector import ChangeDetector, describe_events
+from llm_scheduler import PRIORITY_USER, PRIORITY_REACTION, PRIORITY_IDLE, SCREEN_REACTION_KEY
+from model_router import ROUTE_REACTION, ROUTE_SUMMARY, FAST_REACTIONS
+from prompt_builder import PromptBuilder, RollingHistory, compact_screen, summary_prompt
+from conversation_memory import ConversationMemory
+from reaction_cache import ReactionCache
+from reaction_engine import ReactionEngine
+from pipeline_metrics import metrics
+from lazy_imports import import_report
+from pipeline_trace import tracer
 import pyautogui
 import time
 import threading
-from queue import Queue
 import subprocess
 import webbrowser
 import random
@@ -24,29 +35,42 @@ class CompleteMimi:
     - Has personality and memory
     """
     
-    def __init__(self, vtuber_name="Mimi", personality="cheerful", enable_voice=True):
+    def __init__(self, vtuber_name="Mimi", personality="cheerful", enable_voice=True, fast_start=True):
+        """
+        Args:
+            fast_start: Don't wait for models - greet and start watching while they load
+        """
         print("🌸 Initializing Complete Mimi System...\n")
         
         screen_size = pyautogui.size()
         
+        # Heavy components load in parallel (see properties below)
+        self.enable_voice = enable_voice
+        loaders = {
+            'understanding': ScreenUnderstanding,
+            'vtuber': lambda: VTuberAI(vtuber_name=vtuber_name, personality=personality, routes=FAST_REACTIONS),
+        }
+        if enable_voice:
+            loaders['voice'] = lambda: VoiceController(voice_id=None, rate=170, volume=0.9, phrase_cache=PhraseAudioCache())
+        self.startup = StartupOrchestrator(loaders)
+        
         # Core components
-        self.understanding = ScreenUnderstanding()
-        self.vtuber = VTuberAI(vtuber_name=vtuber_name, personality=personality)
         self.controller = AutomationController(screen_size=screen_size, safety_mode=False)
         self.capture = ScreenCapture(target_fps=10, resize=(640, 640))
         
-        self.enable_voice = enable_voice
-        if enable_voice:
-            self.voice = VoiceController(voice_id=None, rate=170, volume=0.9)
-        
         self.vtuber_name = vtuber_name
         
-        # Conversation system
-        self.conversation_history = []
-        self.topics_discussed = []
-        
-        # Screen monitoring
-        self.ai_queue = Queue(maxsize=20)
+        # Conversation system (older lines are folded into a running summary, prompts fit a token budget)
+        self.conversation_history = RollingHistory(summarize=self.summarize_history)
+        self.prompts = PromptBuilder(budget=768)
+        # Older chat exchanges on disk, recalled by relevance (once they left the verbatim lines)
+        self.memory = ConversationMemory(recent_size=(self.conversation_history.keep_recent +
+                                                      self.conversation_history.fold_every) // 2)
+        
+        # Screen monitoring (only the newest change waits for the AI)
+        self.changes = ChangeMailbox()
+        self.reaction_cache = ReactionCache()  # Reactions to scene states seen before
+        self.reactions = ReactionEngine(llm_per_minute=4)  # Templates for common changes, LLM for novel ones
         self.ai_thread = None
         self.ai_busy = False
         self.ai_thread_running = True
@@ -58,9 +82,8 @@ class CompleteMimi:
         self.latest_frame = None
         self.lock = threading.Lock()
         
-        # Change detection
-        self.last_objects_sig = ""
-        self.last_scene = ""
+        # Change detection (debounced - flickering boxes don't trigger the AI)
+        self.detector = ChangeDetector(persist_frames=3)
         
         # Conversation timing
         self.last_speech_time = time.time()
@@ -89,7 +112,47 @@ class CompleteMimi:
             'proud': (255, 0, 255),
         }
         
-        print(f"✅ {vtuber_name} is fully ready!\n")
+        # Render fixed lines to audio while the voice is idle
+        if enable_voice:
+            self.startup.when_ready('voice', lambda voice: voice.prerender(self.fixed_phrases()))
+        
+        if not fast_start:
+            self.startup.wait_all()
+            print(f"✅ {vtuber_name} is fully ready!\n")
+        else:
+            print(f"✅ {vtuber_name} is up! Models are loading in the background...\n")
+    
+    # ==================== COMPONENTS ====================
+    
+    @property
+    def understanding(self):
+        """Screen understanding (waits until loaded)"""
+        return self.startup.get('understanding')
+    
+    @property
+    def vtuber(self):
+        """VTuber AI (waits until loaded)"""
+        return self.startup.get('vtuber')
+    
+    @property
+    def voice(self):
+        """Voice controller (waits until loaded)"""
+        return self.startup.get('voice')
+    
+    def fixed_phrases(self):
+        """Lines Mimi says word for word (worth pre-rendering)"""
+        return [
+            f"Hi Master! I'm {self.vtuber_name}! I'm watching your screen and ready to chat! What would you like to do? ♡",
+            "Opening YouTube for you, Master! ✨",
+            "Typing that for you! ✨",
+        ] + self.random_topics
+    
+    @property
+    def speech(self):
+        """Sentence-pipelined speech on top of the voice controller"""
+        if getattr(self, '_speech', None) is None:
+            self._speech = SpeechPipeline(self.voice)
+        return self._speech
     
     # ==================== ACTION METHODS ====================
     
@@ -185,6 +248,12 @@ class CompleteMimi:
         """Generate random conversational comment"""
         return random.choice(self.random_topics)
     
+    def summarize_history(self, previous, lines):
+        """Fold older conversation lines into the running summary (idle-priority LLM call)"""
+        prompt = summary_prompt(self.vtuber_name, previous, lines)
+        summary = self.vtuber._generate(prompt, max_tokens=80, priority=PRIORITY_IDLE, route=ROUTE_SUMMARY).strip()
+        return summary if summary != FALLBACK_RESPONSE else None
+    
     def generate_screen_question(self, analysis):
         """Ask question about screen"""
         prompts = [
@@ -195,18 +264,23 @@ class CompleteMimi:
         ]
         return random.choice(prompts)
     
-    def generate_screen_aware_response(self, screen_summary):
-        """Generate natural response to screen changes"""
+    def generate_screen_aware_response(self, screen_summary, speak=False, changes=None, scene_key=None):
+        """
+        Generate natural response to screen changes
         
-        prompt = f"""{self.vtuber.system_prompt}
-
-CURRENT SCREEN:
-{screen_summary}
-
-RECENT CONVERSATION:
-{chr(10).join(self.conversation_history[-3:]) if self.conversation_history else "No recent conversation"}
-
-React to what you see on screen naturally! You can:
+        Args:
+            speak: Speak each sentence as soon as it is generated (returns after speaking)
+            changes: Optional ChangeMailbox event - what appeared/disappeared since the last reaction
+            scene_key: ReactionCache key - the reply is added to that scene's pool
+                       (looked up by ReactionEngine.react before the LLM budget is spent)
+        """
+        
+        prompt = self.prompts.build(
+            self.vtuber.system_prompt,
+            [("CURRENT SCREEN", screen_summary),
+             ("WHAT CHANGED", describe_changes(changes) if changes else "The scene changed.")],
+            history=self.conversation_history,
+            tail=f"""React to what you see on screen naturally! You can:
 - Comment on what appeared/changed
 - Offer to help (search YouTube, open apps, click things)
 - Ask what the user is doing
@@ -215,13 +289,27 @@ React to what you see on screen naturally! You can:
 
 Keep it SHORT (1-2 sentences), NATURAL, and IN CHARACTER!
 
-{self.vtuber_name}:"""
-        
-        response = self.vtuber._generate(prompt, max_tokens=100).strip()
+{self.vtuber_name}:""")
+        
+        if speak:
+            response = self.speech.speak_stream(
+                self.vtuber.generate_stream(prompt, max_tokens=100, priority=PRIORITY_REACTION, key=SCREEN_REACTION_KEY,
+                                            route=ROUTE_REACTION),
+                on_sentence=lambda sentence: print(f"💬 {self.vtuber_name}: {sentence}"),
+                strip_prefix=f"{self.vtuber_name}:",
+                priority=SCREEN_REACTION
+            )
+        else:
+            response = self.vtuber._generate(prompt, max_tokens=100, priority=PRIORITY_REACTION, key=SCREEN_REACTION_KEY,
+                                             route=ROUTE_REACTION).strip()
+            
+            # Clean up
+            if ':' in response:
+                response = response.split(':', 1)[1].strip()
         
-        # Clean up
-        if ':' in response:
-            response = response.split(':', 1)[1].strip()
+        # Only complete replies are worth reusing
+        if scene_key and response != FALLBACK_RESPONSE and not self.vtuber._last_cancelled():
+            self.reaction_cache.put(scene_key, response)
         
         return response
     
@@ -277,114 +365,99 @@ Keep it SHORT (1-2 sentences), NATURAL, and IN CHARACTER!
         print("🤖 AI worker started")
         
         while self.ai_thread_running:
+            task_start = None
             try:
                 # Check for random comments first
-                if self.should_make_random_comment() and self.ai_queue.empty():
+                if self.should_make_random_comment() and not self.changes.pending():
                     comment = self.generate_random_comment()
                     print(f"\n💭 {self.vtuber_name} (random thought): {comment}")
                     
                     if self.enable_voice:
-                        while self.voice.is_busy():
-                            time.sleep(0.1)
-                        self.voice.speak(comment, block=True)
+                        self.voice.speak(comment, block=True, priority=RANDOM_COMMENT)
                     
                     self.conversation_history.append(f"{self.vtuber_name}: {comment}")
                     continue
                 
-                # Process screen changes
-                task = self.ai_queue.get(timeout=1)
+                # Process the newest screen change (a burst of changes arrives as one event)
+                event = self.changes.take(timeout=1)
                 
-                if task is None:
-                    break
+                if event is None:
+                    continue
                 
-                user_task = task
+                if event['coalesced']:
+                    print(f"\n📬 [AI] {event['coalesced'] + 1} changes merged into one reaction")
                 self.ai_busy = True
+                task_start = time.perf_counter()
                 
-                # Get fresh analysis
-                with self.lock:
-                    fresh_frame = self.latest_frame
-                
-                if fresh_frame is None:
-                    self.ai_busy = False
-                    continue
-                
-                print(f"\n🔍 [AI] Analyzing screen...")
-                fresh_analysis = self.understanding.analyze_screen(fresh_frame)
+                # Analysis of the newest changed frame (the capture loop already ran the models -
+                # they are not thread-safe, so the worker never runs them itself)
+                fresh_analysis = event['analysis']
+                scene_key = self.reaction_cache.scene_key(fresh_analysis['caption'], fresh_analysis['objects'],
+                                                          self.vtuber.personality)
                 
                 # Check if should ask question about screen
                 if self.should_ask_screen_question(fresh_analysis):
                     question = self.generate_screen_question(fresh_analysis)
                     
-                    with self.lock:
-                        self.current_analysis = fresh_analysis
-                    
                     print(f"❓ {self.vtuber_name}: {question}")
                     
                     if self.enable_voice:
-                        while self.voice.is_busy():
-                            time.sleep(0.1)
-                        self.voice.speak(question, block=True)
+                        self.voice.speak(question, block=True, priority=SCREEN_REACTION)
                     
                     self.conversation_history.append(f"{self.vtuber_name}: {question}")
                     
                 else:
-                    # Normal screen reaction
-                    response = self.generate_screen_aware_response(fresh_analysis['summary'])
+                    decision = self.reactions.react(event['appeared'], event['disappeared'], fresh_analysis['caption'],
+                                                    lookup=lambda instead_of_llm: self.reaction_cache.get(scene_key, instead_of_llm))
                     
-                    with self.lock:
-                        self.current_analysis = fresh_analysis
+                    if decision['source'] in ('template', 'cache'):
+                        # Common change or a scene state seen before - instant reaction
+                        response = decision['text']
+                        print(f"{'⚡' if decision['source'] == 'template' else '♻️ '} {self.vtuber_name}: {response}")
+                        if self.enable_voice:
+                            self.voice.speak(response, block=True, priority=SCREEN_REACTION)
                     
-                    print(f"💬 {self.vtuber_name}: {response}")
+                    elif decision['source'] == 'llm':
+                        # Novel change - LLM reaction, spoken sentence by sentence while generating
+                        if self.enable_voice:
+                            self.voice.wait_until_idle()
+                            response = self.generate_screen_aware_response(compact_screen(fresh_analysis), speak=True, changes=event,
+                                                                           scene_key=scene_key)
+                        else:
+                            response = self.generate_screen_aware_response(compact_screen(fresh_analysis), changes=event,
+                                                                           scene_key=scene_key)
+                            print(f"💬 {self.vtuber_name}: {response}")
                     
-                    if self.enable_voice:
-                        while self.voice.is_busy():
-                            time.sleep(0.1)
-                        self.voice.speak(response, block=True)
+                    else:
+                        response = None
+                        print(f"🤫 [AI] Familiar change (novelty {decision['novelty']:.2f}) - nothing to say")
                     
-                    self.conversation_history.append(f"{self.vtuber_name}: {response}")
-                
-                self.ai_queue.task_done()
+                    if response:
+                        self.conversation_history.append(f"{self.vtuber_name}: {response}")
                 
             except Exception as e:
-                if "Empty" not in str(e):
-                    print(f"❌ [AI] Error: {e}")
+                print(f"❌ [AI] Error: {e}")
             finally:
                 self.ai_busy = False
+                if task_start is not None:
+                    tracer.complete('ai_worker.task', task_start, time.perf_counter() - task_start)
         
         print("🤖 AI worker stopped")
     
     # ==================== CHANGE DETECTION ====================
     
-    def get_objects_signature(self, objects):
-        """Get object signature"""
-        sig_parts = []
-        for obj in objects:
-            name = obj['class_name']
-            x = round(obj['center'][0] / 50) * 50
-            y = round(obj['center'][1] / 50) * 50
-            sig_parts.append(f"{name}@{x},{y}")
-        return "|".join(sorted(sig_parts))
-    
     def check_for_changes(self, analysis):
-        """Check if screen changed"""
-        current_sig = self.get_objects_signature(analysis['objects'])
-        current_scene = analysis['caption']
-        
-        if not self.last_objects_sig:
-            self.last_objects_sig = current_sig
-            self.last_scene = current_scene
-            return True
+        """
+        Check if screen changed
         
-        objects_changed = current_sig != self.last_objects_sig
-        scene_changed = current_scene != self.last_scene
+        Returns: list of change events (empty = no change)
+        """
+        events = self.detector.update(analysis['objects'], analysis['caption'])
         
-        if objects_changed or scene_changed:
-            print(f"\n🔄 CHANGE DETECTED!")
-            self.last_objects_sig = current_sig
-            self.last_scene = current_scene
-            return True
+        if events:
+            print(f"\n🔄 CHANGE DETECTED! {describe_events(events)}")
         
-        return False
+        return events
     
     # ==================== USER INPUT HANDLER ====================
     
@@ -401,6 +474,21 @@ Keep it SHORT (1-2 sentences), NATURAL, and IN CHARACTER!
                 if not user_input.strip():
                     continue
                 
+                if user_input.lower() == 'stats':
+                    print(metrics.report())
+                    if self.startup.is_ready('vtuber'):
+                        print(self.vtuber.usage_report())
+                    print(self.reaction_cache.report())
+                    print(self.reactions.report())
+                    print(self.prompts.report())
+                    print(self.memory.report())
+                    print(import_report())
+                    continue
+                
+                if user_input.lower() == 'trace':
+                    tracer.hotkey()
+                    continue
+                
                 if user_input.lower() in ['quit', 'exit', 'stop']:
                     print(f"\n{self.vtuber_name}: Bye bye, Master! ♡")
                     self.ai_thread_running = False
@@ -408,10 +496,16 @@ Keep it SHORT (1-2 sentences), NATURAL, and IN CHARACTER!
                 
                 print(f"\nYou: {user_input}")
                 
+                # The user comes first - drop stale reactions and cut off small talk
+                if self.enable_voice:
+                    self.voice.barge_in(USER_REPLY)
+                
                 # Parse command
                 cmd_type, cmd_param = self.parse_user_command(user_input)
                 
                 response = None
+                streamed = False
+                spoken = False
                 
                 if cmd_type == 'open_youtube':
                     self.open_youtube()
@@ -438,38 +532,59 @@ Keep it SHORT (1-2 sentences), NATURAL, and IN CHARACTER!
                     with self.lock:
                         analysis = self.current_analysis
                     
-                    if analysis:
-                        screen_context = f"Screen shows: {analysis['caption']}. {analysis['object_count']} objects."
-                    else:
-                        screen_context = "Screen information not available."
+                    screen_context = compact_screen(analysis) if analysis else "Screen information not available."
+                    sections = [("SCREEN", screen_context)]
                     
-                    prompt = f"""{self.vtuber.system_prompt}
-
-SCREEN: {screen_context}
-
-CONVERSATION:
-{chr(10).join(self.conversation_history[-5:])}
-User: {user_input}
+                    memories = self.memory.recall(user_input, k=3)
+                    if memories:
+                        sections.append(("THINGS YOU REMEMBER", ConversationMemory.format(memories, self.vtuber_name)))
+                    
+                    prompt = self.prompts.build(
+                        self.vtuber.system_prompt,
+                        sections,
+                        history=self.conversation_history,
+                        history_title="CONVERSATION",
+                        tail=f"""User: {user_input}
 
 Respond naturally as {self.vtuber_name}! Short and sweet!
 
-{self.vtuber_name}:"""
+{self.vtuber_name}:""")
                     
-                    response = self.vtuber._generate(prompt, max_tokens=100).strip()
-                    if ':' in response:
-                        response = response.split(':', 1)[1].strip()
+                    # Stream tokens to the console as they arrive
+                    print(f"{self.vtuber_name}: ", end="", flush=True)
+                    print_token = lambda token: print(token, end="", flush=True)
+                    
+                    if self.enable_voice:
+                        # Speak each sentence while the rest is still generating
+                        response = self.speech.speak_stream(
+                            self.vtuber.generate_stream(prompt, max_tokens=100, priority=PRIORITY_USER),
+                            on_token=print_token,
+                            strip_prefix=f"{self.vtuber_name}:",
+                            wait=False,
+                            priority=USER_REPLY
+                        )
+                        spoken = True
+                    else:
+                        response = self.vtuber._generate(prompt, max_tokens=100, on_chunk=print_token, priority=PRIORITY_USER).strip()
+                        if ':' in response:
+                            response = response.split(':', 1)[1].strip()
+                    
+                    print("\n")
+                    streamed = True
                 
                 # Respond
                 if response:
-                    print(f"{self.vtuber_name}: {response}\n")
+                    if not streamed:
+                        print(f"{self.vtuber_name}: {response}\n")
                     
-                    if self.enable_voice:
-                        while self.voice.is_busy():
-                            time.sleep(0.1)
-                        self.voice.speak(response, block=False)
+                    if self.enable_voice and not spoken:
+                        self.voice.speak(response, block=False, priority=USER_REPLY)
                     
                     self.conversation_history.append(f"User: {user_input}")
                     self.conversation_history.append(f"{self.vtuber_name}: {response}")
+                    # Only complete replies are worth remembering
+                    if response != FALLBACK_RESPONSE and not self.vtuber._last_cancelled():
+                        self.memory.add(user_input, response)
                 
             except EOFError:
                 break
@@ -491,23 +606,24 @@ Respond naturally as {self.vtuber_name}! Short and sweet!
         print("  • Chat about random topics")
         print("  • Execute your commands")
         print()
-        print("Type 'quit' to exit")
+        print("Type 'stats' for pipeline latency, 'trace' to record/save a trace, 'quit' to exit")
         print("="*70)
         print()
         
         # Start AI worker
-        self.ai_thread = threading.Thread(target=self.ai_worker, daemon=True)
+        self.ai_thread = threading.Thread(target=self.ai_worker, daemon=True, name="ai_worker")
         self.ai_thread.start()
         
         # Start user input handler
-        input_thread = threading.Thread(target=self.handle_user_input, daemon=True)
+        input_thread = threading.Thread(target=self.handle_user_input, daemon=True, name="user_input")
         input_thread.start()
         
         # Initial greeting
         greeting = f"Hi Master! I'm {self.vtuber_name}! I'm watching your screen and ready to chat! What would you like to do? ♡"
         print(f"{self.vtuber_name}: {greeting}\n")
+        self.startup.mark('greeting')
         if self.enable_voice:
-            self.voice.speak(greeting, block=False)
+            self.startup.when_ready('voice', lambda voice: voice.speak(greeting, block=False))
         
         frame_count = 0
         
@@ -517,27 +633,46 @@ Respond naturally as {self.vtuber_name}! Short and sweet!
                     break
                 
                 frame_count += 1
+                tracer.instant('frame', index=frame_count)
                 
                 # Update latest frame
                 with self.lock:
                     self.latest_frame = frame.copy()
                 
+                # Models still loading - keep only the newest frame until ready
+                if not self.startup.is_ready('understanding'):
+                    error = self.startup.error('understanding')
+                    if error:
+                        # Never going to be ready - stop capturing, keep chatting
+                        print(f"❌ Screen understanding could not be loaded ({error}) - "
+                              f"screen watching is off, chat still works")
+                        input_thread.join()
+                        break
+                    continue
+                
                 # Quick analysis
                 analysis = self.understanding.analyze_screen(frame)
+                self.startup.mark('first_analysis')
                 
                 with self.lock:
                     self.current_analysis = analysis
                 
                 # Check for changes
-                if self.check_for_changes(analysis):
-                    if self.ai_queue.qsize() < 20:
-                        self.ai_queue.put("describe what changed")
+                with metrics.timer('change_detection'):
+                    changed = self.check_for_changes(analysis)
+                
+                if changed:
+                    tracer.instant('change_detected')
+                    self.changes.post(analysis, task="describe what changed")
+                    # A reaction to the old screen is no longer worth finishing
+                    if self.startup.is_ready('vtuber'):
+                        self.vtuber.scheduler.cancel(SCREEN_REACTION_KEY)
         
         except KeyboardInterrupt:
             print("\n⏹️  Stopped")
         finally:
             self.ai_thread_running = False
-            self.ai_queue.put(None)
+            self.changes.close()
             if self.ai_thread:
                 self.ai_thread.join(timeout=2)
         
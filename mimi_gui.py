@@ -2,37 +2,66 @@
 import tkinter as tk
 from tkinter import scrolledtext, ttk
 from screen_understanding import ScreenUnderstanding
-from vtuber_ai_ollama import VTuberAI
+from vtuber_ai_ollama import VTuberAI, FALLBACK_RESPONSE
 from automation_controller import AutomationController
 from screen_capture import ScreenCapture
-from voice_controller import VoiceController
-import pyautogui
+from voice_controller import VoiceController, USER_REPLY, SCREEN_REACTION, RANDOM_COMMENT
+from phrase_cache import PhraseAudioCache
+from startup_orchestrator import StartupOrchestrator
+from speech_pipeline import SpeechPipeline
+from change_mailbox import ChangeMailbox, describe_changes
+from change_detector import ChangeDetector
+from llm_scheduler import PRIORITY_USER, PRIORITY_REACTION, PRIORITY_IDLE, SCREEN_REACTION_KEY
+from model_router import ROUTE_CHAT, ROUTE_REACTION, ROUTE_SUMMARY, FAST_REACTIONS
+from prompt_builder import PromptBuilder, RollingHistory, compact_screen, summary_prompt
+from conversation_memory import ConversationMemory
+from reaction_cache import ReactionCache
+from reaction_engine import ReactionEngine
+from pipeline_metrics import metrics
+from pipeline_trace import tracer
+from lazy_imports import lazy_import, import_report
 import time
 import threading
-from queue import Queue
 import subprocess
 import webbrowser
 import random
+import sys
+
+# Only needed for typing/clicking - not for chatting
+pyautogui = lazy_import('pyautogui')
 
 class MimiChatGUI:
     """Beautiful chat interface for Mimi"""
     
-    def __init__(self):
+    def __init__(self, fast_start=True, watch_screen=True):
+        """
+        Args:
+            fast_start: Show the window and greet while models load in the background
+            watch_screen: False = chat-only mode (no YOLO/CLIP, torch is never imported)
+        """
         # Create main window
         self.root = tk.Tk()
         self.root.title("💬 Chat with Mimi")
         self.root.geometry("600x800")
         self.root.configure(bg='#f0f0f0')
         
-        # Initialize Mimi's brain
+        # Initialize Mimi's brain (heavy models load in parallel)
         print("🌸 Initializing Mimi...")
-        screen_size = pyautogui.size()
+        self.watch_screen = watch_screen
+        
+        loaders = {
+            'vtuber': lambda: VTuberAI(vtuber_name="Mimi", personality="cheerful", routes=FAST_REACTIONS),
+            'voice': lambda: VoiceController(voice_id=None, rate=170, volume=0.9, phrase_cache=PhraseAudioCache()),
+        }
+        if watch_screen:
+            loaders['understanding'] = ScreenUnderstanding
+        self.startup = StartupOrchestrator(loaders)
         
-        self.understanding = ScreenUnderstanding()
-        self.vtuber = VTuberAI(vtuber_name="Mimi", personality="cheerful")
-        self.controller = AutomationController(screen_size=screen_size, safety_mode=False)
-        self.capture = ScreenCapture(target_fps=10, resize=(640, 640))
-        self.voice = VoiceController(voice_id=None, rate=170, volume=0.9)
+        self._controller = None
+        self.capture = ScreenCapture(target_fps=10, resize=(640, 640)) if watch_screen else None
+        
+        if not fast_start:
+            self.startup.wait_all()
         
         self.vtuber_name = "Mimi"
         self.enable_voice = True
@@ -40,17 +69,22 @@ class MimiChatGUI:
         # State
         self.current_analysis = None
         self.latest_frame = None
-        self.conversation_history = []
+        self.conversation_history = RollingHistory(summarize=self.summarize_history)
+        self.prompts = PromptBuilder(budget=768)
+        # Older chat exchanges on disk, recalled by relevance (once they left the verbatim lines)
+        self.memory = ConversationMemory(recent_size=(self.conversation_history.keep_recent +
+                                                      self.conversation_history.fold_every) // 2)
         self.lock = threading.Lock()
         
-        # Screen monitoring
-        self.ai_queue = Queue(maxsize=20)
+        # Screen monitoring (only the newest change waits for the AI)
+        self.changes = ChangeMailbox()
+        self.reaction_cache = ReactionCache()  # Reactions to scene states seen before
+        self.reactions = ReactionEngine(llm_per_minute=4)  # Templates for common changes, LLM for novel ones
         self.ai_busy = False
         self.ai_thread_running = True
         
-        # Change detection
-        self.last_objects_sig = ""
-        self.last_scene = ""
+        # Change detection (debounced - flickering boxes don't trigger the AI)
+        self.detector = ChangeDetector(persist_frames=3)
         self.last_random_comment_time = time.time()
         self.last_question_time = time.time()
         
@@ -64,14 +98,66 @@ class MimiChatGUI:
         ]
         
         self.create_gui()
+        self.startup.mark('ui_shown')
         self.start_background_threads()
         
         # Initial greeting
-        self.add_message("Mimi", "Hi Master! I'm Mimi! ✨ I'm watching your screen and ready to chat! How can I help you today? ♡")
-        self.speak("Hi Master! I'm Mimi! I'm watching your screen and ready to chat! How can I help you today?")
+        self.add_message("Mimi", f"Hi Master! I'm Mimi! ✨ {self.greeting_status()} How can I help you today? ♡")
+        self.startup.mark('greeting')
+        self.speak(f"Hi Master! I'm Mimi! {self.greeting_status()} How can I help you today?")
+        
+        # Tell the user when each part finishes loading
+        if watch_screen:
+            self.startup.when_ready('understanding', lambda _: self.root.after(0, self.add_message, "System", "👁️ Vision ready"))
+        self.startup.when_ready('vtuber', lambda _: self.root.after(0, self.add_message, "System", "🧠 Brain ready"))
+        
+        # Render fixed lines to audio while the voice is idle
+        self.startup.when_ready('voice', lambda voice: voice.prerender(self.fixed_phrases()))
         
         print("✅ Mimi GUI ready!")
     
+    @property
+    def understanding(self):
+        """Screen understanding (waits until loaded)"""
+        return self.startup.get('understanding')
+    
+    @property
+    def vtuber(self):
+        """VTuber AI (waits until loaded)"""
+        return self.startup.get('vtuber')
+    
+    @property
+    def voice(self):
+        """Voice controller (waits until loaded)"""
+        return self.startup.get('voice')
+    
+    def greeting_status(self):
+        """What Mimi is doing, for the greeting (chat-only mode doesn't watch the screen)"""
+        return "I'm watching your screen and ready to chat!" if self.watch_screen else "I'm ready to chat!"
+    
+    def fixed_phrases(self):
+        """Lines Mimi says word for word (worth pre-rendering)"""
+        return [
+            f"Hi Master! I'm Mimi! {self.greeting_status()} How can I help you today?",
+            "Bye bye, Master! See you later!",
+            "Opening YouTube for you, Master! ✨",
+            "Typing that for you! ✨",
+        ] + self.random_topics
+    
+    @property
+    def speech(self):
+        """Sentence-pipelined speech on top of the voice controller"""
+        if getattr(self, '_speech', None) is None:
+            self._speech = SpeechPipeline(self.voice)
+        return self._speech
+    
+    @property
+    def controller(self):
+        """Automation controller (pyautogui is imported on first use)"""
+        if self._controller is None:
+            self._controller = AutomationController(screen_size=pyautogui.size(), safety_mode=False)
+        return self._controller
+    
     def create_gui(self):
         """Create the chat interface"""
         
@@ -94,7 +180,7 @@ class MimiChatGUI:
         
         self.status_label = tk.Label(
             self.status_frame,
-            text="👁️ Watching screen... | 🎤 Voice: ON",
+            text=self.idle_status(),
             font=('Arial', 9),
             bg='#e0e0e0',
             fg='#666'
@@ -187,6 +273,30 @@ class MimiChatGUI:
         self.chat_display.see(tk.END)
         self.chat_display.config(state=tk.DISABLED)
     
+    def begin_streaming_message(self, sender):
+        """Start a message whose text is appended while it streams in"""
+        self.chat_display.config(state=tk.NORMAL)
+        
+        timestamp = time.strftime("%H:%M")
+        self.chat_display.insert(tk.END, f"💖 {sender} ", 'mimi')
+        self.chat_display.insert(tk.END, f"({timestamp})\n", 'system')
+        
+        # Mark stays in front of the trailing blank line, moving right as text is added
+        self.chat_display.mark_set('stream', 'end-1c')
+        self.chat_display.mark_gravity('stream', tk.LEFT)
+        self.chat_display.insert('end-1c', "\n\n")
+        self.chat_display.mark_gravity('stream', tk.RIGHT)
+        
+        self.chat_display.see(tk.END)
+        self.chat_display.config(state=tk.DISABLED)
+    
+    def append_streaming_text(self, text):
+        """Append streamed text to the message started by begin_streaming_message"""
+        self.chat_display.config(state=tk.NORMAL)
+        self.chat_display.insert('stream', text)
+        self.chat_display.see(tk.END)
+        self.chat_display.config(state=tk.DISABLED)
+    
     def send_message_event(self, event):
         """Handle Enter key press"""
         self.send_message()
@@ -205,7 +315,7 @@ class MimiChatGUI:
         self.add_message("You", message)
         
         # Process in background
-        threading.Thread(target=self.process_user_message, args=(message,), daemon=True).start()
+        threading.Thread(target=self.process_user_message, args=(message,), daemon=True, name="user_message").start()
     
     def process_user_message(self, user_input):
         """Process user message and respond"""
@@ -217,6 +327,27 @@ class MimiChatGUI:
             self.root.quit()
             return
         
+        if user_input.lower() in ['stats', '/stats']:
+            report = metrics.report()
+            if self.startup.is_ready('vtuber'):
+                report += "\n" + self.vtuber.usage_report()
+            report += "\n" + self.reaction_cache.report()
+            report += "\n" + self.reactions.report()
+            report += "\n" + self.prompts.report()
+            report += "\n" + self.memory.report()
+            report += "\n" + import_report()
+            self.root.after(0, self.add_message, "System", report)
+            return
+        
+        if user_input.lower() in ['trace', '/trace']:
+            path = tracer.hotkey()
+            self.root.after(0, self.add_message, "System", f"🧵 Trace saved: {path}" if path else "🧵 Tracing started")
+            return
+        
+        # The user comes first - drop stale reactions and cut off small talk
+        if self.enable_voice and self.startup.is_ready('voice'):
+            self.voice.barge_in(USER_REPLY)
+        
         # Update status
         self.update_status("🤔 Thinking...")
         
@@ -224,6 +355,7 @@ class MimiChatGUI:
         cmd_type, cmd_param = self.parse_user_command(user_input)
         
         response = None
+        streamed = False
         
         if cmd_type == 'open_youtube':
             webbrowser.open('https://www.youtube.com')
@@ -251,36 +383,41 @@ class MimiChatGUI:
             with self.lock:
                 analysis = self.current_analysis
             
-            if analysis:
-                screen_context = f"Screen shows: {analysis['caption']}. {analysis['object_count']} objects."
-            else:
-                screen_context = "Screen not analyzed yet."
+            screen_context = compact_screen(analysis) if analysis else "Screen not analyzed yet."
+            sections = [("SCREEN", screen_context)]
             
-            prompt = f"""{self.vtuber.system_prompt}
-
-SCREEN: {screen_context}
-
-CONVERSATION:
-{chr(10).join(self.conversation_history[-5:])}
-User: {user_input}
+            memories = self.memory.recall(user_input, k=3)
+            if memories:
+                sections.append(("THINGS YOU REMEMBER", ConversationMemory.format(memories, self.vtuber_name)))
+            
+            prompt = self.prompts.build(
+                self.vtuber.system_prompt,
+                sections,
+                history=self.conversation_history,
+                history_title="CONVERSATION",
+                tail=f"""User: {user_input}
 
 Respond naturally as {self.vtuber_name}! Keep it short (1-2 sentences) and sweet!
 
-{self.vtuber_name}:"""
+{self.vtuber_name}:""")
             
-            response = self.vtuber._generate(prompt, max_tokens=100).strip()
-            if ':' in response:
-                response = response.split(':', 1)[1].strip()
+            # Show tokens in the chat window (and speak sentences) as they arrive
+            response = self.stream_reply(prompt, max_tokens=100)
+            streamed = True
         
         # Display and speak response
         if response:
-            self.add_message("Mimi", response)
-            self.speak(response)
+            if not streamed:
+                self.add_message("Mimi", response)
+                self.speak(response)
             
             self.conversation_history.append(f"User: {user_input}")
             self.conversation_history.append(f"Mimi: {response}")
+            # Only complete replies are worth remembering
+            if response != FALLBACK_RESPONSE and not self.vtuber._last_cancelled():
+                self.memory.add(user_input, response)
         
-        self.update_status("👁️ Watching screen... | 🎤 Voice: " + ("ON" if self.enable_voice else "OFF"))
+        self.update_status(self.idle_status())
     
     def parse_user_command(self, text):
         """Parse commands from text - FIXED VERSION"""
@@ -374,16 +511,10 @@ Respond naturally as {self.vtuber_name}! Keep it short (1-2 sentences) and sweet
                     return True
         return False
     
-    def speak(self, text):
-        """Speak text"""
+    def speak(self, text, priority=USER_REPLY):
+        """Queue text for speaking (waits for the voice to finish loading without blocking)"""
         if self.enable_voice:
-            threading.Thread(target=self._speak_thread, args=(text,), daemon=True).start()
-    
-    def _speak_thread(self, text):
-        """Background speech thread"""
-        while self.voice.is_busy():
-            time.sleep(0.1)
-        self.voice.speak(text, block=True)
+            self.startup.when_ready('voice', lambda voice: voice.speak(text, priority=priority))
     
     def toggle_voice(self):
         """Toggle voice on/off"""
@@ -396,7 +527,12 @@ Respond naturally as {self.vtuber_name}! Keep it short (1-2 sentences) and sweet
             self.voice_button.config(bg='#ffcccb', text='🔇')
             self.add_message("System", "🔇 Voice muted")
         
-        self.update_status("👁️ Watching screen... | 🎤 Voice: " + ("ON" if self.enable_voice else "OFF"))
+        self.update_status(self.idle_status())
+    
+    def idle_status(self):
+        """Status bar text while idle"""
+        watching = "👁️ Watching screen..." if self.watch_screen else "💬 Chat only"
+        return f"{watching} | 🎤 Voice: " + ("ON" if self.enable_voice else "OFF")
     
     def update_status(self, text):
         """Update status bar"""
@@ -406,11 +542,12 @@ Respond naturally as {self.vtuber_name}! Keep it short (1-2 sentences) and sweet
         """Start screen monitoring and AI worker"""
         
         # Screen monitoring thread
-        screen_thread = threading.Thread(target=self.monitor_screen, daemon=True)
-        screen_thread.start()
+        if self.watch_screen:
+            screen_thread = threading.Thread(target=self.monitor_screen, daemon=True, name="screen_monitor")
+            screen_thread.start()
         
         # AI worker thread
-        ai_thread = threading.Thread(target=self.ai_worker, daemon=True)
+        ai_thread = threading.Thread(target=self.ai_worker, daemon=True, name="ai_worker")
         ai_thread.start()
     
     def monitor_screen(self):
@@ -419,42 +556,38 @@ Respond naturally as {self.vtuber_name}! Keep it short (1-2 sentences) and sweet
             with self.lock:
                 self.latest_frame = frame.copy()
             
+            # Models still loading - keep only the newest frame until ready
+            if not self.startup.is_ready('understanding'):
+                error = self.startup.error('understanding')
+                if error:
+                    # Never going to be ready - stop capturing, keep chatting
+                    self.watch_screen = False
+                    self.root.after(0, self.add_message, "System",
+                                    f"❌ Screen understanding could not be loaded ({error}) - "
+                                    f"screen watching is off, chat still works")
+                    self.root.after(0, self.update_status, self.idle_status())
+                    break
+                continue
+            
             analysis = self.understanding.analyze_screen(frame)
+            self.startup.mark('first_analysis')
             
             with self.lock:
                 self.current_analysis = analysis
             
             # Check for changes
-            if self.check_for_changes(analysis):
-                if self.ai_queue.qsize() < 20:
-                    self.ai_queue.put("screen changed")
+            with metrics.timer('change_detection'):
+                changed = self.check_for_changes(analysis)
+            
+            if changed:
+                self.changes.post(analysis, task="screen changed")
+                # A reaction to the old screen is no longer worth finishing
+                if self.startup.is_ready('vtuber'):
+                    self.vtuber.scheduler.cancel(SCREEN_REACTION_KEY)
     
     def check_for_changes(self, analysis):
-        """Check if screen changed"""
-        current_sig = self.get_objects_signature(analysis['objects'])
-        current_scene = analysis['caption']
-        
-        if not self.last_objects_sig:
-            self.last_objects_sig = current_sig
-            self.last_scene = current_scene
-            return True
-        
-        if current_sig != self.last_objects_sig or current_scene != self.last_scene:
-            self.last_objects_sig = current_sig
-            self.last_scene = current_scene
-            return True
-        
-        return False
-    
-    def get_objects_signature(self, objects):
-        """Get unique signature of objects"""
-        sig_parts = []
-        for obj in objects:
-            name = obj['class_name']
-            x = round(obj['center'][0] / 50) * 50
-            y = round(obj['center'][1] / 50) * 50
-            sig_parts.append(f"{name}@{x},{y}")
-        return "|".join(sorted(sig_parts))
+        """Check if screen changed - returns list of change events (empty = no change)"""
+        return self.detector.update(analysis['objects'], analysis['caption'])
     
     def ai_worker(self):
         """Background AI worker"""
@@ -464,12 +597,14 @@ Respond naturally as {self.vtuber_name}! Keep it short (1-2 sentences) and sweet
                 if self.should_make_random_comment():
                     comment = random.choice(self.random_topics)
                     self.root.after(0, self.add_message, "Mimi", comment)
-                    self.speak(comment)
+                    self.speak(comment, priority=RANDOM_COMMENT)
                     time.sleep(1)
                     continue
                 
-                # Process screen changes
-                task = self.ai_queue.get(timeout=5)
+                # Process the newest screen change (a burst of changes arrives as one event)
+                event = self.changes.take(timeout=5)
+                if event is None:
+                    continue
                 
                 with self.lock:
                     analysis = self.current_analysis
@@ -477,12 +612,19 @@ Respond naturally as {self.vtuber_name}! Keep it short (1-2 sentences) and sweet
                 if not analysis:
                     continue
                 
-                # Generate response
-                response = self.generate_screen_response(analysis)
+                scene_key = self.reaction_cache.scene_key(analysis['caption'], analysis['objects'], self.vtuber.personality)
+                decision = self.reactions.react(event['appeared'], event['disappeared'], analysis['caption'],
+                                                lookup=lambda instead_of_llm: self.reaction_cache.get(scene_key, instead_of_llm))
+                
+                if decision['source'] in ('template', 'cache'):
+                    # Common change or a scene state seen before - instant reaction
+                    self.root.after(0, self.add_message, "Mimi", decision['text'])
+                    self.speak(decision['text'], priority=SCREEN_REACTION)
                 
-                if response:
-                    self.root.after(0, self.add_message, "Mimi", response)
-                    self.speak(response)
+                elif decision['source'] == 'llm':
+                    # Novel change - streamed into the window and spoken as it arrives
+                    with tracer.span('ai_worker.task', coalesced=event['coalesced']):
+                        self.generate_screen_response(analysis, stream=True, changes=event, scene_key=scene_key)
                 
             except:
                 pass
@@ -494,20 +636,74 @@ Respond naturally as {self.vtuber_name}! Keep it short (1-2 sentences) and sweet
             return random.random() < 0.3
         return False
     
-    def generate_screen_response(self, analysis):
-        """Generate response to screen change"""
-        prompt = f"""{self.vtuber.system_prompt}
-
-I see: {analysis['caption']}
-{analysis['object_count']} objects detected.
-
-React briefly and cutely to what you see! Just 1-2 sentences!
-
-{self.vtuber_name}:"""
+    def summarize_history(self, previous, lines):
+        """Fold older conversation lines into the running summary (idle-priority LLM call)"""
+        prompt = summary_prompt(self.vtuber_name, previous, lines)
+        summary = self.vtuber._generate(prompt, max_tokens=80, priority=PRIORITY_IDLE, route=ROUTE_SUMMARY).strip()
+        return summary if summary != FALLBACK_RESPONSE else None
+    
+    def stream_reply(self, prompt, max_tokens=100, priority=USER_REPLY, llm_priority=PRIORITY_USER, key=None,
+                     route=ROUTE_CHAT):
+        """
+        Generate a reply into a new chat message token by token
+        With voice on, each sentence is spoken as soon as it is complete (at the given priority)
+        
+        Args:
+            llm_priority, key: LLM scheduling (user chat pre-empts reactions, newer reactions abort older ones)
+            route: Request class - picks the model (model_router ROUTE_*)
         
-        response = self.vtuber._generate(prompt, max_tokens=80).strip()
+        Returns: str full reply
+        """
+        self.root.after(0, self.begin_streaming_message, "Mimi")
+        show_token = lambda token: self.root.after(0, self.append_streaming_text, token)
+        
+        if self.enable_voice:
+            return self.speech.speak_stream(
+                self.vtuber.generate_stream(prompt, max_tokens=max_tokens, priority=llm_priority, key=key, route=route),
+                on_token=show_token,
+                strip_prefix=f"{self.vtuber_name}:",
+                wait=False,
+                priority=priority
+            )
+        
+        response = self.vtuber._generate(prompt, max_tokens=max_tokens, on_chunk=show_token,
+                                         priority=llm_priority, key=key, route=route).strip()
         if ':' in response:
             response = response.split(':', 1)[1].strip()
+        return response
+    
+    def generate_screen_response(self, analysis, stream=False, changes=None, scene_key=None):
+        """
+        Generate response to screen change
+        
+        Args:
+            stream: Stream into the chat window and speak it (see stream_reply)
+            changes: Optional ChangeMailbox event - what appeared/disappeared since the last reaction
+            scene_key: ReactionCache key - the reply is added to that scene's pool
+                       (looked up by ReactionEngine.react before the LLM budget is spent)
+        """
+        prompt = self.prompts.build(
+            self.vtuber.system_prompt,
+            [("CURRENT SCREEN", compact_screen(analysis)),
+             ("WHAT CHANGED", describe_changes(changes) if changes else "The scene changed.")],
+            history=self.conversation_history,
+            tail=f"""React briefly and cutely to what you see! Just 1-2 sentences!
+
+{self.vtuber_name}:"""
+        )
+        
+        if stream:
+            response = self.stream_reply(prompt, max_tokens=80, priority=SCREEN_REACTION,
+                                         llm_priority=PRIORITY_REACTION, key=SCREEN_REACTION_KEY, route=ROUTE_REACTION)
+        else:
+            response = self.vtuber._generate(prompt, max_tokens=80, priority=PRIORITY_REACTION, key=SCREEN_REACTION_KEY,
+                                             route=ROUTE_REACTION).strip()
+            if ':' in response:
+                response = response.split(':', 1)[1].strip()
+        
+        # Only complete replies are worth reusing
+        if scene_key and response != FALLBACK_RESPONSE and not self.vtuber._last_cancelled():
+            self.reaction_cache.put(scene_key, response)
         
         return response
     
@@ -517,5 +713,6 @@ React briefly and cutely to what you see! Just 1-2 sentences!
 
 
 if __name__ == "__main__":
-    app = MimiChatGUI()
+    # python mimi_gui.py --chat-only  → skip screen watching (fast start, no torch)
+    app = MimiChatGUI(watch_screen="--chat-only" not in sys.argv)
     app.run()
\ No newline at end of file
@@ -1,6 +1,7 @@
 # mimi_live_assistant.py
 from screen_understanding import ScreenUnderstanding
 from vtuber_ai_ollama import VTuberAI
+from startup_orchestrator import StartupOrchestrator
 from automation_controller import AutomationController
 from screen_capture import ScreenCapture
 import pyautogui
@@ -42,8 +43,14 @@ class MimiLiveAssistant:
         
         # Initialize components
         print("Loading components...")
-        self.understanding = ScreenUnderstanding()
-        self.vtuber = VTuberAI(vtuber_name=vtuber_name, personality=personality)
+        # Load vision models and check Ollama in parallel
+        startup = StartupOrchestrator({
+            'understanding': ScreenUnderstanding,
+            'vtuber': lambda: VTuberAI(vtuber_name=vtuber_name, personality=personality),
+        })
+        self.understanding = startup.get('understanding')
+        self.vtuber = startup.get('vtuber')
+        startup.shutdown()
         self.controller = AutomationController(
             screen_size=screen_size,
             safety_mode=safety_mode and not auto_execute
@@ -94,7 +101,8 @@ class MimiLiveAssistant:
                     # AI decides what to do
                     decision = self.vtuber.analyze_and_act(
                         screen_summary=analysis['summary'],
-                        user_task=task
+                        user_task=task,
+                        objects=analysis['objects']
                     )
                     
                     # Display info
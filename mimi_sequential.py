@@ -1,9 +1,11 @@
 # mimi_sequential.py - NO OVERLAPPING! One thing at a time!
 from screen_understanding import ScreenUnderstanding
 from vtuber_ai_ollama import VTuberAI
+from startup_orchestrator import StartupOrchestrator
 from automation_controller import AutomationController
 from screen_capture import ScreenCapture
 from voice_controller import VoiceController
+from change_detector import ChangeDetector
 import cv2
 import numpy as np
 import pyautogui
@@ -18,8 +20,14 @@ class SpeakingMimiAssistant:
         
         screen_size = pyautogui.size()
         
-        self.understanding = ScreenUnderstanding()
-        self.vtuber = VTuberAI(vtuber_name=vtuber_name, personality=personality)
+        # Load vision models and check Ollama in parallel
+        startup = StartupOrchestrator({
+            'understanding': ScreenUnderstanding,
+            'vtuber': lambda: VTuberAI(vtuber_name=vtuber_name, personality=personality),
+        })
+        self.understanding = startup.get('understanding')
+        self.vtuber = startup.get('vtuber')
+        startup.shutdown()
         self.controller = AutomationController(screen_size=screen_size, safety_mode=safety_mode)
         self.capture = ScreenCapture(target_fps=2, resize=(640, 640))  # Slower FPS!
         
@@ -30,8 +38,7 @@ class SpeakingMimiAssistant:
         self.vtuber_name = vtuber_name
         
         # State
-        self.last_objects = []
-        self.last_scene = ""
+        self.detector = ChangeDetector(persist_frames=2, move_threshold=None)  # Names only, ignore moves
         self.is_busy = False  # IMPORTANT: Lock to prevent overlaps
         
         self.colors = {
@@ -45,26 +52,8 @@ class SpeakingMimiAssistant:
         print(f"✅ {vtuber_name} ready! (Sequential mode)\n")
     
     def objects_changed(self, current_objects, current_scene):
-        """Check if objects changed"""
-        # First run
-        if not self.last_objects:
-            self.last_objects = current_objects
-            self.last_scene = current_scene
-            return True
-        
-        # Compare
-        current_names = sorted([obj['class_name'] for obj in current_objects])
-        last_names = sorted([obj['class_name'] for obj in self.last_objects])
-        
-        objects_diff = current_names != last_names
-        scene_diff = current_scene != self.last_scene
-        
-        if objects_diff or scene_diff:
-            self.last_objects = current_objects
-            self.last_scene = current_scene
-            return True
-        
-        return False
+        """Check if objects changed (for 2 frames in a row)"""
+        return len(self.detector.update(current_objects, current_scene)) > 0
     
     def create_simple_panel(self, width, height, info_text, status):
         """Simple info panel"""
@@ -199,7 +188,8 @@ class SpeakingMimiAssistant:
                             print(f"   🧠 Generating response...")
                             decision = self.vtuber.analyze_and_act(
                                 screen_summary=analysis['summary'],
-                                user_task=task
+                                user_task=task,
+                                objects=analysis['objects']
                             )
                             generation_count += 1
                             
@@ -1,15 +1,20 @@
-# mimi_smooth.py - FIXED: Processes ALL changes!
+# mimi_smooth.py - FIXED: Reacts to every change (bursts merged into one reaction)
 from screen_understanding import ScreenUnderstanding
 from vtuber_ai_ollama import VTuberAI
+from startup_orchestrator import StartupOrchestrator
+from pipeline_metrics import metrics
+from pipeline_trace import tracer
 from automation_controller import AutomationController
 from screen_capture import ScreenCapture
 from voice_controller import VoiceController
+from change_mailbox import ChangeMailbox, describe_changes
+from change_detector import ChangeDetector, describe_events
+from llm_scheduler import PRIORITY_REACTION, SCREEN_REACTION_KEY
 import cv2
 import numpy as np
 import pyautogui
 import time
 import threading
-from queue import Queue
 
 class SmoothMimiAssistant:
     """Mimi - Notices and talks about EVERY change!"""
@@ -20,8 +25,14 @@ class SmoothMimiAssistant:
         
         screen_size = pyautogui.size()
         
-        self.understanding = ScreenUnderstanding()
-        self.vtuber = VTuberAI(vtuber_name=vtuber_name, personality=personality)
+        # Load vision models and check Ollama in parallel
+        startup = StartupOrchestrator({
+            'understanding': ScreenUnderstanding,
+            'vtuber': lambda: VTuberAI(vtuber_name=vtuber_name, personality=personality),
+        })
+        self.understanding = startup.get('understanding')
+        self.vtuber = startup.get('vtuber')
+        startup.shutdown()
         self.controller = AutomationController(screen_size=screen_size, safety_mode=safety_mode)
         self.capture = ScreenCapture(target_fps=10, resize=(640, 640))
         
@@ -33,7 +44,7 @@ class SmoothMimiAssistant:
         self.safety_mode = safety_mode
         
         # Threading
-        self.ai_queue = Queue(maxsize=5)  # Allow up to 5 queued changes!
+        self.changes = ChangeMailbox()  # Newest change + everything that appeared/disappeared since
         self.ai_thread = None
         self.ai_busy = False
         self.ai_thread_running = True
@@ -45,10 +56,8 @@ class SmoothMimiAssistant:
         self.latest_frame = None
         self.lock = threading.Lock()
         
-        # Change detection
-        self.last_objects_sig = ""
-        self.last_scene = ""
-        self.pending_changes = 0  # Track how many changes are waiting
+        # Change detection (objects only - captions flicker too much)
+        self.detector = ChangeDetector(persist_frames=3, watch_scene=False)
         
         self.colors = {
             'happy': (0, 255, 0),
@@ -61,43 +70,43 @@ class SmoothMimiAssistant:
         print(f"✅ {vtuber_name} ready! (Complete mode)\n")
     
     def ai_worker(self):
-        """Background AI worker - processes ALL queued changes!"""
-        print("🤖 AI worker started (processes all changes)")
+        """Background AI worker - reacts to the newest change (bursts are merged)"""
+        print("🤖 AI worker started (merges bursts of changes)")
         
         while self.ai_thread_running:
             try:
-                # Wait for task
-                task = self.ai_queue.get(timeout=1)
+                # Wait for a change
+                event = self.changes.take(timeout=1)
                 
-                if task is None:
-                    break
+                if event is None:
+                    continue
                 
-                user_task = task
+                user_task = f"{event['task']} ({describe_changes(event)})"
                 
                 self.ai_busy = True
-                self.pending_changes -= 1  # Mark as processing
-                
-                # Get fresh frame
-                with self.lock:
-                    fresh_frame = self.latest_frame
                 
-                if fresh_frame is None:
-                    self.ai_busy = False
-                    continue
-                
-                # Re-analyze current screen
-                print(f"\n🔍 [AI] Analyzing current screen... (Queue: {self.ai_queue.qsize()})")
-                fresh_analysis = self.understanding.analyze_screen(fresh_frame)
+                # Analysis of the newest changed frame (the capture loop already ran the models -
+                # they are not thread-safe, so the worker never runs them itself)
+                print(f"\n🔍 [AI] Reacting to the current screen... (merged {event['coalesced'] + 1} changes)")
+                fresh_analysis = event['analysis']
                 
                 print(f"📊 [AI] Scene: {fresh_analysis['caption'][:50]}...")
                 print(f"📊 [AI] Objects: {fresh_analysis['object_count']}")
                 
                 # Generate response
                 print(f"🧠 [AI] Generating response...")
-                decision = self.vtuber.analyze_and_act(
-                    screen_summary=fresh_analysis['summary'],
-                    user_task=user_task
-                )
+                with tracer.span('ai_worker.task'):
+                    decision = self.vtuber.analyze_and_act(
+                        screen_summary=fresh_analysis['summary'],
+                        user_task=user_task,
+                        priority=PRIORITY_REACTION,
+                        key=SCREEN_REACTION_KEY,
+                        objects=fresh_analysis['objects']
+                    )
+                
+                if decision.get('cancelled'):
+                    print(f"⏭️  [AI] Screen changed while thinking, reacting to the new one...")
+                    continue
                 
                 dialogue = decision.get('vtuber_speech', '')
                 print(f"💬 [AI] \"{dialogue[:60]}...\"")
@@ -113,48 +122,26 @@ class SmoothMimiAssistant:
                     self.voice.speak(dialogue, block=True)
                     print(f"✅ [AI] Done!")
                 
-                # Check if more changes are queued
-                if self.ai_queue.qsize() > 0:
-                    print(f"⏭️  [AI] {self.ai_queue.qsize()} more changes waiting, continuing...")
-                
-                self.ai_queue.task_done()
+                # Check if the screen changed again meanwhile
+                if self.changes.pending():
+                    print(f"⏭️  [AI] Screen changed again, continuing...")
                 
             except Exception as e:
-                if "Empty" not in str(e):
-                    print(f"❌ [AI] Error: {e}")
+                print(f"❌ [AI] Error: {e}")
             finally:
                 self.ai_busy = False
         
         print("🤖 AI worker stopped")
     
-    def get_objects_signature(self, objects):
-        """Get object signature"""
-        sig_parts = []
-        for obj in objects:
-            name = obj['class_name']
-            x = round(obj['center'][0] / 50) * 50
-            y = round(obj['center'][1] / 50) * 50
-            sig_parts.append(f"{name}@{x},{y}")
-        return "|".join(sorted(sig_parts))
-    
     def check_for_changes(self, analysis):
-        """Check ONLY for object changes"""
-        current_sig = self.get_objects_signature(analysis['objects'])
-        
-        if not self.last_objects_sig:
-            self.last_objects_sig = current_sig
-            return True
+        """Check ONLY for object changes - returns list of change events"""
+        events = self.detector.update(analysis['objects'])
         
-        # ONLY check objects, ignore scene!
-        objects_changed = current_sig != self.last_objects_sig
-        
-        if objects_changed:
-            print(f"\n🔄 OBJECTS CHANGED!")
+        if events:
+            print(f"\n🔄 OBJECTS CHANGED! {describe_events(events)}")
             print(f"   Objects: {len(analysis['objects'])}")
-            self.last_objects_sig = current_sig
-            return True
         
-        return False
+        return events
     
     def create_info_panel(self, width, height, analysis, decision, is_speaking, ai_busy, queue_size):
         """Create info panel"""
@@ -292,15 +279,15 @@ class SmoothMimiAssistant:
         print("="*70)
         print()
         print("💡 Mimi will notice and talk about EVERY change!")
-        print("💡 She queues changes that happen while speaking!")
+        print("💡 Changes while she speaks are merged into one reaction!")
         print()
-        print("Controls: Q-Quit | V-Voice | P-Pause")
+        print("Controls: Q-Quit | V-Voice | P-Pause | S-Stats | T-Trace")
         print()
         print("Starting in 3 seconds...")
         time.sleep(3)
         
         # Start AI worker
-        self.ai_thread = threading.Thread(target=self.ai_worker, daemon=True)
+        self.ai_thread = threading.Thread(target=self.ai_worker, daemon=True, name="ai_worker")
         self.ai_thread.start()
         
         paused = False
@@ -324,23 +311,23 @@ class SmoothMimiAssistant:
                         self.current_frame = frame
                     
                     # Check for changes
-                    if self.check_for_changes(quick_analysis):
-                        # Try to queue (even if busy!)
-                        try:
-                            # Check if queue not full
-                            if self.ai_queue.qsize() < 5:
-                                self.ai_queue.put(task, block=False)
-                                self.pending_changes += 1
-                                generation_count += 1
-                                
-                                if self.ai_busy:
-                                    print(f"   ⏳ AI busy, queued for later (position #{self.ai_queue.qsize()})")
-                                else:
-                                    print(f"   📤 Queued immediately")
+                    with metrics.timer('change_detection'):
+                        changed = self.check_for_changes(quick_analysis)
+                    
+                    if changed:
+                        # Replaces any change still waiting - never a backlog
+                        waiting = self.changes.pending()
+                        self.changes.post(quick_analysis, task=task)
+                        self.vtuber.scheduler.cancel(SCREEN_REACTION_KEY)  # Old reaction is stale now
+                        
+                        if waiting:
+                            print(f"   🔀 Merged into the waiting change")
+                        else:
+                            generation_count += 1
+                            if self.ai_busy:
+                                print(f"   ⏳ AI busy, will react when done")
                             else:
-                                print(f"   ⚠️  Queue full, skipping this change")
-                        except:
-                            print(f"   ⚠️  Could not queue")
+                                print(f"   📤 Sent immediately")
                 
                 # Display
                 with self.lock:
@@ -350,7 +337,7 @@ class SmoothMimiAssistant:
                 
                 if display_analysis and display_frame is not None:
                     is_speaking = self.enable_voice and self.voice.is_busy()
-                    queue_size = self.ai_queue.qsize()
+                    queue_size = 1 if self.changes.pending() else 0
                     
                     frame_with_detections = self.draw_detections(display_frame, display_analysis)
                     panel = self.create_info_panel(400, 640, display_analysis, 
@@ -384,6 +371,13 @@ class SmoothMimiAssistant:
                         self.voice.stop()
                     print(f"\n🔊 Voice: {'ON' if self.enable_voice else 'OFF'}")
                 
+                elif key == ord('s'):
+                    print("\n" + metrics.report())
+                    print(self.vtuber.usage_report())
+                
+                elif key == ord('t'):
+                    tracer.hotkey()
+                
                 elif key == ord('p'):
                     paused = not paused
                     print(f"\n{'⏸️  PAUSED' if paused else '▶️  RESUMED'}")
@@ -392,7 +386,7 @@ class SmoothMimiAssistant:
             print("\n⏹️  Stopped")
         finally:
             self.ai_thread_running = False
-            self.ai_queue.put(None)
+            self.changes.close()
             if self.ai_thread:
                 self.ai_thread.join(timeout=2)
             cv2.destroyAllWindows()
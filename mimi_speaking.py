@@ -1,9 +1,11 @@
 # mimi_speaking.py - SMART OBJECT CHANGE DETECTION
 from screen_understanding import ScreenUnderstanding
 from vtuber_ai_ollama import VTuberAI
+from startup_orchestrator import StartupOrchestrator
 from automation_controller import AutomationController
 from screen_capture import ScreenCapture
-from voice_controller import VoiceController
+from voice_controller import VoiceController, SCREEN_REACTION
+from change_detector import ChangeDetector
 import cv2
 import numpy as np
 import pyautogui
@@ -18,8 +20,14 @@ class SpeakingMimiAssistant:
         
         screen_size = pyautogui.size()
         
-        self.understanding = ScreenUnderstanding()
-        self.vtuber = VTuberAI(vtuber_name=vtuber_name, personality=personality)
+        # Load vision models and check Ollama in parallel
+        startup = StartupOrchestrator({
+            'understanding': ScreenUnderstanding,
+            'vtuber': lambda: VTuberAI(vtuber_name=vtuber_name, personality=personality),
+        })
+        self.understanding = startup.get('understanding')
+        self.vtuber = startup.get('vtuber')
+        startup.shutdown()
         self.controller = AutomationController(screen_size=screen_size, safety_mode=safety_mode)
         self.capture = ScreenCapture(target_fps=5, resize=(640, 640))
         
@@ -30,9 +38,8 @@ class SpeakingMimiAssistant:
         self.vtuber_name = vtuber_name
         self.safety_mode = safety_mode
         
-        # Track detected objects (this is the key!)
-        self.last_detected_objects = None # Set of object class names
-        self.last_scene = None
+        # Track detected objects (this is the key!) - matched by class + IoU, must persist 2 checks
+        self.detector = ChangeDetector(persist_frames=2, move_threshold=100)
         self.last_decision = None
         self.last_analysis = None
         
@@ -47,68 +54,31 @@ class SpeakingMimiAssistant:
         print(f"✅ {vtuber_name} ready!")
         print(f"💡 Will generate text ONLY when objects change!\n")
     
-    def get_object_signature(self, analysis):
-        """
-        Create a unique signature of detected objects
-        Returns set of (class_name, approximate_position) tuples
-        """
-        signature = set()
-        
-        for obj in analysis['objects']:
-            # Use class name and rough position
-            class_name = obj['class_name']
-            # Round position to nearest 100 pixels to avoid tiny movements
-            x = round(obj['center'][0] / 100) * 100
-            y = round(obj['center'][1] / 100) * 100
-            
-            signature.add((class_name, x, y))
-        
-        return signature
-    
     def objects_changed(self, current_analysis):
         """
         Check if objects have meaningfully changed
-        Returns True if:
+        Returns True if (for 2 checks in a row):
         - New objects appeared
-        - Objects disappeared
+        - Objects disappeared or moved far
         - Scene changed significantly
         """
-        current_objects = self.get_object_signature(current_analysis)
-        current_scene = current_analysis['caption']
-        
-        # First run - always trigger
-        if self.last_detected_objects is None:
-            self.last_detected_objects = current_objects
-            self.last_scene = current_scene
-            return True
-        
-        # Check if objects changed
-        objects_added = current_objects - self.last_detected_objects
-        objects_removed = self.last_detected_objects - current_objects
-        
-        # Check if scene changed significantly
-        scene_changed = current_scene != self.last_scene
-        
-        # Trigger if:
-        # 1. New objects appeared
-        # 2. Objects disappeared
-        # 3. Scene description changed
-        changed = len(objects_added) > 0 or len(objects_removed) > 0 or scene_changed
-        
-        if changed:
-            # Update state
-            self.last_detected_objects = current_objects
-            self.last_scene = current_scene
-            
-            # Print what changed (for debugging)
-            if objects_added:
-                print(f"🆕 New objects: {[obj[0] for obj in objects_added]}")
-            if objects_removed:
-                print(f"❌ Removed objects: {[obj[0] for obj in objects_removed]}")
-            if scene_changed:
-                print(f"🎬 Scene changed: {current_scene}")
-        
-        return changed
+        events = self.detector.update(current_analysis['objects'], current_analysis['caption'])
+        
+        # Print what changed (for debugging)
+        added = [e['class_name'] for e in events if e['type'] == 'added']
+        removed = [e['class_name'] for e in events if e['type'] == 'removed']
+        moved = [e['class_name'] for e in events if e['type'] == 'moved']
+        if added:
+            print(f"🆕 New objects: {added}")
+        if removed:
+            print(f"❌ Removed objects: {removed}")
+        if moved:
+            print(f"↔️  Moved objects: {moved}")
+        for event in events:
+            if event['type'] == 'scene':
+                print(f"🎬 Scene changed: {event['to']}")
+        
+        return len(events) > 0
     
     def create_info_panel(self, width, height, analysis, decision, is_speaking=False):
         """Create info panel"""
@@ -316,7 +286,8 @@ class SpeakingMimiAssistant:
                     # Generate NEW response
                     current_decision = self.vtuber.analyze_and_act(
                         screen_summary=current_analysis['summary'],
-                        user_task=task
+                        user_task=task,
+                        objects=current_analysis['objects']
                     )
                     
                     generation_count += 1
@@ -326,10 +297,8 @@ class SpeakingMimiAssistant:
                     
                     # Speak it
                     if self.enable_voice:
-                        # Wait for previous speech to finish
-                        while self.voice.is_busy():
-                            time.sleep(0.1)
-                        self.voice.speak(dialogue, block=False)
+                        # Queued behind any previous speech
+                        self.voice.speak(dialogue, block=False, priority=SCREEN_REACTION)
                     
                     # Save this decision
                     self.last_decision = current_decision
@@ -1,6 +1,7 @@
 # mimi_visual.py - COMPLETE WORKING VERSION
 from screen_understanding import ScreenUnderstanding
 from vtuber_ai_ollama import VTuberAI
+from startup_orchestrator import StartupOrchestrator
 from automation_controller import AutomationController
 from screen_capture import ScreenCapture
 import cv2
@@ -16,8 +17,14 @@ class VisualMimiAssistant:
         
         screen_size = pyautogui.size()
         
-        self.understanding = ScreenUnderstanding()
-        self.vtuber = VTuberAI(vtuber_name=vtuber_name, personality=personality)
+        # Load vision models and check Ollama in parallel
+        startup = StartupOrchestrator({
+            'understanding': ScreenUnderstanding,
+            'vtuber': lambda: VTuberAI(vtuber_name=vtuber_name, personality=personality),
+        })
+        self.understanding = startup.get('understanding')
+        self.vtuber = startup.get('vtuber')
+        startup.shutdown()
         self.controller = AutomationController(screen_size=screen_size, safety_mode=safety_mode)
         self.capture = ScreenCapture(target_fps=5, resize=(640, 640))
         
@@ -208,7 +215,8 @@ class VisualMimiAssistant:
                 current_analysis = self.understanding.analyze_screen(frame)
                 current_decision = self.vtuber.analyze_and_act(
                     screen_summary=current_analysis['summary'],
-                    user_task=task
+                    user_task=task,
+                    objects=current_analysis['objects']
                 )
                 
                 if current_analysis['object_count'] > 0:
@@ -0,0 +1,213 @@
+# model_router.py - Send each kind of LLM request to its own model (small for chit-chat, bigger for decisions)
+import threading
+from pipeline_metrics import metrics
+from pipeline_trace import tracer
+
+# Request classes
+ROUTE_CHAT = 'chat'           # Conversation with the user
+ROUTE_REACTION = 'reaction'   # Short screen reactions
+ROUTE_SUMMARY = 'summary'     # Rolling conversation summaries (idle background work)
+ROUTE_DECISION = 'decision'   # analyze_and_act action planning
+
+# Suggested setup: tiny model for reactions and summaries, the default (3B) model for everything else
+FAST_REACTIONS = {ROUTE_REACTION: 'llama3.2:1b', ROUTE_SUMMARY: 'llama3.2:1b'}
+
+
+def installed_models(listing):
+    """Model names from ollama.Client.list() (dict or response object)"""
+    models = listing.get('models', []) if isinstance(listing, dict) else getattr(listing, 'models', None) or []
+    names = set()
+    for model in models:
+        if isinstance(model, dict):
+            name = model.get('model') or model.get('name')
+        else:
+            name = getattr(model, 'model', None) or getattr(model, 'name', None)
+        if name:
+            names.add(name)
+    return names
+
+
+class ModelRouter:
+    """
+    Route → model table plus the LLM usage accounting: per-route generation telemetry from
+    Ollama's final response (prompt / eval token counts and durations, load time), totals
+    over all routes and model reload alerts
+
+    Usage:
+        router = ModelRouter("llama3.2:3b", {ROUTE_REACTION: "llama3.2:1b"})
+        model = router.model_for(ROUTE_REACTION)
+        router.record(ROUTE_REACTION, seconds=0.4, first_token=0.1, final=last_ollama_part)
+    """
+
+    def __init__(self, default_model, routes=None, reload_alert_s=0.5):
+        """
+        Args:
+            default_model: Model of every route that is not configured
+            routes: {route: model name}
+            reload_alert_s: A load_duration above this means the model was (re)loaded for the request
+        """
+        self.default_model = default_model
+        self.routes = dict(routes or {})
+        self.reload_alert_s = reload_alert_s
+        self.lock = threading.Lock()
+        self.route_stats = {}
+        self.last_prompt_tokens = 0
+
+    def model_for(self, route):
+        return self.routes.get(route, self.default_model)
+
+    def models(self):
+        """Every model in use (default first)"""
+        models = [self.default_model]
+        for model in self.routes.values():
+            if model not in models:
+                models.append(model)
+        return models
+
+    def restrict(self, available):
+        """
+        Send routes whose model is not installed to the default model
+
+        Returns: list of (route, missing model)
+        """
+        if not available:
+            return []  # Unknown (e.g. server unreachable) - keep the configuration
+        missing = []
+        for route, model in list(self.routes.items()):
+            if model not in available and f"{model}:latest" not in available:
+                missing.append((route, model))
+                del self.routes[route]
+        return missing
+
+    def record(self, route, seconds, first_token=None, final=None):
+        """
+        One finished (or aborted) request
+
+        Args:
+            seconds: Wall time of the request
+            first_token: Seconds to the first token (None if no token arrived)
+            final: Last Ollama response with the eval / prompt_eval / load fields (None if aborted)
+        """
+        final = final or {}
+        eval_count = final.get('eval_count') or 0
+        eval_s = (final.get('eval_duration') or 0) / 1e9
+        prompt_count = final.get('prompt_eval_count') or 0
+        prompt_s = (final.get('prompt_eval_duration') or 0) / 1e9
+        load_s = (final.get('load_duration') or 0) / 1e9
+        reloaded = load_s >= self.reload_alert_s
+
+        with self.lock:
+            s = self.route_stats.setdefault(route, {'calls': 0, 'seconds': 0.0, 'first_token_s': 0.0,
+                                                    'first_tokens': 0, 'tokens': 0, 'eval_s': 0.0,
+                                                    'completed': 0, 'prompt_tokens': 0, 'prompt_eval_s': 0.0,
+                                                    'load_s': 0.0, 'reloads': 0})
+            s['calls'] += 1
+            s['seconds'] += seconds
+            if first_token is not None:
+                s['first_token_s'] += first_token
+                s['first_tokens'] += 1
+            s['tokens'] += eval_count
+            s['eval_s'] += eval_s
+            if final:
+                s['completed'] += 1
+                s['prompt_tokens'] += prompt_count
+                s['prompt_eval_s'] += prompt_s
+                s['load_s'] += load_s
+                self.last_prompt_tokens = prompt_count
+            s['reloads'] += reloaded
+
+        # Same surface as the vision stages (metrics.report / snapshot)
+        metrics.record(f'llm_{route}', seconds)
+        if final:
+            metrics.record('llm_prompt_eval', prompt_s)
+            metrics.count('llm_prompt_tokens', prompt_count)
+            metrics.record(f'llm_{route}_prompt_eval', prompt_s)
+            metrics.count(f'llm_{route}_prompt_tokens', prompt_count)
+            metrics.count(f'llm_{route}_eval_tokens', eval_count)
+            if eval_count:
+                metrics.record(f'llm_{route}_per_token', eval_s / eval_count)
+
+        if reloaded:
+            model = final.get('model') or self.model_for(route)
+            print(f"🔄 {model} was reloaded for a {route} request (+{load_s:.1f}s) - "
+                  f"keep_alive expired or another model pushed it out of memory")
+            metrics.count('llm_reloads')
+            tracer.instant('llm_reload', model=model, route=route, seconds=round(load_s, 2))
+
+    def stats(self):
+        """Per route: model, calls, avg latency / first token (ms), tokens per second, prompt size, reloads"""
+        with self.lock:
+            result = {}
+            for route, s in self.route_stats.items():
+                done = s['completed']
+                result[route] = {
+                    'model': self.model_for(route),
+                    'calls': s['calls'],
+                    'avg_ms': round(s['seconds'] / s['calls'] * 1000, 1),
+                    'first_token_ms': round(s['first_token_s'] / s['first_tokens'] * 1000, 1) if s['first_tokens'] else None,
+                    'tokens_per_s': round(s['tokens'] / s['eval_s'], 1) if s['eval_s'] else None,
+                    'avg_prompt_tokens': round(s['prompt_tokens'] / done) if done else None,
+                    'prompt_eval_ms': round(s['prompt_eval_s'] / done * 1000, 1) if done else None,
+                    'load_s': round(s['load_s'], 2),
+                    'reloads': s['reloads'],
+                }
+            return result
+
+    def totals(self):
+        """All routes together: calls, prompt tokens evaluated (low = prefix reused), load time"""
+        with self.lock:
+            calls = sum(s['calls'] for s in self.route_stats.values())
+            done = sum(s['completed'] for s in self.route_stats.values())
+            prompt_tokens = sum(s['prompt_tokens'] for s in self.route_stats.values())
+            prompt_eval_s = sum(s['prompt_eval_s'] for s in self.route_stats.values())
+            return {
+                'calls': calls,
+                'avg_prompt_tokens': round(prompt_tokens / done) if done else None,
+                'last_prompt_tokens': self.last_prompt_tokens,
+                'prompt_eval_ms': round(prompt_eval_s / done * 1000, 1) if done else None,
+                'load_s': round(sum(s['load_s'] for s in self.route_stats.values()), 2),
+                'reloads': sum(s['reloads'] for s in self.route_stats.values()),
+            }
+
+    def report(self):
+        stats = self.stats()
+        if not stats:
+            return "🧠 No LLM calls yet"
+        t = self.totals()
+        prompt = (f"prompt tokens evaluated: {t['avg_prompt_tokens']} avg, {t['last_prompt_tokens']} last | "
+                  f"prompt eval {t['prompt_eval_ms']:.0f}ms avg" if t['avg_prompt_tokens'] is not None else "prompt -")
+        lines = [f"🧠 LLM: {t['calls']} calls | {prompt} | load {t['load_s']:.2f}s total, {t['reloads']} reloads",
+                 "🛣️  LLM routes:"]
+        for route, s in sorted(stats.items()):
+            first = f"{s['first_token_ms']:.0f}ms" if s['first_token_ms'] is not None else "-"
+            speed = f"{s['tokens_per_s']:.0f} tok/s" if s['tokens_per_s'] is not None else "-"
+            prompt = (f"prompt {s['avg_prompt_tokens']} tok / {s['prompt_eval_ms']:.0f}ms"
+                      if s['avg_prompt_tokens'] is not None else "prompt -")
+            lines.append(f"   {route:<9} {s['model']:<14} {s['calls']:>4} calls | "
+                         f"{s['avg_ms']:.0f}ms avg | first token {first} | {speed} | {prompt} | "
+                         f"{s['reloads']} reloads")
+        return "\n".join(lines)
+
+
+# Route table and report with made-up numbers
+if __name__ == "__main__":
+    print("🛣️  Testing model router...\n")
+
+    router = ModelRouter("llama3.2:3b", FAST_REACTIONS)
+    for route in (ROUTE_CHAT, ROUTE_REACTION, ROUTE_SUMMARY, ROUTE_DECISION):
+        print(f"   {route:<9} → {router.model_for(route)}")
+    print(f"   models: {router.models()}")
+
+    router.record(ROUTE_REACTION, 0.45, 0.08, {'eval_count': 30, 'eval_duration': 0.25e9,
+                                               'prompt_eval_count': 310, 'prompt_eval_duration': 0.06e9})
+    router.record(ROUTE_DECISION, 2.1, 0.20, {'eval_count': 120, 'eval_duration': 1.8e9,
+                                              'prompt_eval_count': 900, 'prompt_eval_duration': 0.18e9})
+    router.record(ROUTE_REACTION, 0.10, None, None)
+    router.record(ROUTE_SUMMARY, 0.60, 0.09, {'eval_count': 45, 'eval_duration': 0.4e9,
+                                             'prompt_eval_count': 150, 'prompt_eval_duration': 0.03e9})
+    router.record(ROUTE_DECISION, 4.3, 2.40, {'eval_count': 110, 'eval_duration': 1.7e9, 'load_duration': 2.2e9,
+                                              'prompt_eval_count': 880, 'prompt_eval_duration': 0.17e9})
+    print("\n" + router.report())
+
+    print(f"\n   Without llama3.2:1b installed: {router.restrict({'llama3.2:3b'})} → {router.models()}")
+    print("\n✅ Model router test complete!")
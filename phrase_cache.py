@@ -0,0 +1,132 @@
+# phrase_cache.py - Pre-rendered audio for Mimi's fixed lines
+import hashlib
+import os
+import threading
+
+try:
+    import winsound  # Windows only - used for instant WAV playback
+except ImportError:
+    winsound = None
+
+class PhraseAudioCache:
+    """
+    Content-addressed WAV cache: key = hash(text, voice, rate, volume)
+    Bounded disk usage with least-recently-used eviction
+    """
+
+    def __init__(self, cache_dir='tts_cache', max_bytes=50 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: Folder for rendered WAV files
+            max_bytes: Disk budget, oldest-used files are deleted beyond it
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(text, voice, rate, volume):
+        """Content address of a rendered phrase"""
+        raw = f"{text}\x00{voice}\x00{rate}\x00{volume}".encode('utf-8')
+        return hashlib.sha1(raw).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def get(self, key):
+        """Path of a cached WAV (touched for LRU) or None"""
+        path = self.path_for(key)
+        try:
+            if os.path.getsize(path) > 0:
+                os.utime(path)
+                self.hits += 1
+                return path
+        except OSError:
+            pass
+        self.misses += 1
+        return None
+
+    def contains(self, key):
+        path = self.path_for(key)
+        return os.path.exists(path) and os.path.getsize(path) > 0
+
+    def added(self, key):
+        """Call after a WAV was rendered to path_for(key) - enforces the disk budget"""
+        if not self.contains(key):
+            return
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used files until the cache fits in max_bytes"""
+        with self.lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith('.wav'):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+    @staticmethod
+    def can_play():
+        return winsound is not None
+
+    @staticmethod
+    def play(path):
+        """Play a WAV file (blocking)"""
+        winsound.PlaySound(path, winsound.SND_FILENAME)
+
+    @staticmethod
+    def stop():
+        """Stop the WAV that is playing (barge-in)"""
+        winsound.PlaySound(None, 0)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+# Test the cache with the real voice
+if __name__ == "__main__":
+    from voice_controller import VoiceController
+    import time
+
+    phrases = [
+        "Opening YouTube for you, Master!",
+        "Typing that for you!",
+        "Hey Master! How are you feeling today?",
+    ]
+
+    voice = VoiceController(rate=170, volume=0.9, phrase_cache=PhraseAudioCache())
+    voice.prerender(phrases)
+
+    print("⏳ Rendering phrases in the background...")
+    time.sleep(5)
+
+    for phrase in phrases:
+        start = time.time()
+        voice.speak(phrase, block=True)
+        print(f"   {phrase} → {time.time() - start:.2f}s")
+
+    print(f"\n📊 Cache: {voice.phrase_cache.stats()}")
+    print("✅ Phrase cache test complete!")
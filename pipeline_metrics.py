@@ -0,0 +1,197 @@
+# pipeline_metrics.py - Per-stage latency for capture → detect → caption → LLM → TTS
+from collections import deque
+import os
+import threading
+import time
+from pipeline_trace import tracer
+
+class _NullTimer:
+    """Does nothing - returned when metrics are disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    """Context manager timing one stage with a monotonic clock (also traced as a span)"""
+
+    __slots__ = ('metrics', 'stage', 'start')
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        self.metrics.record(self.stage, elapsed)
+        tracer.complete(self.stage, self.start, elapsed)
+        return False
+
+
+class StageHistogram:
+    """Latency samples of one stage (bounded window) + running totals"""
+
+    def __init__(self, window=2048):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, sorted_samples, p):
+        if not sorted_samples:
+            return 0.0
+        index = min(len(sorted_samples) - 1, int(round(p / 100 * (len(sorted_samples) - 1))))
+        return sorted_samples[index]
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            'p50_ms': round(self.percentile(ordered, 50) * 1000, 2),
+            'p95_ms': round(self.percentile(ordered, 95) * 1000, 2),
+            'p99_ms': round(self.percentile(ordered, 99) * 1000, 2),
+            'max_ms': round(self.max * 1000, 2),
+        }
+
+
+class PipelineMetrics:
+    """
+    Lightweight stage timers with p50/p95/p99 histograms
+
+    Usage:
+        with metrics.timer('yolo'):
+            objects = detector.detect(frame)
+
+        metrics.record('llm_first_token', seconds)
+        metrics.count('speech_dropped')
+        print(metrics.report())
+    """
+
+    # Display order for the report
+    STAGES = [
+        'capture', 'resize', 'yolo', 'clip', 'clip_regions', 'summary',
+        'change_detection', 'llm_generate', 'llm_first_token', 'llm_prompt_eval', 'tts', 'tts_first_audio',
+    ]
+
+    def __init__(self, enabled=False, window=2048):
+        self.enabled = enabled
+        self.window = window
+        self.stages = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def timer(self, stage):
+        """Context manager timing a stage (no-op when metrics and tracing are disabled)"""
+        if not self.enabled and not tracer.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, stage)
+
+    def record(self, stage, seconds):
+        """Record one latency sample in seconds"""
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = StageHistogram(self.window)
+            histogram.add(seconds)
+
+    def count(self, name, n=1):
+        """Increment an event counter (dropped / expired lines, ...)"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self, stage):
+        """p50/p95/p99 for one stage (None if never recorded)"""
+        with self.lock:
+            histogram = self.stages.get(stage)
+            return histogram.summary() if histogram else None
+
+    def snapshot(self):
+        """All stage summaries as a dict"""
+        with self.lock:
+            return {stage: histogram.summary() for stage, histogram in self.stages.items()}
+
+    def report(self):
+        """Human readable latency table"""
+        snapshot = self.snapshot()
+        with self.lock:
+            counters = dict(self.counters)
+        if not snapshot and not counters:
+            state = "enabled" if self.enabled else "disabled - set MIMI_METRICS=1"
+            return f"📊 No pipeline metrics recorded ({state})"
+
+        known = [stage for stage in self.STAGES if stage in snapshot]
+        extra = sorted(stage for stage in snapshot if stage not in self.STAGES)
+
+        lines = ["📊 PIPELINE LATENCY (ms):",
+                 f"   {'stage':<26} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"]
+        for stage in known + extra:
+            s = snapshot[stage]
+            lines.append(f"   {stage:<26} {s['count']:>6} {s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} "
+                         f"{s['p99_ms']:>9.1f} {s['max_ms']:>9.1f}")
+
+        if counters:
+            lines.append("   counters: " + ", ".join(f"{name}={n}" for name, n in sorted(counters.items())))
+        return "\n".join(lines)
+
+    def reset(self):
+        with self.lock:
+            self.stages.clear()
+            self.counters.clear()
+
+
+# Shared instance used by every pipeline stage (MIMI_METRICS=1 to enable at startup)
+metrics = PipelineMetrics(enabled=os.environ.get('MIMI_METRICS', '0') == '1')
+
+
+# Test the metrics
+if __name__ == "__main__":
+    import random
+
+    print("📊 Testing pipeline metrics...\n")
+
+    test_metrics = PipelineMetrics(enabled=True)
+    for _ in range(200):
+        with test_metrics.timer('yolo'):
+            time.sleep(random.uniform(0.001, 0.003))
+        test_metrics.record('clip', random.uniform(0.005, 0.02))
+
+    print(test_metrics.report())
+
+    # Overhead when disabled
+    test_metrics.disable()
+    start = time.perf_counter()
+    for _ in range(100000):
+        with test_metrics.timer('yolo'):
+            pass
+    elapsed = time.perf_counter() - start
+    print(f"\n⚡ Disabled overhead: {elapsed / 100000 * 1e9:.0f}ns per timer")
+
+    print("\n✅ Metrics test complete!")
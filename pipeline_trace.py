@@ -0,0 +1,188 @@
+# pipeline_trace.py - Chrome trace-event export of per-thread pipeline spans (open in ui.perfetto.dev)
+from collections import deque
+import atexit
+import json
+import os
+import threading
+import time
+
+class _NullSpan:
+    """Does nothing - returned when tracing is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Context manager recording one complete ('X') event"""
+
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.complete(self.name, self.start, time.perf_counter() - self.start, self.args)
+        return False
+
+
+class PipelineTracer:
+    """
+    Opt-in span recorder with a bounded in-memory buffer
+
+    Usage:
+        with tracer.span('yolo'):
+            objects = detector.detect(frame)
+
+        tracer.dump('mimi_trace.json')
+    """
+
+    def __init__(self, enabled=False, max_events=200000):
+        self.enabled = enabled
+        self.events = deque(maxlen=max_events)
+        self.thread_names = {}
+        self.pid = os.getpid()
+        self.t0 = time.perf_counter()
+        self.lock = threading.Lock()
+        self._exit_path = None
+
+    def enable(self, dump_on_exit=None):
+        """
+        Start recording
+
+        Args:
+            dump_on_exit: Write the trace to this path when the process exits
+        """
+        self.enabled = True
+        if dump_on_exit and self._exit_path is None:
+            self._exit_path = dump_on_exit
+            atexit.register(lambda: self.dump(self._exit_path))
+
+    def disable(self):
+        self.enabled = False
+
+    def _thread(self):
+        """Current thread id (remember its name for the metadata events)"""
+        thread = threading.current_thread()
+        tid = thread.ident
+        if tid not in self.thread_names:
+            self.thread_names[tid] = thread.name
+        return tid
+
+    def span(self, name, **args):
+        """Context manager recording a span on the current thread (no-op when disabled)"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def complete(self, name, start, duration, args=None):
+        """Record a finished span (start from time.perf_counter(), duration in seconds)"""
+        if not self.enabled:
+            return
+        event = {
+            'name': name,
+            'ph': 'X',
+            'ts': round((start - self.t0) * 1e6, 1),
+            'dur': round(duration * 1e6, 1),
+            'pid': self.pid,
+        }
+        if args:
+            event['args'] = args
+        with self.lock:
+            event['tid'] = self._thread()
+            self.events.append(event)
+
+    def instant(self, name, **args):
+        """Record a point event (e.g. 'change_detected')"""
+        if not self.enabled:
+            return
+        event = {
+            'name': name,
+            'ph': 'i',
+            's': 't',
+            'ts': round((time.perf_counter() - self.t0) * 1e6, 1),
+            'pid': self.pid,
+        }
+        if args:
+            event['args'] = args
+        with self.lock:
+            event['tid'] = self._thread()
+            self.events.append(event)
+
+    def to_chrome_trace(self):
+        """Trace as a Chrome trace-event dict"""
+        with self.lock:
+            events = list(self.events)
+            names = dict(self.thread_names)
+
+        metadata = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+            for tid, name in names.items()
+        ]
+        return {'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}
+
+    def dump(self, path='mimi_trace.json'):
+        """Write the trace as JSON (load it in ui.perfetto.dev or chrome://tracing)"""
+        trace = self.to_chrome_trace()
+        with open(path, 'w') as f:
+            json.dump(trace, f)
+        print(f"🧵 Trace saved: {path} ({len(trace['traceEvents'])} events)")
+        return path
+
+    def hotkey(self, path='mimi_trace.json'):
+        """Hotkey action: start recording if off, otherwise dump what was recorded so far"""
+        if not self.enabled:
+            self.enable(dump_on_exit=path)
+            print(f"🧵 Tracing started (press again to save {path})")
+            return None
+        return self.dump(path)
+
+    def clear(self):
+        with self.lock:
+            self.events.clear()
+
+
+# Shared tracer (MIMI_TRACE=1 to record from startup, dumped to MIMI_TRACE_FILE on exit)
+tracer = PipelineTracer()
+if os.environ.get('MIMI_TRACE', '0') == '1':
+    tracer.enable(dump_on_exit=os.environ.get('MIMI_TRACE_FILE', 'mimi_trace.json'))
+
+
+# Test the tracer
+if __name__ == "__main__":
+    print("🧵 Testing pipeline tracer...\n")
+
+    test_tracer = PipelineTracer(enabled=True)
+
+    def worker():
+        for i in range(5):
+            with test_tracer.span('ai_worker.reaction', index=i):
+                time.sleep(0.02)
+
+    thread = threading.Thread(target=worker, name='ai_worker')
+    thread.start()
+
+    for i in range(10):
+        with test_tracer.span('analyze_screen'):
+            with test_tracer.span('yolo'):
+                time.sleep(0.005)
+            with test_tracer.span('clip'):
+                time.sleep(0.003)
+    test_tracer.instant('change_detected')
+
+    thread.join()
+    test_tracer.dump('test_trace.json')
+
+    print("\n✅ Tracer test complete! Open test_trace.json in ui.perfetto.dev")
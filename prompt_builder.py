@@ -0,0 +1,279 @@
+# prompt_builder.py - Token-budgeted prompts: compact screen context + rolling conversation summary
+from collections import Counter
+import threading
+from pipeline_metrics import metrics
+
+def count_tokens(text):
+    """Rough token count (~4 characters per token for English with llama-style tokenizers)"""
+    return (len(text) + 3) // 4
+
+
+def truncate_to_tokens(text, max_tokens, keep='start'):
+    """
+    Cut text to a token budget on line (then character) boundaries
+
+    Args:
+        keep: 'start' keeps the beginning, 'end' keeps the newest lines at the end
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    lines = text.split('\n')
+    if keep == 'end':
+        lines.reverse()
+    kept = []
+    used = 0
+    for line in lines:
+        cost = count_tokens(line) + 1
+        if used + cost > max_tokens:
+            if not kept:
+                # A single long line - cut inside it
+                chars = max(0, max_tokens * 4 - 3)
+                kept.append(line[:chars] + "..." if keep == 'start' else "..." + line[-chars:])
+            break
+        kept.append(line)
+        used += cost
+    if keep == 'end':
+        kept.reverse()
+    return '\n'.join(kept)
+
+
+def compress_objects(objects, limit=8):
+    """Detections as counts by class, e.g. '3x Video, 2x Notification, Search box (+2 more kinds)'"""
+    if not objects:
+        return "(none)"
+    counts = Counter(obj['class_name'] for obj in objects)
+    parts = [f"{n}x {name}" if n > 1 else name for name, n in counts.most_common(limit)]
+    if len(counts) > limit:
+        parts.append(f"(+{len(counts) - limit} more kinds)")
+    return ", ".join(parts)
+
+
+def compact_screen(analysis, limit=8):
+    """Short screen description for conversational prompts (no per-object lines)"""
+    text = f"Scene: {analysis['caption']}\nObjects ({analysis['object_count']}): {compress_objects(analysis['objects'], limit)}"
+    clickable = analysis.get('clickable_objects')
+    if clickable:
+        text += f"\nClickable ({len(clickable)}): {compress_objects(clickable, limit)}"
+    return text
+
+
+def extractive_summary(previous, lines, width=60):
+    """Cheap summary: previous summary + the first words of each line (oldest drop out when trimmed)"""
+    shortened = [line if len(line) <= width else line[:width].rsplit(' ', 1)[0] + "..." for line in lines]
+    return "\n".join(filter(None, [previous] + shortened))
+
+
+def summary_prompt(name, previous, lines):
+    """LLM prompt that folds conversation lines into the running summary (for RollingHistory summarize)"""
+    parts = [f"Summarize this conversation between the user and {name} in 2-3 short sentences.\n"
+             "Keep names, requests and facts worth remembering."]
+    if previous:
+        parts.append(f"Summary so far: {previous}")
+    parts.append("\n".join(lines))
+    parts.append("Summary:")
+    return "\n\n".join(parts)
+
+
+class RollingHistory:
+    """
+    Conversation lines with a running summary: the newest lines stay verbatim,
+    older ones are folded into the summary in batches
+
+    Usage:
+        history = RollingHistory(summarize=llm_summarize)
+        history.append("User: hi")
+        history.summary, history.recent()
+    """
+
+    def __init__(self, keep_recent=6, fold_every=6, summary_tokens=120, summarize=None):
+        """
+        Args:
+            keep_recent: Lines always kept verbatim
+            fold_every: Fold once this many older lines piled up (one summary refresh per batch)
+            summary_tokens: Budget of the running summary
+            summarize: Optional callable(previous summary, lines) -> str (e.g. an LLM call),
+                       run in a background thread. Default / on failure: extractive_summary
+        """
+        self.keep_recent = keep_recent
+        self.fold_every = fold_every
+        self.summary_tokens = summary_tokens
+        self.summarize = summarize
+
+        self.lock = threading.Lock()
+        self.lines = []
+        self.folding = []       # Lines being summarized (still shown verbatim until done)
+        self.summary = ""
+        self.folds = 0
+        self.total = 0
+
+    def append(self, line):
+        with self.lock:
+            self.lines.append(line)
+            self.total += 1
+            if self.folding or len(self.lines) < self.keep_recent + self.fold_every:
+                return
+            self.folding = self.lines[:-self.keep_recent]
+            self.lines = self.lines[-self.keep_recent:]
+            batch = list(self.folding)
+
+        if self.summarize:
+            threading.Thread(target=self._fold, args=(batch,), daemon=True, name="history_fold").start()
+        else:
+            self._fold(batch)
+
+    def _fold(self, batch):
+        try:
+            summary = (self.summarize(self.summary, batch) if self.summarize else None) \
+                or extractive_summary(self.summary, batch)
+        except Exception as e:
+            print(f"⚠️  History summary failed: {e}")
+            summary = extractive_summary(self.summary, batch)
+
+        with self.lock:
+            self.summary = truncate_to_tokens(summary.strip(), self.summary_tokens, keep='end')
+            self.folding = []
+            self.folds += 1
+        metrics.count('history_folds')
+
+    def recent(self, n=None):
+        """Verbatim lines (oldest first)"""
+        with self.lock:
+            lines = self.folding + self.lines
+        return lines[-n:] if n else lines
+
+    def __len__(self):
+        with self.lock:
+            return len(self.folding) + len(self.lines)
+
+
+class PromptBuilder:
+    """
+    Assembles prompts that fit a token budget:
+    system prompt + sections + conversation (summary + newest lines that fit) + tail
+
+    Usage:
+        prompt = builder.build(system_prompt,
+                               [("CURRENT SCREEN", compact_screen(analysis))],
+                               history=history,
+                               tail=f"React briefly!\\n\\n{name}:")
+    """
+
+    def __init__(self, budget=768, history_reserve=120):
+        """
+        Args:
+            budget: Maximum prompt tokens (estimated)
+            history_reserve: Tokens kept free for the conversation when sections are long
+        """
+        self.budget = budget
+        self.history_reserve = history_reserve
+        self.builds = 0
+        self.truncated = 0
+        self.last_tokens = 0
+
+    def build(self, system, sections=(), history=None, history_title="RECENT CONVERSATION", tail=""):
+        """
+        Args:
+            system: System prompt (always kept, first)
+            sections: (title, text) pairs, trimmed to fit if needed
+            history: RollingHistory or list of lines (newest kept first)
+            tail: Text after the conversation (user message, instructions - always kept)
+
+        Returns: str prompt
+        """
+        remaining = self.budget - count_tokens(system) - count_tokens(tail) - 4
+        reserve = min(self.history_reserve, remaining // 2) if history else 0
+        truncated = False
+
+        blocks = [system]
+        for title, text in sections:
+            allowed = remaining - reserve - count_tokens(title) - 2
+            fitted = truncate_to_tokens(text, allowed)
+            truncated |= fitted != text
+            if not fitted:
+                continue
+            block = f"{title}:\n{fitted}" if title else fitted
+            blocks.append(block)
+            remaining -= count_tokens(block) + 1
+
+        if history:
+            conversation, truncated_history = self._fit_history(history, remaining - count_tokens(history_title) - 2)
+            truncated |= truncated_history
+            if conversation:
+                blocks.append(f"{history_title}:\n{conversation}")
+
+        if tail:
+            blocks.append(tail)
+
+        prompt = "\n\n".join(blocks)
+        self.builds += 1
+        self.truncated += truncated
+        self.last_tokens = count_tokens(prompt)
+        metrics.count('prompt_tokens_est', self.last_tokens)
+        return prompt
+
+    def _fit_history(self, history, available):
+        """Summary + as many of the newest lines as fit - returns (text, truncated)"""
+        if isinstance(history, RollingHistory):
+            summary, lines = history.summary, history.recent()
+        else:
+            summary, lines = "", list(history)
+
+        # Newest lines first - they matter most
+        kept = []
+        used = 0
+        for line in reversed(lines):
+            cost = count_tokens(line) + 1
+            if used + cost > available:
+                break
+            kept.append(line)
+            used += cost
+        kept.reverse()
+
+        parts = []
+        if summary:
+            summary_text = truncate_to_tokens(summary, available - used - 4, keep='end')
+            if summary_text:
+                parts.append(f"(Earlier: {summary_text})")
+        parts.extend(kept)
+        return "\n".join(parts), len(kept) < len(lines)
+
+    def stats(self):
+        return {'builds': self.builds, 'truncated': self.truncated, 'last_tokens': self.last_tokens,
+                'budget': self.budget}
+
+    def report(self):
+        s = self.stats()
+        return f"🧱 Prompts: {s['builds']} built, last {s['last_tokens']}/{s['budget']} tokens, {s['truncated']} trimmed to fit"
+
+
+# Prompt size over a long session stays flat
+if __name__ == "__main__":
+    import random
+
+    print("🧱 Testing prompt builder...\n")
+
+    system = "You are Mimi, a cheerful anime VTuber assistant. " * 5
+    builder = PromptBuilder(budget=400)
+    history = RollingHistory(keep_recent=4, fold_every=4, summary_tokens=60)
+
+    classes = ['button', 'icon', 'Video', 'Notification', 'Search box', 'text']
+    for turn in range(1, 61):
+        history.append(f"User: message number {turn} about something on the screen")
+        history.append(f"Mimi: reply number {turn}, ehehe~ that sounds fun, Master!")
+        objects = [{'class_name': random.choice(classes)} for _ in range(turn * 3)]
+        analysis = {'caption': 'a screenshot of a web browser', 'object_count': len(objects), 'objects': objects}
+
+        naive = system + "\n".join(f"{i}. {o['class_name']} at position [100, 200]" for i, o in enumerate(objects)) \
+            + "\n".join(history.recent())
+        prompt = builder.build(system, [("CURRENT SCREEN", compact_screen(analysis))],
+                               history=history, tail="React briefly!\n\nMimi:")
+        if turn in (1, 10, 30, 60):
+            print(f"   turn {turn:>2}: {count_tokens(prompt):>3} tokens (per-object listing: {count_tokens(naive)})")
+
+    print(f"\n   Summary folds: {history.folds}, {builder.stats()}")
+    print("\n--- Last prompt ---")
+    print(prompt)
+    print("\n✅ Prompt builder test complete!")
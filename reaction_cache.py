@@ -0,0 +1,147 @@
+# reaction_cache.py - Reuse screen reactions for scene states Mimi has already reacted to
+from collections import Counter, OrderedDict
+import random
+import threading
+import time
+
+class ReactionCache:
+    """
+    Small pools of LLM reactions keyed by a canonical scene key
+    (caption + sorted class multiset + personality) with TTL / LRU eviction
+
+    Usage:
+        key = cache.scene_key(analysis['caption'], analysis['objects'], 'cheerful')
+        reply = cache.get(key, instead_of_llm=True)
+        if reply is None:
+            reply = generate(...)
+            cache.put(key, reply)
+    """
+
+    def __init__(self, max_keys=256, pool_size=3, ttl=900, reuse_probability=0.7):
+        """
+        Args:
+            max_keys: Scene keys kept (least recently used are dropped)
+            pool_size: Different replies kept per scene - a full pool is always reused
+            ttl: Seconds a cached reply stays valid
+            reuse_probability: Chance to reuse while the pool is still filling up
+                               (the rest of the calls add variety)
+        """
+        self.max_keys = max_keys
+        self.pool_size = pool_size
+        self.ttl = ttl
+        self.reuse_probability = reuse_probability
+
+        self.entries = OrderedDict()  # key -> {'replies': [(reply, created)], 'last': reply}
+        self.lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.saved_calls = 0    # Hits that replaced an LLM call
+        self.generated = 0      # LLM replies added (calls that were made)
+
+    @staticmethod
+    def scene_key(caption, objects, personality=None):
+        """Canonical scene state: same caption + same objects (ignoring positions) = same key"""
+        counts = Counter(obj['class_name'] for obj in objects)
+        classes = ",".join(f"{name}x{n}" for name, n in sorted(counts.items()))
+        key = f"{caption.strip().lower()}|{classes}"
+        if personality:
+            key += f"|{personality}"
+        return key
+
+    def _live_replies(self, entry, now):
+        entry['replies'] = [(reply, created) for reply, created in entry['replies'] if now - created < self.ttl]
+        return entry['replies']
+
+    def get(self, key, instead_of_llm=False):
+        """
+        A cached reply for this scene (varied, never the same twice in a row if possible) or None
+
+        Args:
+            instead_of_llm: The reaction would otherwise be generated by the LLM
+                            (a hit counts as a saved call)
+        """
+        now = time.time()
+        with self.lock:
+            self.lookups += 1
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            replies = self._live_replies(entry, now)
+            if not replies:
+                del self.entries[key]
+                return None
+
+            self.entries.move_to_end(key)
+            pool_full = len(replies) >= self.pool_size
+            if not pool_full and random.random() >= self.reuse_probability:
+                return None
+
+            choices = [reply for reply, _ in replies if reply != entry['last']] or [reply for reply, _ in replies]
+            reply = random.choice(choices)
+            entry['last'] = reply
+            self.hits += 1
+            self.saved_calls += instead_of_llm
+            return reply
+
+    def put(self, key, reply):
+        """Add a freshly generated reply to the scene's pool"""
+        if not reply or not reply.strip():
+            return
+        now = time.time()
+        with self.lock:
+            self.generated += 1
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = {'replies': [], 'last': None}
+            self.entries.move_to_end(key)
+
+            replies = self._live_replies(entry, now)
+            if reply not in [r for r, _ in replies]:
+                replies.append((reply, now))
+                del replies[:-self.pool_size]
+            entry['last'] = reply
+
+            while len(self.entries) > self.max_keys:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'keys': len(self.entries),
+                'lookups': self.lookups,
+                'hits': self.hits,
+                'saved_calls': self.saved_calls,
+                'generated': self.generated,
+                'saved': round(self.saved_calls / (self.saved_calls + self.generated), 3)
+                         if self.saved_calls + self.generated else 0.0,
+            }
+
+    def report(self):
+        s = self.stats()
+        return (f"♻️  Reaction cache: {s['hits']}/{s['lookups']} reactions reused, "
+                f"{s['saved_calls']} LLM calls avoided ({s['saved']:.0%} of LLM reactions), {s['keys']} scenes")
+
+
+# Test the cache with a repeating desktop
+if __name__ == "__main__":
+    print("♻️  Testing reaction cache...\n")
+
+    cache = ReactionCache(pool_size=3)
+    desktop = ReactionCache.scene_key("A desktop with icons", [], "cheerful")
+    chat = ReactionCache.scene_key("a chat app", [{'class_name': 'button'}, {'class_name': 'textbox'}], "cheerful")
+
+    llm_calls = 0
+    for i in range(40):
+        key = desktop if i % 4 else chat
+        reply = cache.get(key, instead_of_llm=True)
+        if reply is None:
+            llm_calls += 1
+            reply = f"reaction #{llm_calls}"
+            cache.put(key, reply)
+        if i < 8:
+            print(f"   {key[:30]:<30} → {reply}")
+
+    print(f"\n   LLM calls: {llm_calls} / 40")
+    print(f"   {cache.report()}")
+    print("\n✅ Reaction cache test complete!")
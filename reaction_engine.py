@@ -0,0 +1,261 @@
+# reaction_engine.py - Instant template reactions for common screen changes, the LLM only for novel ones
+from collections import Counter, deque
+import random
+import threading
+import time
+from pipeline_metrics import metrics
+
+# (rule name, event type, keyword, templates)
+# Event types: 'added' / 'removed' match detected class names, 'scene' matches the new caption.
+# The first matching rule wins (notifications, then scene switches, then single objects).
+# {object} is replaced by the matched class name or caption.
+DEFAULT_RULES = [
+    ('notification', 'added', 'notification', [
+        "Ooh, a notification popped up, Master! Want me to check it? ♡",
+        "Ding ding~! Something new just arrived!",
+        "A notification! Is someone looking for you, Master? ✨",
+    ]),
+    ('whatsapp', 'scene', 'whatsapp', [
+        "WhatsApp time! Who are we chatting with, Master? ♡",
+        "Ooh, chatting~! Say hi from me! (◕‿◕✿)",
+        "Master is talking to someone! I'm curious~",
+    ]),
+    ('video', 'scene', 'video player', [
+        "Yay, video time! What are we watching? ✨",
+        "Ooh, a video! Can I watch too, Master? ♡",
+        "Movie night? Let me get the snacks~!",
+    ]),
+    ('browser', 'scene', 'web browser', [
+        "Browsing the web~ What are we looking for, Master?",
+        "Ooh, the internet! Need me to search for something?",
+    ]),
+    ('explorer', 'scene', 'file explorer', [
+        "Looking through your files? Don't lose anything, Master~",
+        "Ooh, folders! Are we getting organized? ✨",
+    ]),
+    ('code', 'scene', 'code editor', [
+        "Coding time! You've got this, Master! 💪",
+        "Ooh, code! I believe in you, Master~ No bugs today!",
+    ]),
+    ('gaming', 'scene', 'gaming', [
+        "Game time?! Can I cheer for you, Master? ✨",
+        "Ooh, a game! Good luck, Master~!",
+    ]),
+    ('desktop', 'scene', 'desktop', [
+        "Back to the desktop~ What's next, Master?",
+        "All clear! What should we do now? ♡",
+    ]),
+    ('whatsapp_message', 'added', 'whatsapp message', [
+        "New message on WhatsApp! Who is it, Master? ♡",
+        "Ooh, someone's texting you~ Want me to read it?",
+    ]),
+    ('video_added', 'added', 'video', [
+        "Ooh, a video! Are we watching that, Master?",
+        "I see a video~ Press play, press play! ✨",
+    ]),
+    ('search', 'added', 'search box', [
+        "A search box! Want me to type something for you?",
+        "Looking for something, Master? I can search~!",
+    ]),
+    ('notification_gone', 'removed', 'notification', [
+        "The notification is gone~ All taken care of!",
+    ]),
+]
+
+
+class CallBudget:
+    """Sliding one-minute window of LLM calls"""
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self.calls = deque()
+        self.lock = threading.Lock()
+
+    def _expire(self, now):
+        while self.calls and now - self.calls[0] >= 60:
+            self.calls.popleft()
+
+    def try_spend(self):
+        """Use one call if the budget allows - returns True on success"""
+        now = time.time()
+        with self.lock:
+            self._expire(now)
+            if len(self.calls) >= self.per_minute:
+                return False
+            self.calls.append(now)
+            return True
+
+    def remaining(self):
+        with self.lock:
+            self._expire(time.time())
+            return max(0, self.per_minute - len(self.calls))
+
+
+class ReactionEngine:
+    """
+    Decides how to react to a screen change:
+    - a scene state reacted to before reuses a cached reaction (no LLM call, no budget)
+    - a novel state (never or rarely seen classes / scenes) goes to the LLM while the budget allows
+    - a familiar state that matches a rule gets an instant template line
+    - anything else is skipped (nothing worth saying)
+
+    Usage:
+        decision = engine.react(event['appeared'], event['disappeared'], analysis['caption'])
+        if decision['source'] in ('template', 'cache'):
+            speak(decision['text'])
+        elif decision['source'] == 'llm':
+            speak(generate(...))
+    """
+
+    def __init__(self, rules=None, llm_per_minute=4, novelty_threshold=0.6):
+        """
+        Args:
+            rules: (name, event type, keyword, templates) tuples - see DEFAULT_RULES
+            llm_per_minute: Maximum LLM reactions per minute
+            novelty_threshold: Novelty score (0-1) a change needs to escalate to the LLM
+        """
+        self.rules = DEFAULT_RULES if rules is None else rules
+        self.budget = CallBudget(llm_per_minute)
+        self.novelty_threshold = novelty_threshold
+
+        self.lock = threading.Lock()
+        self.seen_classes = Counter()   # How often each class appeared / disappeared
+        self.seen_scenes = Counter()    # How often each caption was switched to
+        self.scene = None
+        self.last_text = {}             # rule name -> last template used
+        self.counts = {'template': 0, 'llm': 0, 'cache': 0, 'skipped': 0, 'over_budget': 0}
+
+    def novelty(self, appeared, disappeared, scene=None):
+        """
+        How unfamiliar a change is: 1.0 = never seen, 0.5 = seen once, ...
+        (the most unfamiliar part of the change decides)
+        """
+        scores = [1.0 / (1 + self.seen_classes[name]) for name in set(appeared) | set(disappeared)]
+        if scene is not None:
+            scores.append(1.0 / (1 + self.seen_scenes[scene]))
+        return max(scores) if scores else 0.0
+
+    def match(self, appeared, disappeared, scene=None):
+        """First rule matching the change - (rule name, template, matched text) or None"""
+        for name, kind, keyword, templates in self.rules:
+            if kind == 'scene':
+                candidates = [scene] if scene is not None else []
+            else:
+                candidates = appeared if kind == 'added' else disappeared
+            for text in candidates:
+                if keyword in text.lower():
+                    return name, templates, text
+        return None
+
+    def _pick(self, rule_name, templates, matched):
+        """Template of a rule (not the same one twice in a row)"""
+        choices = [t for t in templates if t != self.last_text.get(rule_name)] or templates
+        text = random.choice(choices)
+        self.last_text[rule_name] = text
+        return text.format(object=matched)
+
+    def react(self, appeared, disappeared, caption=None, lookup=None):
+        """
+        Decide the reaction to one change
+
+        Args:
+            appeared, disappeared: Class names (ChangeMailbox event)
+            caption: Caption of the new frame (a different caption than last time = scene switch)
+            lookup: Optional callable(instead_of_llm) -> earlier reaction to this scene state or None
+                    (e.g. ReactionCache.get) - tried first, before the LLM, budget and templates;
+                    instead_of_llm is True when the change would otherwise go to the LLM
+
+        Returns:
+            dict with 'source' ('template' / 'cache' / 'llm' / None = skip), 'text' (template or cached line),
+            'rule' and 'novelty'
+        """
+        with self.lock:
+            scene = caption if caption is not None and caption != self.scene else None
+            if caption is not None:
+                self.scene = caption
+
+            novelty = self.novelty(appeared, disappeared, scene)
+            rule = self.match(appeared, disappeared, scene)
+
+            # Remember what was seen (so it is less novel next time)
+            self.seen_classes.update(set(appeared) | set(disappeared))
+            if scene is not None:
+                self.seen_scenes[scene] += 1
+
+            decision = {'source': None, 'text': None, 'rule': rule[0] if rule else None,
+                        'novelty': round(novelty, 2)}
+
+            # A scene state reacted to before - whether it is novel or not
+            escalate = novelty >= self.novelty_threshold
+            cached = lookup(escalate and self.budget.remaining() > 0) if lookup else None
+            if cached:
+                decision['source'] = 'cache'
+                decision['text'] = cached
+
+            # Only novel states escalate to the LLM (within the per-minute budget)
+            elif escalate:
+                if self.budget.try_spend():
+                    decision['source'] = 'llm'
+                else:
+                    self.counts['over_budget'] += 1
+                    metrics.count('reaction_over_budget')
+
+            if decision['source'] is None and rule:
+                decision['source'] = 'template'
+                decision['text'] = self._pick(*rule)
+
+            self.counts[decision['source'] or 'skipped'] += 1
+            metrics.count(f"reaction_{decision['source'] or 'skipped'}")
+            return decision
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts, llm_budget_left=self.budget.remaining())
+
+    def report(self):
+        s = self.stats()
+        total = s['template'] + s['llm'] + s['cache'] + s['skipped']
+        return (f"⚡ Reactions: {s['template']} template, {s['llm']} LLM, {s['cache']} cached, {s['skipped']} skipped "
+                f"of {total} ({s['over_budget']} over budget, {s['llm_budget_left']} LLM calls left this minute)")
+
+
+# Test with a simulated session
+if __name__ == "__main__":
+    print("⚡ Testing reaction engine...\n")
+
+    engine = ReactionEngine(llm_per_minute=3)
+    cache = {"a screenshot of a video player": "Video again? Yay~! ♡"}
+    session = [
+        (['WhatsApp person', 'WhatsApp Message box'], [], "a screenshot of a WhatsApp chat conversation"),
+        (['Notification'], [], "a screenshot of a WhatsApp chat conversation"),
+        ([], ['Notification'], "a screenshot of a WhatsApp chat conversation"),
+        (['Video'], ['WhatsApp person', 'WhatsApp Message box'], "a screenshot of a video player"),
+        (['WhatsApp person', 'WhatsApp Message box'], ['Video'], "a screenshot of a WhatsApp chat conversation"),
+        (['Notification'], [], "a screenshot of a WhatsApp chat conversation"),
+        (['Video'], ['WhatsApp person', 'WhatsApp Message box'], "a screenshot of a video player"),
+        (['Disk Driver'], ['Video'], "a screenshot of a file explorer with folders and files"),
+        (['Notification'], [], "a screenshot of a file explorer with folders and files"),
+        (['Image'], [], "a screenshot of a file explorer with folders and files"),
+    ]
+
+    for appeared, disappeared, caption in session:
+        start = time.perf_counter()
+        decision = engine.react(appeared, disappeared, caption, lookup=lambda instead_of_llm: cache.get(caption))
+        ms = (time.perf_counter() - start) * 1000
+        text = decision['text'] or ''
+        print(f"   novelty {decision['novelty']:.2f} → {str(decision['source']):<8} ({ms:.2f}ms) {text}")
+
+    print(f"\n   {engine.report()}")
+
+    # Recurring scenes: LLM replies are cached per caption and reused on later visits
+    engine = ReactionEngine(llm_per_minute=4)
+    cache = {}
+    scenes = [(['Icon'], "a desktop with icons"), (['Video'], "a screenshot of a video player"),
+              (['Button', 'Text'], "a screenshot of a web browser"), (['Folder'], "a file explorer")]
+    for i in range(200):
+        appeared, caption = scenes[i % len(scenes)] if i % 7 else scenes[(i // 7) % len(scenes)]
+        decision = engine.react(appeared, [], caption, lookup=lambda instead_of_llm: cache.get(caption))
+        if decision['source'] == 'llm':
+            cache[caption] = f"LLM reaction to {caption}"
+    print(f"   200 changes over {len(scenes)} recurring scenes: {engine.report()}")
+    print("\n✅ Reaction engine test complete!")
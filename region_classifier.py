@@ -0,0 +1,218 @@
+# region_classifier.py
+from lazy_imports import lazy_import
+from PIL import Image
+import numpy as np
+import hashlib
+from collections import OrderedDict
+
+# Heavy - imported on first use
+torch = lazy_import('torch')
+
+class RegionClassifier:
+    """
+    Classify cropped screen regions against an open vocabulary with CLIP
+    All uncached crops of a frame go through ONE batched forward pass,
+    crops whose pixels did not change are served from a cache
+    """
+
+    DEFAULT_LABELS = [
+        "a button",
+        "an icon",
+        "a text input field",
+        "a search bar",
+        "a photo or image",
+        "a video thumbnail",
+        "a chat message bubble",
+        "a profile picture",
+        "a menu or dropdown",
+        "a browser tab",
+        "a close or minimize button",
+        "a notification popup",
+        "a dialog box",
+        "a checkbox or toggle switch",
+        "a toolbar",
+        "a block of text",
+        "a link",
+        "a folder icon",
+    ]
+
+    def __init__(self, captioner, labels=None, top_k=5, grid=None,
+                 cache_size=256, min_size=8):
+        """
+        Args:
+            captioner: CLIPScreenCaptioner whose model is reused
+            labels: Open vocabulary to classify crops against
+            top_k: Classify the K most confident detections
+            grid: (cols, rows) coarse grid used when nothing is detected
+            cache_size: Max number of cached crop results
+            min_size: Crops smaller than this (pixels) are skipped
+        """
+        self.captioner = captioner
+        self.model = captioner.model
+        self.preprocess = captioner.preprocess
+        self.device = captioner.device
+
+        self.labels = list(labels) if labels else list(self.DEFAULT_LABELS)
+        self.top_k = top_k
+        self.grid = grid
+        self.min_size = min_size
+
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # Precompute vocabulary embeddings once
+        prompts = [f"{label} on a computer screen" for label in self.labels]
+        self.text_features = captioner._encode_texts(prompts)
+
+        print(f"✅ Region classifier ready ({len(self.labels)} labels)")
+
+    def select_regions(self, frame, objects):
+        """
+        Pick regions to classify
+
+        Returns: list of {'bbox', 'source', 'class_name'}
+        """
+        regions = []
+
+        if objects:
+            ranked = sorted(objects, key=lambda o: o['confidence'], reverse=True)
+            for obj in ranked[:self.top_k]:
+                regions.append({
+                    'bbox': obj['bbox'],
+                    'source': 'detection',
+                    'class_name': obj['class_name']
+                })
+        elif self.grid:
+            h, w = frame.shape[:2]
+            cols, rows = self.grid
+            cell_w, cell_h = w // cols, h // rows
+            for row in range(rows):
+                for col in range(cols):
+                    regions.append({
+                        'bbox': [col * cell_w, row * cell_h, (col + 1) * cell_w, (row + 1) * cell_h],
+                        'source': 'grid',
+                        'class_name': None
+                    })
+
+        return regions
+
+    def _crop_key(self, crop):
+        """Content hash of a crop (subsampled for speed)"""
+        digest = hashlib.blake2b(crop[::4, ::4].tobytes(), digest_size=16)
+        digest.update(str(crop.shape).encode())
+        return digest.hexdigest()
+
+    def _cache_get(self, key):
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.cache_hits += 1
+            return self.cache[key]
+        self.cache_misses += 1
+        return None
+
+    def _cache_put(self, key, value):
+        self.cache[key] = value
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def classify(self, frame, objects):
+        """
+        Classify the top-K detected boxes (or grid cells) of a frame
+
+        Args:
+            frame: numpy array (H, W, 3) RGB image
+            objects: detections from ScreenElementDetector
+
+        Returns:
+            list of {'bbox', 'label', 'confidence', 'source', 'class_name', 'cached'}
+        """
+        h, w = frame.shape[:2]
+        results = []
+        pending = []  # (result index, cache key, crop)
+
+        for region in self.select_regions(frame, objects):
+            x1, y1, x2, y2 = region['bbox']
+            x1, y1 = max(0, x1), max(0, y1)
+            x2, y2 = min(w, x2), min(h, y2)
+
+            if x2 - x1 < self.min_size or y2 - y1 < self.min_size:
+                continue
+
+            crop = np.ascontiguousarray(frame[y1:y2, x1:x2])
+            key = self._crop_key(crop)
+
+            result = dict(region, label=None, confidence=0.0, cached=False)
+            cached = self._cache_get(key)
+
+            if cached is not None:
+                result['label'], result['confidence'] = cached
+                result['cached'] = True
+            else:
+                pending.append((len(results), key, crop))
+
+            results.append(result)
+
+        if pending:
+            # One batched forward pass for every uncached crop
+            batch = torch.stack([
+                self.preprocess(Image.fromarray(crop)) for _, _, crop in pending
+            ]).to(self.device)
+
+            with torch.no_grad():
+                image_features = self.model.encode_image(batch)
+                image_features /= image_features.norm(dim=-1, keepdim=True)
+                similarity = (100.0 * image_features @ self.text_features.T).softmax(dim=-1)
+                confidences, indices = similarity.max(dim=-1)
+
+            # Single device->host transfer for the whole batch
+            confidences = confidences.cpu().tolist()
+            indices = indices.cpu().tolist()
+
+            for (i, key, _), index, conf in zip(pending, indices, confidences):
+                value = (self.labels[index], round(conf, 3))
+                self._cache_put(key, value)
+                results[i]['label'], results[i]['confidence'] = value
+
+        return results
+
+    def cache_stats(self):
+        """Cache hit statistics"""
+        total = self.cache_hits + self.cache_misses
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'hit_rate': round(self.cache_hits / total, 3) if total else 0.0,
+            'size': len(self.cache)
+        }
+
+
+# Test region classification
+if __name__ == "__main__":
+    from screen_capture import ScreenCapture
+    from clip_captioner import CLIPScreenCaptioner
+    from yolo_detector import ScreenElementDetector
+    import time
+
+    print("🔎 Testing region classification...\n")
+
+    captioner = CLIPScreenCaptioner(device='cuda')
+    detector = ScreenElementDetector(confidence=0.4)
+    classifier = RegionClassifier(captioner, top_k=5, grid=(3, 3))
+    capture = ScreenCapture(target_fps=5, resize=(640, 640))
+
+    for frame in capture.capture_stream(duration=10):
+        start = time.time()
+        objects = detector.detect(frame)
+        regions = classifier.classify(frame, objects)
+        elapsed = time.time() - start
+
+        print(f"⏱️  {elapsed*1000:.0f}ms | {len(regions)} regions | cache: {classifier.cache_stats()}")
+        for region in regions:
+            tag = " (cached)" if region['cached'] else ""
+            print(f"   {region['bbox']} → {region['label']} ({region['confidence']:.1%}){tag}")
+        print("-" * 70)
+
+    print("\n✅ Region classification test complete!")
@@ -3,7 +3,7 @@ import mss
 import numpy as np
 from PIL import Image
 import time
-import cv2
+from pipeline_metrics import metrics
 
 class ScreenCapture:
     def __init__(self, target_fps=10, resize=(640, 640)):
@@ -20,17 +20,19 @@ class ScreenCapture:
         """Capture a single frame and return as numpy array (640x640)"""
         monitor = self.get_primary_monitor()
         
-        # Capture screenshot
-        screenshot = self.sct.grab(monitor)
+        with metrics.timer('capture'):
+            # Capture screenshot
+            screenshot = self.sct.grab(monitor)
+            
+            # Convert to PIL Image
+            img = Image.frombytes("RGB", screenshot.size, screenshot.rgb)
         
-        # Convert to PIL Image
-        img = Image.frombytes("RGB", screenshot.size, screenshot.rgb)
-        
-        # Resize to 640x640
-        img_resized = img.resize(self.resize, Image.Resampling.LANCZOS)
-        
-        # Convert to numpy array for processing
-        frame = np.array(img_resized)
+        with metrics.timer('resize'):
+            # Resize to 640x640
+            img_resized = img.resize(self.resize, Image.Resampling.LANCZOS)
+            
+            # Convert to numpy array for processing
+            frame = np.array(img_resized)
         
         return frame
     
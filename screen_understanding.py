@@ -1,6 +1,8 @@
 # screen_understanding.py
 from yolo_detector import ScreenElementDetector
 from clip_captioner import CLIPScreenCaptioner
+from pipeline_metrics import metrics
+from pipeline_trace import tracer
 import time
 
 class ScreenUnderstanding:
@@ -12,14 +14,36 @@ class ScreenUnderstanding:
     def __init__(self, 
                  yolo_path='runs/train/screen_detector_v13/weights/best.pt',
                  yolo_conf=0.4,
-                 device='cuda'):
-        """Initialize both models"""
+                 device='cuda',
+                 classify_regions=False,
+                 region_labels=None,
+                 region_top_k=5,
+                 region_grid=None):
+        """
+        Initialize both models
+        
+        Args:
+            classify_regions: Also classify detected crops with CLIP (open vocabulary)
+            region_labels: Vocabulary for region classification (None = defaults)
+            region_top_k: Number of detected boxes to classify per frame
+            region_grid: (cols, rows) grid classified when nothing is detected
+        """
         print("🚀 Initializing Screen Understanding System...\n")
         
         # Load models
         self.detector = ScreenElementDetector(yolo_path, yolo_conf)
         self.captioner = CLIPScreenCaptioner(device=device)
         
+        self.region_classifier = None
+        if classify_regions:
+            from region_classifier import RegionClassifier
+            self.region_classifier = RegionClassifier(
+                self.captioner,
+                labels=region_labels,
+                top_k=region_top_k,
+                grid=region_grid
+            )
+        
         print("✅ Screen Understanding ready!\n")
     
     def analyze_screen(self, frame):
@@ -35,22 +59,37 @@ class ScreenUnderstanding:
                 'scene_confidence': float,
                 'objects': list of detections,
                 'clickable_objects': list,
+                'regions': list (open-vocabulary crop labels, if enabled),
                 'summary': str (formatted for LLM)
             }
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         
-        # Get caption
-        caption_result = self.captioner.caption_frame(frame, top_k=1)
+        # Get caption (fast path: argmax + confidence only)
+        with metrics.timer('clip'):
+            index, confidence = self.captioner.caption_index(frame)
+        caption_result = {
+            'primary': self.captioner.scene_templates[index],
+            'confidence': round(confidence, 3)
+        }
         
         # Get objects
-        objects = self.detector.detect(frame)
-        clickable = self.detector.get_clickable_objects(objects)
+        with metrics.timer('yolo'):
+            objects = self.detector.detect(frame)
+            clickable = self.detector.get_clickable_objects(objects)
+        
+        # Classify crops against open vocabulary
+        regions = []
+        if self.region_classifier:
+            with metrics.timer('clip_regions'):
+                regions = self.region_classifier.classify(frame, objects)
         
         # Create summary for LLM
-        summary = self._format_for_llm(caption_result, objects, clickable)
+        with metrics.timer('summary'):
+            summary = self._format_for_llm(caption_result, objects, clickable, regions)
         
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
+        tracer.complete('analyze_screen', start_time, elapsed)
         
         return {
             'caption': caption_result['primary'],
@@ -59,11 +98,12 @@ class ScreenUnderstanding:
             'clickable_objects': clickable,
             'object_count': len(objects),
             'clickable_count': len(clickable),
+            'regions': regions,
             'summary': summary,
             'processing_time': round(elapsed, 3)
         }
     
-    def _format_for_llm(self, caption_result, objects, clickable):
+    def _format_for_llm(self, caption_result, objects, clickable, regions=None):
         """Format analysis as text for LLM"""
         summary = f"""SCREEN ANALYSIS:
 
@@ -86,6 +126,13 @@ Detected Objects ({len(objects)}):"""
         else:
             summary += "\n  (none)"
         
+        if regions:
+            summary += f"\n\nRegion Labels ({len(regions)}):"
+            for i, region in enumerate(regions, 1):
+                x1, y1, x2, y2 = region['bbox']
+                center = [(x1 + x2) // 2, (y1 + y2) // 2]
+                summary += f"\n  {i}. {region['label']} at position {center} (confidence: {region['confidence']})"
+        
         return summary
 
 
@@ -0,0 +1,89 @@
+# speech_pipeline.py - Speak the first sentence while the LLM is still generating the rest
+from vtuber_ai_ollama import iter_sentences
+from pipeline_metrics import metrics
+from voice_controller import USER_REPLY
+import time
+
+class SpeechPipeline:
+    """
+    Overlaps LLM generation and speech:
+    tokens → sentences → voice, each sentence is spoken as soon as it is complete
+    """
+
+    def __init__(self, voice):
+        """
+        Args:
+            voice: VoiceController used to speak each sentence
+        """
+        self.voice = voice
+
+    def speak_stream(self, tokens, on_token=None, on_sentence=None, strip_prefix=None, wait=True,
+                     priority=USER_REPLY, interrupt=False):
+        """
+        Speak a token stream sentence by sentence
+
+        Args:
+            tokens: Iterable of text pieces (e.g. VTuberAI.generate_stream)
+            on_token: Optional callback(str) for every token (live display)
+            on_sentence: Optional callback(str) for every sentence handed to the voice
+            strip_prefix: Remove this from the start of the reply (e.g. "Mimi:")
+            wait: Block until the last sentence finished speaking
+            priority: Speech priority of every sentence (see voice_controller)
+            interrupt: First sentence barges in over less important speech
+
+        Returns:
+            str: Full generated text
+        """
+        start = time.perf_counter()
+        pieces = []
+
+        def tap():
+            for token in tokens:
+                pieces.append(token)
+                if on_token:
+                    on_token(token)
+                yield token
+
+        last_handle = None
+        first = True
+        for sentence in iter_sentences(tap()):
+            if first:
+                first = False
+                if strip_prefix and sentence.startswith(strip_prefix):
+                    sentence = sentence[len(strip_prefix):].strip()
+                metrics.record('speech_first_sentence', time.perf_counter() - start)
+
+            if not sentence:
+                continue
+            if on_sentence:
+                on_sentence(sentence)
+            # Voice queue is FIFO - each sentence starts right after the previous one
+            last_handle = self.voice.speak(sentence, priority=priority, interrupt=interrupt)
+            interrupt = False
+
+        if wait and last_handle is not None:
+            last_handle.wait()
+
+        text = "".join(pieces).strip()
+        if strip_prefix and text.startswith(strip_prefix):
+            text = text[len(strip_prefix):].strip()
+        return text
+
+
+# Test the pipeline (no LLM needed)
+if __name__ == "__main__":
+    from voice_controller import VoiceController
+
+    def fake_tokens():
+        text = "Ooh, a WhatsApp chat! Who are you talking to, Master? I can help you type~ ♡"
+        for word in text.split(" "):
+            time.sleep(0.15)  # pretend to be a slow LLM
+            yield word + " "
+
+    print("🔊 Testing sentence-pipelined speech...\n")
+
+    pipeline = SpeechPipeline(VoiceController(rate=170, volume=0.9))
+    reply = pipeline.speak_stream(fake_tokens(), on_sentence=lambda s: print(f"   → speaking: {s}"))
+
+    print(f"\n💬 Full reply: {reply}")
+    print("\n✅ Speech pipeline test complete!")
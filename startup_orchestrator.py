@@ -0,0 +1,149 @@
+# startup_orchestrator.py
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+class StartupOrchestrator:
+    """
+    Loads heavy components (YOLO + CLIP, Ollama check, voice) in parallel
+    UI and greeting can start right away - callers block only on what they need
+    """
+
+    def __init__(self, loaders=None, max_workers=4, verbose=True):
+        """
+        Args:
+            loaders: dict of name -> callable, all started immediately
+            max_workers: Parallel loader threads
+            verbose: Print per-component ready lines and the final timeline
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="startup")
+        self.futures = {}
+        self.timeline = []  # (name, start, end, status) relative to t0
+        self.events = []    # (name, time) milestones like 'ui_shown'
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.t0 = time.perf_counter()
+        self._reported = False
+
+        # Submit under the lock so the timeline is not reported before all are queued
+        with self.lock:
+            for name, loader in (loaders or {}).items():
+                self._submit(name, loader)
+
+    def _elapsed(self):
+        return time.perf_counter() - self.t0
+
+    def add(self, name, loader):
+        """
+        Start loading a component in the background
+
+        Args:
+            name: Component name ('understanding', 'vtuber', ...)
+            loader: Callable returning the component
+        """
+        with self.lock:
+            return self._submit(name, loader)
+
+    def _submit(self, name, loader):
+        def run():
+            start = self._elapsed()
+            status = 'ok'
+            try:
+                return loader()
+            except Exception as e:
+                status = f'error: {e}'
+                print(f"❌ [Startup] {name} failed: {e}")
+                raise
+            finally:
+                end = self._elapsed()
+                with self.lock:
+                    self.timeline.append((name, start, end, status))
+                if self.verbose and status == 'ok':
+                    print(f"⚡ [Startup] {name} ready in {end - start:.2f}s (t={end:.2f}s)")
+                self._maybe_report()
+
+        self.futures[name] = self.executor.submit(run)
+        return self.futures[name]
+
+    def get(self, name, timeout=None):
+        """Get a component, waiting until it is loaded"""
+        return self.futures[name].result(timeout=timeout)
+
+    def is_ready(self, name):
+        future = self.futures.get(name)
+        return future is not None and future.done() and future.exception() is None
+
+    def error(self, name):
+        """The exception a component failed to load with (None while loading or when loaded)"""
+        future = self.futures.get(name)
+        if future is None or not future.done():
+            return None
+        return future.exception()
+
+    def when_ready(self, name, callback):
+        """
+        Run callback(component) once the component is loaded
+        Runs immediately (in the caller thread) if it is already ready
+        """
+        def done(future):
+            if future.exception() is None:
+                callback(future.result())
+
+        self.futures[name].add_done_callback(done)
+
+    def wait_all(self, timeout=None):
+        """Block until every component finished loading"""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        for future in list(self.futures.values()):
+            remaining = None if deadline is None else max(0, deadline - time.perf_counter())
+            future.result(timeout=remaining)
+
+    def mark(self, name):
+        """Record a milestone (e.g. 'ui_shown', 'greeting', 'first_analysis')"""
+        with self.lock:
+            if not any(event == name for event, _ in self.events):
+                self.events.append((name, self._elapsed()))
+
+    def _maybe_report(self):
+        """Print the timeline once after everything finished"""
+        with self.lock:
+            if self._reported or len(self.timeline) < len(self.futures):
+                return
+            self._reported = True
+
+        if self.verbose:
+            print(self.report())
+
+    def report(self):
+        """Per-component startup timeline as text"""
+        with self.lock:
+            timeline = sorted(self.timeline, key=lambda item: item[1])
+            events = sorted(self.events, key=lambda item: item[1])
+
+        lines = ["⏱️  STARTUP TIMELINE:"]
+        for name, time_point in events:
+            lines.append(f"   {name:<18} @ {time_point:6.2f}s")
+        for name, start, end, status in timeline:
+            lines.append(f"   {name:<18} {start:6.2f}s → {end:6.2f}s ({end - start:.2f}s) {status}")
+
+        return "\n".join(lines)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+
+# Test the orchestrator
+if __name__ == "__main__":
+    print("🚀 Testing parallel startup...\n")
+
+    startup = StartupOrchestrator({
+        'slow_model': lambda: time.sleep(1.0) or "model",
+        'fast_check': lambda: time.sleep(0.2) or "check",
+    })
+    startup.mark('ui_shown')
+
+    startup.when_ready('fast_check', lambda c: print(f"   callback got: {c}"))
+    print(f"   slow_model → {startup.get('slow_model')}")
+    startup.wait_all()
+
+    print("\n✅ Startup test complete!")
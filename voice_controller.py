@@ -1,110 +1,475 @@
-# voice_controller.py - AGGRESSIVE FIX
+# voice_controller.py - Persistent TTS engine worker with a priority speech queue
 import pyttsx3
+import itertools
+import os
 import threading
 import time
+from queue import PriorityQueue, Queue, Empty
+from pipeline_metrics import metrics
+from pipeline_trace import tracer
+
+# Speech priorities (lower = more important)
+USER_REPLY = 0
+SCREEN_REACTION = 1
+RANDOM_COMMENT = 2
+
+# Seconds a line may wait in the queue before it is no longer worth saying
+DEFAULT_MAX_AGE = {
+    USER_REPLY: None,
+    SCREEN_REACTION: 8.0,
+    RANDOM_COMMENT: 20.0,
+}
+
+class SpeechHandle:
+    """
+    Completion handle for one queued utterance
+    wait() blocks exactly until it finished (or was dropped), callbacks run on completion
+    """
+    
+    def __init__(self, text, priority=USER_REPLY, expires_at=None):
+        self.text = text
+        self.priority = priority
+        self.expires_at = expires_at  # perf_counter deadline for starting (None = never expires)
+        self.cancelled = False
+        self.interrupted = False  # Cut off mid-sentence by a more important line
+        self._counted = False  # Already subtracted from the controller's pending count
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+    
+    def done(self):
+        return self._event.is_set()
+    
+    def wait(self, timeout=None):
+        """Block until the utterance finished - returns False on timeout"""
+        return self._event.wait(timeout)
+    
+    def add_done_callback(self, callback):
+        """Run callback(handle) when finished (immediately if already finished)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+    
+    def _finish(self, cancelled=False):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.cancelled = cancelled
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"⚠️  Speech callback error: {e}")
+
 
 class VoiceController:
-    """Voice controller with aggressive engine reset"""
+    """
+    Voice controller with ONE long-lived TTS engine owned by a worker thread
+    Utterances are queued by priority; stale lines expire, important lines can barge in
+    The engine is only recreated when it fails or wedges
+    """
     
-    def __init__(self, voice_id=None, rate=160, volume=1.0):
-        print("🔊 Initializing Voice Controller (Aggressive Mode)...")
+    def __init__(self, voice_id=None, rate=160, volume=1.0, watchdog_timeout=15.0, phrase_cache=None):
+        """
+        Args:
+            voice_id: Index into the installed voices (None = prefer a female voice)
+            rate: Words per minute
+            volume: 0.0 - 1.0
+            watchdog_timeout: Extra seconds an utterance may take before the engine is considered wedged
+            phrase_cache: Optional PhraseAudioCache - fixed lines are played from pre-rendered WAVs
+        """
+        print("🔊 Initializing Voice Controller (persistent engine)...")
         
         self.voice_id = voice_id
         self.rate = rate
         self.volume = volume
+        self.watchdog_timeout = watchdog_timeout
         self.is_speaking = False
-        self.speech_lock = threading.Lock()
+        
+        self.queue = PriorityQueue()  # (priority, seq, item)
+        self.sequence = itertools.count()  # FIFO within one priority
+        self.render_queue = Queue()  # Phrases rendered while idle
+        self.phrase_cache = phrase_cache
+        self.engine = None
+        self.voice_ref = None    # Resolved voice id (looked up once)
+        self.current = None      # Utterance being spoken
+        self.generation = 0      # Bumped when a wedged worker is abandoned
+        self.restarts = 0
+        self.running = True
+        self.pending = 0         # Queued + speaking utterances
+        self.state_lock = threading.Lock()
+        self.idle = threading.Condition(self.state_lock)
+        self.counts = {'spoken': 0, 'dropped': 0, 'expired': 0, 'interrupted': 0}
+        
+        self._start_worker()
+        self.watchdog = threading.Thread(target=self._watchdog_loop, daemon=True, name="tts_watchdog")
+        self.watchdog.start()
         
         print(f"   Speed: {rate} WPM")
         print(f"   Volume: {volume * 100:.0f}%")
         print("✅ Voice ready!\n")
     
-    def speak(self, text, block=False):
-        """Speak with completely fresh engine"""
+    def speak(self, text, block=False, on_done=None, priority=USER_REPLY, max_age='default', interrupt=False):
+        """
+        Queue text for the speech worker
+        
+        Args:
+            block: Wait until this utterance was spoken
+            on_done: Optional callback(handle) run when it finished
+            priority: USER_REPLY, SCREEN_REACTION or RANDOM_COMMENT
+            max_age: Drop the line if it could not start within this many seconds
+                     ('default' = per-priority default, None = never)
+            interrupt: Barge in - cut off and drop anything less important
+            
+        Returns:
+            SpeechHandle
+        """
+        if max_age == 'default':
+            max_age = DEFAULT_MAX_AGE.get(priority)
+        requested_at = time.perf_counter()
+        expires_at = requested_at + max_age if max_age is not None else None
+        
+        handle = SpeechHandle(text, priority=priority, expires_at=expires_at)
+        if on_done:
+            handle.add_done_callback(on_done)
+        
         if not text or len(text.strip()) == 0:
-            return
+            handle._finish()
+            return handle
         
         # Clean text
         clean_text = self._clean_text(text)
         
+        # Pre-rendered audio for known lines
+        wav = None
+        if self.phrase_cache and self.phrase_cache.can_play():
+            key = self._phrase_key(clean_text)
+            wav = self.phrase_cache.get(key) if key else None
+        
+        if interrupt:
+            self.barge_in(priority)
+        
+        with self.state_lock:
+            self.pending += 1
+        self.queue.put((priority, next(self.sequence), (clean_text, requested_at, handle, wav)))
+        
         if block:
-            self._speak_blocking(clean_text)
-        else:
-            thread = threading.Thread(target=self._speak_blocking, args=(clean_text,), daemon=True)
-            thread.start()
-    
-    def _speak_blocking(self, text):
-        """Speak with FRESH engine instance every time"""
-        with self.speech_lock:
-            self.is_speaking = True
-            engine = None
-            
+            handle.wait()
+        
+        return handle
+    
+    def barge_in(self, priority=USER_REPLY):
+        """
+        Make room for a more important line: drop queued lines and cut off
+        the current one if they are less important than priority
+        
+        Returns:
+            int: Number of lines dropped or interrupted
+        """
+        dropped = self._drain(lambda item: item[2].priority > priority)
+        
+        with self.state_lock:
+            current = self.current
+            interrupt = current is not None and current['handle'].priority > priority
+            if interrupt:
+                current['handle'].interrupted = True
+                self.counts['interrupted'] += 1
+        
+        if interrupt:
+            print(f"✋ Interrupting: \"{current['text'][:40]}...\"")
+            metrics.count('speech_interrupted')
+            self._stop_audio()
+        
+        return dropped + int(interrupt)
+    
+    def _drain(self, should_drop):
+        """Remove queued lines matching should_drop(item) - returns how many were dropped"""
+        kept = []
+        dropped = []
+        while True:
+            try:
+                entry = self.queue.get_nowait()
+            except Empty:
+                break
+            if entry[2] is not None and should_drop(entry[2]):
+                dropped.append(entry[2])
+            else:
+                kept.append(entry)
+        
+        for entry in kept:
+            self.queue.put(entry)
+        
+        for item in dropped:
+            self._complete(item[2], cancelled=True)
+        if dropped:
+            with self.state_lock:
+                self.counts['dropped'] += len(dropped)
+            metrics.count('speech_dropped', len(dropped))
+        return len(dropped)
+    
+    def _stop_audio(self):
+        """Stop whatever is playing right now (the worker moves on to the next line)"""
+        engine = self.engine
+        if engine is not None:
             try:
-                print(f"🔊 Creating fresh TTS engine...")
-                
-                # CREATE COMPLETELY NEW ENGINE
-                engine = pyttsx3.init()
-                
-                # Small delay for initialization
-                time.sleep(0.1)
-                
-                # Get voices
-                voices = engine.getProperty('voices')
-                print(f"🔊 Found {len(voices)} voices")
-                
-                # Set voice
-                if self.voice_id is not None and self.voice_id < len(voices):
-                    engine.setProperty('voice', voices[self.voice_id].id)
-                    print(f"🔊 Using voice: {voices[self.voice_id].name}")
-                else:
-                    # Try female voice
-                    for i, voice in enumerate(voices):
-                        if 'female' in voice.name.lower() or 'zira' in voice.name.lower():
-                            engine.setProperty('voice', voice.id)
-                            print(f"🔊 Using voice: {voice.name}")
-                            break
-                
-                # Set rate and volume
-                engine.setProperty('rate', self.rate)
-                engine.setProperty('volume', self.volume)
-                
-                # Small delay after setting properties
-                time.sleep(0.1)
-                
-                print(f"🔊 Speaking: \"{text[:50]}...\"")
-                
-                # Say the text
-                engine.say(text)
-                
-                # CRITICAL: Run and wait
-                engine.runAndWait()
-                
-                # CRITICAL: Stop engine explicitly
                 engine.stop()
-                
-                # CRITICAL: Small delay before cleanup
-                time.sleep(0.2)
-                
-                print(f"✅ Speech finished")
-                
+            except Exception:
+                pass
+        if self.phrase_cache and self.phrase_cache.can_play():
+            self.phrase_cache.stop()
+    
+    def stats(self):
+        """Spoken / dropped / expired / interrupted line counts"""
+        with self.state_lock:
+            return dict(self.counts, queued=self.queue.qsize())
+    
+    def prerender(self, phrases):
+        """Render fixed phrases to the phrase cache in the background (while idle)"""
+        if not self.phrase_cache or not self.phrase_cache.can_play():
+            return
+        
+        for phrase in phrases:
+            clean_text = self._clean_text(phrase)
+            if clean_text.strip():
+                self.render_queue.put(clean_text)
+    
+    def _phrase_key(self, clean_text):
+        """Cache key for the resolved voice - None until the engine looked the voice up"""
+        if self.voice_ref is None:
+            return None
+        return self.phrase_cache.key(clean_text, self.voice_ref, self.rate, self.volume)
+    
+    def wait_until_idle(self, timeout=None):
+        """Block until everything queued has been spoken - returns False on timeout"""
+        with self.idle:
+            return self.idle.wait_for(lambda: self.pending == 0, timeout)
+    
+    def _complete(self, handle, cancelled=False):
+        """Mark an utterance finished and wake idle waiters"""
+        with self.idle:
+            if handle._counted:
+                return
+            handle._counted = True
+            self.pending = max(0, self.pending - 1)
+            if self.pending == 0:
+                self.idle.notify_all()
+        handle._finish(cancelled)
+    
+    # ==================== WORKER ====================
+    
+    def _start_worker(self):
+        """Start a speech worker for the current generation"""
+        self.worker = threading.Thread(target=self._worker_loop, args=(self.generation,),
+                                       daemon=True, name="tts_worker")
+        self.worker.start()
+    
+    def _worker_loop(self, generation):
+        """Owns the engine: takes utterances from the queue and speaks them in order"""
+        engine = None
+        
+        while self.running and generation == self.generation:
+            try:
+                _, _, item = self.queue.get(timeout=0.2 if not self.render_queue.empty() else 1)
+            except Empty:
+                # Idle - use the time to pre-render a cached phrase
+                engine = self._render_next(engine)
+                continue
+            
+            if item is None:
+                break
+            
+            text, requested_at, handle, wav = item
+            failed = False
+            
+            # Too late to still be relevant
+            if handle.expires_at is not None and time.perf_counter() > handle.expires_at:
+                print(f"⌛ Skipping stale line: \"{text[:40]}...\"")
+                with self.state_lock:
+                    self.counts['expired'] += 1
+                metrics.count('speech_expired')
+                self._complete(handle, cancelled=True)
+                continue
+            
+            try:
+                if wav and os.path.exists(wav):
+                    self._play(wav, text, requested_at, handle, generation)
+                    continue
+                if engine is None:
+                    engine = self._create_engine()
+                self._say(engine, text, requested_at, handle, generation)
+            
             except Exception as e:
-                print(f"❌ Speech error: {e}")
-                import traceback
-                traceback.print_exc()
+                # Health check failed - drop the line (it may be half spoken already),
+                # the next one gets a new engine
+                print(f"❌ Speech error: {e} - dropping line, recreating TTS engine")
+                self._discard_engine(engine)
+                engine = None
+                failed = True
             
             finally:
-                # CRITICAL: Clean up engine
-                if engine:
-                    try:
-                        engine.stop()
-                        del engine
-                    except:
-                        pass
+                if generation == self.generation:
+                    with self.state_lock:
+                        self.current = None
+                        self.is_speaking = False
+                        if failed:
+                            self.counts['dropped'] += 1
+                        elif not handle.interrupted:
+                            self.counts['spoken'] += 1
+                self._complete(handle, cancelled=handle.interrupted or failed)
+        
+        if generation == self.generation:
+            self._discard_engine(engine)
+    
+    def _create_engine(self):
+        """Create the engine and apply voice, rate and volume"""
+        print("🔊 Creating TTS engine...")
+        # Not pyttsx3.init(): it hands out the cached engine of the driver, which is
+        # still the wedged one (busy in runAndWait) after a watchdog restart
+        engine = pyttsx3.Engine()
+        
+        # Resolve the voice only once
+        if self.voice_ref is None:
+            self.voice_ref = ''
+            voices = engine.getProperty('voices')
+            print(f"🔊 Found {len(voices)} voices")
+            
+            if self.voice_id is not None and self.voice_id < len(voices):
+                self.voice_ref = voices[self.voice_id].id
+                print(f"🔊 Using voice: {voices[self.voice_id].name}")
+            else:
+                # Try female voice
+                for voice in voices:
+                    if 'female' in voice.name.lower() or 'zira' in voice.name.lower():
+                        self.voice_ref = voice.id
+                        print(f"🔊 Using voice: {voice.name}")
+                        break
+        
+        if self.voice_ref:
+            engine.setProperty('voice', self.voice_ref)
+        engine.setProperty('rate', self.rate)
+        engine.setProperty('volume', self.volume)
+        engine.connect('started-utterance', self._on_started)
+        
+        self.engine = engine
+        return engine
+    
+    def _discard_engine(self, engine):
+        if engine is None:
+            return
+        try:
+            engine.stop()
+        except Exception:
+            pass
+        if self.engine is engine:
+            self.engine = None
+    
+    def _begin(self, text, requested_at, handle, generation):
+        """Mark an utterance as current - False if this worker was abandoned"""
+        started = time.perf_counter()
+        tracer.complete('tts_queue_wait', requested_at, started - requested_at)
+        
+        with self.state_lock:
+            if generation != self.generation:
+                return False
+            self.current = {'text': text, 'requested_at': requested_at, 'started': started, 'handle': handle}
+            self.is_speaking = True
+        return True
+    
+    def _say(self, engine, text, requested_at, handle, generation):
+        """Speak one utterance on the worker's engine"""
+        if not self._begin(text, requested_at, handle, generation):
+            return
+        
+        print(f"🔊 Speaking: \"{text[:50]}...\"")
+        if handle.interrupted:
+            return
+        with metrics.timer('tts'):
+            engine.say(text)
+            engine.runAndWait()
+    
+    def _play(self, wav, text, requested_at, handle, generation):
+        """Play a pre-rendered phrase"""
+        if not self._begin(text, requested_at, handle, generation):
+            return
+        
+        print(f"🔊 Playing cached: \"{text[:50]}...\"")
+        if handle.interrupted:
+            return
+        metrics.record('tts_first_audio', time.perf_counter() - requested_at)
+        with metrics.timer('tts'):
+            self.phrase_cache.play(wav)
+    
+    def _render_next(self, engine):
+        """Render one queued phrase to the cache (returns the possibly recreated engine)"""
+        try:
+            text = self.render_queue.get_nowait()
+        except Empty:
+            return engine
+        
+        try:
+            # The engine resolves the voice the key depends on
+            if engine is None:
+                engine = self._create_engine()
+            key = self._phrase_key(text)
+            if self.phrase_cache.contains(key):
+                return engine
+            
+            # Not *.wav until complete - evict() only looks at finished files
+            path = self.phrase_cache.path_for(key)
+            tmp_path = path + '.tmp'
+            engine.save_to_file(text, tmp_path)
+            engine.runAndWait()
+            os.replace(tmp_path, path)
+            self.phrase_cache.added(key)
+        except Exception as e:
+            print(f"⚠️  Could not pre-render \"{text[:30]}...\": {e}")
+            self._discard_engine(engine)
+            engine = None
+        
+        return engine
+    
+    def _on_started(self, name):
+        """pyttsx3 callback: audio for the current utterance started"""
+        current = self.current
+        if current:
+            metrics.record('tts_first_audio', time.perf_counter() - current['requested_at'])
+    
+    def _watchdog_loop(self):
+        """Restart the worker if an utterance takes far longer than it should"""
+        while self.running:
+            time.sleep(1)
+            
+            with self.state_lock:
+                current = self.current
+                if not current:
+                    continue
                 
-                # Extra delay to ensure cleanup
-                time.sleep(0.1)
+                # Expected duration at the configured rate, with generous slack
+                words = max(1, len(current['text'].split()))
+                budget = words / self.rate * 60 * 2 + self.watchdog_timeout
+                if time.perf_counter() - current['started'] < budget:
+                    continue
                 
+                print("⚠️  TTS engine wedged - restarting speech worker")
+                self.generation += 1
+                self.restarts += 1
+                self.current = None
                 self.is_speaking = False
+                wedged = self.engine
+                self.engine = None
+            
+            self._complete(current['handle'])
+            if wedged is not None:
+                try:
+                    wedged.stop()
+                except Exception:
+                    pass
+            self._start_worker()
     
     def _clean_text(self, text):
         """Remove characters that break TTS"""
@@ -127,16 +492,30 @@ class VoiceController:
         return clean
     
     def is_busy(self):
-        return self.is_speaking
+        """True while speaking or while utterances are queued"""
+        with self.state_lock:
+            return self.pending > 0
     
     def stop(self):
-        self.is_speaking = False
+        """Drop queued utterances and stop the current one"""
+        self._drain(lambda item: True)
+        
+        with self.state_lock:
+            if self.current:
+                self.current['handle'].interrupted = True
+        self._stop_audio()
+    
+    def shutdown(self):
+        """Stop the speech worker"""
+        self.stop()
+        self.running = False
+        self.queue.put((-1, next(self.sequence), None))
 
 
 # Test with delays
 if __name__ == "__main__":
     print("="*70)
-    print("🎤 VOICE CONTROLLER TEST (AGGRESSIVE)")
+    print("🎤 VOICE CONTROLLER TEST (PERSISTENT ENGINE)")
     print("="*70)
     print()
     
@@ -155,11 +534,18 @@ if __name__ == "__main__":
         print(f"Test {i}/{len(test_phrases)}")
         print(f"{'='*70}")
         
+        # Same engine every time - no re-init or settle delays between lines
         voice.speak(phrase, block=True)
-        
-        # IMPORTANT: Wait between speeches
-        print(f"⏸️  Waiting 2 seconds before next speech...")
-        time.sleep(2)
+    
+    # Priorities: the user reply cuts off the random comment and drops the queued reaction
+    print(f"\n{'='*70}")
+    print("Priority test")
+    print(f"{'='*70}")
+    voice.speak("This random comment is rather long and will be cut off by the user reply", priority=RANDOM_COMMENT)
+    voice.speak("This screen reaction will never be heard", priority=SCREEN_REACTION)
+    time.sleep(1)
+    voice.speak("The user reply comes first!", interrupt=True, block=True)
+    print(f"📊 {voice.stats()}")
     
     print("\n" + "="*70)
     print("✅ Test complete!")
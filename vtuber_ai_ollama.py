@@ -1,14 +1,103 @@
 # vtuber_ai_ollama.py - COMPLETE with _generate method
 import ollama
+import asyncio
+import json
 import re
+import threading
+import time
+import weakref
+from pipeline_metrics import metrics
+from llm_scheduler import LLMScheduler, PRIORITY_USER
+from async_loop import get_loop
+from model_router import ModelRouter, ROUTE_CHAT, ROUTE_DECISION, installed_models
+
+FALLBACK_RESPONSE = "Hmm... I'm having trouble thinking right now~ >///<"
+
+# Schema for structured (JSON) decisions - target is the number of a detected object
+EMOTIONS = ['happy', 'excited', 'thinking', 'confused', 'proud', 'worried']
+# String lengths are capped so the whole object fits the 150-token decision budget
+# (a reply cut off mid-JSON would lose the action)
+DECISION_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'speech': {'type': 'string', 'maxLength': 200},
+        'action': {'type': 'string', 'enum': ['click', 'type', 'wait', 'talk']},
+        'target': {'type': 'integer'},
+        'text': {'type': 'string', 'maxLength': 80},
+        'emotion': {'type': 'string', 'enum': EMOTIONS},
+        'thinking': {'type': 'string', 'maxLength': 60},
+    },
+    'required': ['speech', 'action', 'target', 'emotion'],
+}
+
+# End of a sentence: punctuation (or cute markers) followed by whitespace
+SENTENCE_END = re.compile(r'[.!?♡~]+["\')\]]*\s+')
+
+
+def iter_sentences(pieces, min_chars=12):
+    """
+    Regroup streamed text pieces into whole sentences
+    
+    Args:
+        pieces: Iterable of text fragments (tokens)
+        min_chars: Don't split off fragments shorter than this ("Nya~ ")
+        
+    Yields: str sentences (with trailing whitespace stripped)
+    """
+    buffer = ""
+    for piece in pieces:
+        buffer += piece
+        while True:
+            match = None
+            for candidate in SENTENCE_END.finditer(buffer):
+                if candidate.end() >= min_chars:
+                    match = candidate
+                    break
+            if not match:
+                break
+            sentence, buffer = buffer[:match.end()].strip(), buffer[match.end():]
+            if sentence:
+                yield sentence
+    
+    if buffer.strip():
+        yield buffer.strip()
+
 
 class VTuberAI:
-    """VTuber AI using Ollama + Llama 3.2 3B"""
+    """
+    VTuber AI using Ollama + Llama 3.2 3B
+    
+    Talks to the chat endpoint with a byte-stable system message first, so Ollama
+    can reuse the evaluated personality prefix, and keeps the model loaded (keep_alive)
+    
+    Requests are routed by class (chat / reaction / decision) - e.g. a 1B model for
+    reactions and the 3B model for decisions (Ollama needs OLLAMA_MAX_LOADED_MODELS >= 2
+    to keep both in memory)
+    """
     
     def __init__(self, 
                  model_name="llama3.2:3b",
                  vtuber_name="Mimi",
-                 personality="cheerful"):
+                 personality="cheerful",
+                 host=None,
+                 keep_alive="30m",
+                 max_history=6,
+                 warm_up=True,
+                 request_timeout=60.0,
+                 structured=True,
+                 routes=None,
+                 keep_warm_every=600.0):
+        """
+        Args:
+            host: Ollama server (None = OLLAMA_HOST or localhost:11434)
+            keep_alive: How long Ollama keeps the model in memory after a request
+            max_history: Chat turns kept in the chat session
+            warm_up: Load the model and evaluate the system prompt right away
+            request_timeout: Seconds before a non-streaming request is cancelled
+            structured: analyze_and_act asks for schema-constrained JSON instead of free text sections
+            routes: {route: model} - model_router ROUTE_* to a model (unlisted routes use model_name)
+            keep_warm_every: Seconds between reloads of models that were not used (None = off)
+        """
         print(f"🌸 Initializing VTuber AI: {vtuber_name}")
         print(f"💖 Personality: {personality}")
         print(f"🧠 Using Ollama model: {model_name}")
@@ -16,17 +105,86 @@ class VTuberAI:
         self.model_name = model_name
         self.vtuber_name = vtuber_name
         self.personality = personality
+        self.keep_alive = keep_alive
+        self.max_history = max_history
+        self.host = host
+        self.request_timeout = request_timeout
+        self.structured = structured
+        self.router = ModelRouter(model_name, routes)
+        self.keep_warm_every = keep_warm_every
+        self.last_used = {}  # model -> time of the last request
+        self.client = ollama.Client(host=host)
+        self._async_clients = weakref.WeakKeyDictionary()  # event loop -> ollama.AsyncClient
+        self.scheduler = LLMScheduler()  # Priority / latest-wins for requests that opt in
+        
+        # Chat session: exact user/assistant messages as sent, replayed after the system message
+        self.history = []
+        self.history_lock = threading.Lock()
+        self._ticket = threading.local()  # Last scheduled request of each thread
         
-        # Check Ollama
+        # Check Ollama (and that every routed model is installed)
         try:
-            ollama.list()
+            listing = self.client.list()
             print("✅ Ollama is running!")
+            for route, model in self.router.restrict(installed_models(listing)):
+                print(f"⚠️  {model} is not installed (ollama pull {model}) - {route} uses {model_name}")
         except Exception as e:
             print(f"❌ Ollama error: {e}")
+        if len(self.router.models()) > 1:
+            print(f"🛣️  Routes: " + ", ".join(f"{route} → {model}" for route, model in self.router.routes.items()))
         
         self.system_prompt = self._get_personality_prompt()
+        self.system_message = {'role': 'system', 'content': self.system_prompt}
+        
+        if warm_up:
+            self.warm_up()
+            if keep_warm_every:
+                threading.Thread(target=self._keep_warm, daemon=True, name="llm_keep_warm").start()
+        
         print(f"✅ {vtuber_name} is ready!\n")
     
+    def warm_up(self, models=None, load_only=False):
+        """
+        Load the models and evaluate the system prompt once (later requests reuse it)
+        Warm-ups are not counted as usage
+        
+        Args:
+            load_only: Only (re)load the model and refresh its keep_alive - an empty request that
+                       generates nothing, so it never holds up a reply (used by the keep-warm thread)
+        """
+        for model in models or self.router.models():
+            try:
+                if load_only:
+                    self.client.chat(model=model, messages=[], keep_alive=self.keep_alive)
+                    self.last_used[model] = time.time()
+                    continue
+                response = self.client.chat(
+                    model=model,
+                    messages=[self.system_message, {'role': 'user', 'content': 'Hi!'}],
+                    options=self._options(1),
+                    keep_alive=self.keep_alive
+                )
+                self.last_used[model] = time.time()
+                print(f"🔥 {model} warm ({response.get('prompt_eval_count') or 0} prompt tokens cached)")
+            except Exception as e:
+                print(f"⚠️  Warm-up of {model} failed: {e}")
+    
+    def _keep_warm(self):
+        """Refresh models that were idle for keep_warm_every (before keep_alive unloads them)"""
+        while True:
+            time.sleep(self.keep_warm_every / 4)
+            now = time.time()
+            idle = [model for model in self.router.models()
+                    if now - self.last_used.get(model, 0) >= self.keep_warm_every]
+            if idle:
+                self.warm_up(idle, load_only=True)
+    
+    def _model(self, route):
+        """Model of a route (marked as used)"""
+        model = self.router.model_for(route)
+        self.last_used[model] = time.time()
+        return model
+    
     def _get_personality_prompt(self):
         """Get system prompt"""
         personalities = {
@@ -67,55 +225,336 @@ Your Personality:
         
         return personalities.get(self.personality, personalities["cheerful"])
     
-    def _generate(self, prompt, max_tokens=300):
+    def _options(self, max_tokens):
+        """Sampling options shared by every request"""
+        return {
+            'temperature': 0.8,
+            'top_p': 0.9,
+            'top_k': 50,
+            'num_predict': max_tokens,
+        }
+    
+    def _messages(self, prompt, history=()):
+        """
+        Chat messages for a prompt: the system prompt always goes first, byte for byte,
+        so the evaluated prefix can be reused (prompts that start with it are split)
+        """
+        if prompt.startswith(self.system_prompt):
+            prompt = prompt[len(self.system_prompt):].lstrip('\n')
+        return [self.system_message] + list(history) + [{'role': 'user', 'content': prompt}]
+    
+    def usage_report(self):
+        """Prompt tokens Ollama had to evaluate (low = prefix reused), in total and per route"""
+        return self.router.report()
+    
+    def _generate(self, prompt, max_tokens=300, on_chunk=None, priority=None, key=None, route=ROUTE_CHAT):
         """
         Generate text using Ollama
         
         Args:
             prompt: The prompt to generate from
             max_tokens: Maximum tokens to generate
+            on_chunk: Optional callback(str) - streams tokens as they arrive
+            priority: Schedule the request (llm_scheduler PRIORITY_*) - None = run right away
+            key: Staleness key - a newer request with the same key aborts this one
+            route: Request class (model_router ROUTE_*) - picks the model
             
         Returns:
-            str: Generated text
+            str: Generated text ("" if the request was cancelled)
         """
+        return self._complete(self._messages(prompt), max_tokens, on_chunk, priority, key, route=route)
+    
+    def _complete(self, messages, max_tokens, on_chunk=None, priority=None, key=None, output_format=None,
+                  route=ROUTE_CHAT):
+        """
+        Run one chat request (streamed to on_chunk if given) and return the raw reply
+        
+        Args:
+            output_format: Ollama format - 'json' or a JSON schema dict (None = free text)
+        """
+        if priority is not None:
+            # Scheduled requests always stream so they can be aborted between tokens
+            pieces = []
+            for piece in self._scheduled_stream(messages, max_tokens, priority, key, output_format, route):
+                if on_chunk:
+                    on_chunk(piece)
+                pieces.append(piece)
+            return "".join(pieces).strip() if not self._last_cancelled() else ""
+        
+        if on_chunk is not None:
+            pieces = []
+            for piece in self._stream_tokens(messages, max_tokens, output_format=output_format, route=route):
+                on_chunk(piece)
+                pieces.append(piece)
+            return "".join(pieces).strip()
+        
+        # Sync wrapper: the request itself runs on the shared asyncio loop
         try:
-            response = ollama.generate(
-                model=self.model_name,
-                prompt=prompt,
-                options={
-                    'temperature': 0.8,
-                    'top_p': 0.9,
-                    'top_k': 50,
-                    'num_predict': max_tokens,
-                }
+            return get_loop().run(self._achat(messages, max_tokens, output_format, route), timeout=self.request_timeout)
+        except Exception as e:
+            print(f"⚠️  Generation error: {e or type(e).__name__}")
+            return FALLBACK_RESPONSE
+    
+    # ==================== ASYNC API ====================
+    
+    def _get_async_client(self):
+        """AsyncClient of the running loop (its connection pool only works on the loop it was created on)"""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = ollama.AsyncClient(host=self.host)
+        return client
+    
+    async def _achat(self, messages, max_tokens, output_format=None, route=ROUTE_CHAT):
+        """One non-streaming chat request on the event loop"""
+        start = time.perf_counter()
+        with metrics.timer('llm_generate'):
+            response = await self._get_async_client().chat(
+                model=self._model(route),
+                messages=messages,
+                options=self._options(max_tokens),
+                format=output_format,
+                keep_alive=self.keep_alive
             )
+        
+        # Non-streaming: first token ≈ model load + prompt evaluation (reported in ns)
+        first_token_ns = (response.get('load_duration') or 0) + (response.get('prompt_eval_duration') or 0)
+        if first_token_ns:
+            metrics.record('llm_first_token', first_token_ns / 1e9)
+        self.router.record(route, time.perf_counter() - start, first_token_ns / 1e9 if first_token_ns else None, response)
+        
+        return response['message']['content'].strip()
+    
+    async def agenerate(self, prompt, max_tokens=300, timeout=None, route=ROUTE_CHAT):
+        """
+        Generate text (asyncio) - many of these can run concurrently on one loop
+        
+        Args:
+            timeout: Seconds before the request is cancelled (None = request_timeout)
+            route: Request class (model_router ROUTE_*) - picks the model
             
-            return response['response'].strip()
+        Returns:
+            str: Generated text (FALLBACK_RESPONSE on error / timeout)
+        """
+        try:
+            return await asyncio.wait_for(self._achat(self._messages(prompt), max_tokens, route=route),
+                                          timeout or self.request_timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️  Generation timed out after {timeout or self.request_timeout:.0f}s")
+            return FALLBACK_RESPONSE
+        except Exception as e:
+            print(f"⚠️  Generation error: {e}")
+            return FALLBACK_RESPONSE
+    
+    async def astream(self, prompt, max_tokens=300, route=ROUTE_CHAT):
+        """
+        Stream tokens (asyncio) - cancelling the consuming task closes the connection
+        
+        Yields: str pieces
+        """
+        start = time.perf_counter()
+        first_token = None
+        final = None
+        
+        try:
+            stream = await self._get_async_client().chat(
+                model=self._model(route),
+                messages=self._messages(prompt),
+                options=self._options(max_tokens),
+                keep_alive=self.keep_alive,
+                stream=True
+            )
             
+            async for part in stream:
+                if part.get('done'):
+                    final = part
+                token = part['message']['content'] if part.get('message') else ''
+                if not token:
+                    continue
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                    metrics.record('llm_first_token', first_token)
+                yield token
+        
         except Exception as e:
             print(f"⚠️  Generation error: {e}")
-            return "Hmm... I'm having trouble thinking right now~ >///<"
+            if first_token is None:
+                yield FALLBACK_RESPONSE
+        
+        finally:
+            metrics.record('llm_generate', time.perf_counter() - start)
+            self.router.record(route, time.perf_counter() - start, first_token, final)
     
-    def analyze_and_act(self, screen_summary, user_task="help me with the screen"):
-        """Main method: Analyze screen and decide action"""
+    def submit(self, prompt, max_tokens=300, timeout=None, route=ROUTE_CHAT):
+        """
+        Start a request without blocking or spawning a thread
         
-        prompt = self._build_vtuber_prompt(screen_summary, user_task)
-        response = self._generate(prompt, max_tokens=300)
-        result = self._parse_vtuber_response(response, screen_summary)
+        Returns:
+            concurrent.futures.Future[str] - future.cancel() aborts the request
+        """
+        return get_loop().submit(self.agenerate(prompt, max_tokens, timeout, route))
+    
+    def generate_many(self, prompts, max_tokens=100, timeout=None, route=ROUTE_CHAT):
+        """Run several prompts concurrently on the event loop (sync wrapper) - returns list of str"""
+        async def gather():
+            return await asyncio.gather(*(self.agenerate(prompt, max_tokens, timeout, route) for prompt in prompts))
+        return get_loop().run(gather())
+    
+    def generate_stream(self, prompt, max_tokens=300, chunk='token', priority=None, key=None, route=ROUTE_CHAT):
+        """
+        Stream text from Ollama as it is generated
+        
+        Args:
+            prompt: The prompt to generate from
+            max_tokens: Maximum tokens to generate
+            chunk: 'token' (raw pieces) or 'sentence' (whole sentences)
+            priority: Schedule the request (llm_scheduler PRIORITY_*) - None = run right away
+            key: Staleness key - a newer request with the same key aborts this one
+            route: Request class (model_router ROUTE_*) - picks the model
+            
+        Yields: str pieces (the stream just ends if the request is cancelled)
+        """
+        messages = self._messages(prompt)
+        if priority is not None:
+            tokens = self._scheduled_stream(messages, max_tokens, priority, key, route=route)
+        else:
+            tokens = self._stream_tokens(messages, max_tokens, route=route)
+        if chunk == 'sentence':
+            return iter_sentences(tokens)
+        return tokens
+    
+    def _scheduled_stream(self, messages, max_tokens, priority, key, output_format=None, route=ROUTE_CHAT):
+        """Token stream that waits for its turn and stops when pre-empted or stale"""
+        with self.scheduler.request(priority, key) as ticket:
+            self._ticket.current = ticket
+            if ticket.is_cancelled():
+                return
+            yield from self._stream_tokens(messages, max_tokens, ticket, output_format, route)
+    
+    def _last_cancelled(self):
+        """True if this thread's last scheduled request was cancelled"""
+        ticket = getattr(self._ticket, 'current', None)
+        return ticket is not None and ticket.is_cancelled()
+    
+    def _stream_tokens(self, messages, max_tokens, ticket=None, output_format=None, route=ROUTE_CHAT):
+        """Raw token stream (records time to first token)"""
+        start = time.perf_counter()
+        first_token = None
+        final = None
+        
+        try:
+            stream = self.client.chat(
+                model=self._model(route),
+                messages=messages,
+                options=self._options(max_tokens),
+                format=output_format,
+                keep_alive=self.keep_alive,
+                stream=True
+            )
+            
+            for part in stream:
+                if ticket is not None and ticket.is_cancelled():
+                    # Closing the stream drops the connection - Ollama stops generating
+                    stream.close()
+                    print(f"✂️  LLM request aborted ({ticket.reason})")
+                    break
+                if part.get('done'):
+                    final = part
+                token = part['message']['content'] if part.get('message') else ''
+                if not token:
+                    continue
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                    metrics.record('llm_first_token', first_token)
+                yield token
+        
+        except Exception as e:
+            print(f"⚠️  Generation error: {e}")
+            if first_token is None and not (ticket is not None and ticket.is_cancelled()):
+                yield FALLBACK_RESPONSE
+        
+        finally:
+            metrics.record('llm_generate', time.perf_counter() - start)
+            self.router.record(route, time.perf_counter() - start, first_token, final)
+    
+    def analyze_and_act(self, screen_summary, user_task="help me with the screen", on_chunk=None,
+                        priority=None, key=None, objects=None):
+        """
+        Main method: Analyze screen and decide action
+        
+        Args:
+            on_chunk: Optional callback(str) receiving the raw response while it streams
+            priority, key: Schedule the request (see _generate)
+            objects: Detections listed in screen_summary (structured mode resolves the target index with them)
+            
+        Returns: dict (with 'cancelled': True and no speech if a newer request won)
+        """
+        
+        if self.structured:
+            prompt = self._build_structured_prompt(screen_summary, user_task)
+            response = self._complete(self._messages(prompt), 150, on_chunk, priority, key,
+                                      output_format=DECISION_SCHEMA, route=ROUTE_DECISION)
+            result = self._parse_structured_response(response, screen_summary, objects)
+        else:
+            prompt = self._build_vtuber_prompt(screen_summary, user_task)
+            response = self._generate(prompt, max_tokens=300, on_chunk=on_chunk, priority=priority, key=key,
+                                      route=ROUTE_DECISION)
+            result = self._parse_vtuber_response(response, screen_summary)
+        
+        result['cancelled'] = priority is not None and self._last_cancelled()
+        if result['cancelled']:
+            result['vtuber_speech'] = ''
+            result['action_type'] = 'wait'
         
         return result
     
-    def chat(self, user_message):
-        """Just chat with the VTuber"""
-        prompt = f"""{self.system_prompt}
+    def _build_chat_prompt(self, user_message):
+        """Prompt for plain chatting"""
+        return f"""{self.system_prompt}
 
 User says: "{user_message}"
 
 Respond as {self.vtuber_name} in a friendly, conversational way!
 
 {self.vtuber_name}:"""
+    
+    def _session_messages(self, user_message):
+        """Chat session messages: system + previous turns (append-only prefix) + this turn"""
+        with self.history_lock:
+            history = list(self.history)
+        return self._messages(self._build_chat_prompt(user_message), history)
+    
+    def _remember(self, messages, reply):
+        """Add a finished turn to the chat session"""
+        with self.history_lock:
+            self.history.extend([messages[-1], {'role': 'assistant', 'content': reply}])
+            # Trim in big steps so the replayed prefix stays stable between trims
+            if len(self.history) > self.max_history * 2:
+                self.history = self.history[-max(1, self.max_history // 2) * 2:]
+    
+    def chat_stream(self, user_message, chunk='sentence'):
+        """Stream a chat reply (sentences by default)"""
+        messages = self._session_messages(user_message)
+        
+        def tokens():
+            pieces = []
+            for token in self._scheduled_stream(messages, 150, PRIORITY_USER, None):
+                pieces.append(token)
+                yield token
+            if not self._last_cancelled():
+                self._remember(messages, "".join(pieces).strip())
         
-        response = self._generate(prompt, max_tokens=150)
+        if chunk == 'sentence':
+            return iter_sentences(tokens())
+        return tokens()
+    
+    def chat(self, user_message, on_chunk=None):
+        """Just chat with the VTuber"""
+        messages = self._session_messages(user_message)
+        
+        response = self._complete(messages, 150, on_chunk=on_chunk, priority=PRIORITY_USER)
+        if response and response != FALLBACK_RESPONSE:
+            self._remember(messages, response)
         
         # Clean up
         lines = response.split('\n')
@@ -147,12 +586,75 @@ Now respond!
         
         return prompt
     
+    def _build_structured_prompt(self, screen_summary, user_task):
+        """Prompt for a JSON decision (the schema enforces the structure)"""
+        return f"""{self.system_prompt}
+
+📺 CURRENT SCREEN:
+{screen_summary}
+
+👤 USER TASK: {user_task}
+
+Decide what to do as {self.vtuber_name} and answer in JSON:
+- speech: what you say out loud (cute and friendly, 1-2 sentences)
+- action: "click", "type", "wait" or "talk"
+- target: number of the detected object to click (0 = none)
+- text: what to type (only for "type")
+- emotion: {", ".join(EMOTIONS)}
+- thinking: a few words about what you see"""
+    
+    def _parse_structured_response(self, response, screen_summary, objects=None):
+        """Turn a JSON decision into the same dict as _parse_vtuber_response"""
+        try:
+            decision = json.loads(response)
+        except ValueError:
+            # Not JSON (e.g. fallback text) - use the text parser
+            return self._parse_vtuber_response(response, screen_summary)
+        if not isinstance(decision, dict):
+            decision = {}  # Valid JSON but not an object - nothing usable
+        
+        action = decision.get('action') if decision.get('action') in ('click', 'type', 'wait', 'talk') else 'wait'
+        emotion = decision.get('emotion') if decision.get('emotion') in EMOTIONS else 'thinking'
+        result = {
+            'vtuber_speech': str(decision.get('speech') or "Hmm... let me think~ ♡")[:300],
+            'action_type': action,
+            'target': None,
+            'target_index': None,
+            'coordinates': None,
+            'keyboard_input': None,
+            'emotion': emotion,
+            'reasoning': str(decision.get('thinking') or '')[:200],
+        }
+        
+        if action == 'type':
+            result['keyboard_input'] = decision.get('text') or None
+        
+        index = decision.get('target')
+        if action == 'click' and isinstance(index, int) and index > 0:
+            result['target_index'] = index
+            if objects is not None:
+                if index <= len(objects):
+                    result['target'] = objects[index - 1]['class_name']
+                    result['coordinates'] = list(objects[index - 1]['center'])
+            else:
+                result['target'], result['coordinates'] = self._object_at_index(index, screen_summary)
+        
+        return result
+    
+    def _object_at_index(self, index, screen_summary):
+        """(name, [x, y]) of the numbered entry in the summary's object list"""
+        match = re.search(rf'^\s*{index}\. (.+?) at position \[(\d+),\s*(\d+)\]', screen_summary, re.MULTILINE)
+        if not match:
+            return None, None
+        return match.group(1), [int(match.group(2)), int(match.group(3))]
+    
     def _parse_vtuber_response(self, response, screen_summary):
         """Parse VTuber's response"""
         result = {
             'vtuber_speech': "Hmm... let me think~ ♡",
             'action_type': 'wait',
             'target': None,
+            'target_index': None,
             'coordinates': None,
             'keyboard_input': None,
             'emotion': 'thinking',
@@ -1,7 +1,10 @@
 # yolo_detector.py
-from ultralytics import YOLO
+from lazy_imports import lazy_import
 import numpy as np
 
+# Heavy - imported on first use
+ultralytics = lazy_import('ultralytics')
+
 class ScreenElementDetector:
     """YOLOv8 detector for screen UI elements"""
     
@@ -12,7 +15,7 @@ class ScreenElementDetector:
             confidence: Minimum confidence threshold (0-1)
         """
         print(f"📦 Loading model: {model_path}")
-        self.model = YOLO(model_path)
+        self.model = ultralytics.YOLO(model_path)
         self.confidence = confidence
         self.class_names = self.model.names
         print(f"✅ Model loaded with {len(self.class_names)} classes")